@@ -6,8 +6,11 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
-    # 初始化扩展 (postgres, chroma)
+    # 初始化扩展 (postgres；chroma在首次使用时初始化)
     initialize_extensions()
+    if config_class.MASTERY_CHANGE_LISTENER:
+        from app.services.cache_invalidation import start_listener
+        start_listener()
     
     # 注册蓝图
     from app.views.auth import auth_bp
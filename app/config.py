@@ -15,3 +15,91 @@ class Config:
     
     # Chroma配置
     CHROMA_PERSIST_DIRECTORY = os.environ.get('CHROMA_PERSIST_DIRECTORY') or 'chroma_db'
+
+    # 大模型配置
+    # LLM_PROVIDER: deepseek / lm_studio / silicon
+    LLM_PROVIDER = os.environ.get('LLM_PROVIDER') or 'deepseek'
+    LM_STUDIO_BASE_URL = os.environ.get('LM_STUDIO_BASE_URL') or 'http://127.0.0.1:1234/v1'
+    LM_STUDIO_MODEL = os.environ.get('LM_STUDIO_MODEL') or 'meta-llama-3.1-8b-instruct'
+    # 本地模型请求调度：同时发给本地服务的请求数、排队请求数上限
+    LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY') or 4)
+    LLM_MAX_QUEUE_SIZE = int(os.environ.get('LLM_MAX_QUEUE_SIZE') or 256)
+
+    # 联网搜索工具配置：结果缓存目录、缓存有效期（秒）、请求超时（秒）
+    SEARCH_CACHE_DIRECTORY = os.environ.get('SEARCH_CACHE_DIRECTORY') or 'data/cache/search'
+    SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL') or 24 * 3600)
+    SEARCH_TIMEOUT = float(os.environ.get('SEARCH_TIMEOUT') or 10)
+
+    # agent的SQL查询工具：使用只读角色连接，限制执行时间和返回行数
+    SQL_TOOL_DATABASE_USER = os.environ.get('SQL_TOOL_DATABASE_USER') or 'eduassistant_readonly'
+    SQL_TOOL_DATABASE_PASSWORD = os.environ.get('SQL_TOOL_DATABASE_PASSWORD') or ''
+    SQL_TOOL_STATEMENT_TIMEOUT_MS = int(os.environ.get('SQL_TOOL_STATEMENT_TIMEOUT_MS') or 5000)
+    SQL_TOOL_MAX_ROWS = int(os.environ.get('SQL_TOOL_MAX_ROWS') or 200)
+    SQL_TOOL_POOL_SIZE = int(os.environ.get('SQL_TOOL_POOL_SIZE') or 5)
+
+    # agent工具路由：每次只把与问题最相关的TOP_K个工具写入prompt，0表示关闭
+    TOOL_ROUTING_TOP_K = int(os.environ.get('TOOL_ROUTING_TOP_K') or 6)
+    TOOL_ROUTING_MIN_SCORE = float(os.environ.get('TOOL_ROUTING_MIN_SCORE') or 0.25)
+
+    # 学习活动按天汇总：只汇总写入超过LAG秒的记录，避免遗漏尚未提交的事务
+    ROLLUP_SAFETY_LAG_SECONDS = int(os.environ.get('ROLLUP_SAFETY_LAG_SECONDS') or 60)
+    ROLLUP_BATCH_SIZE = int(os.environ.get('ROLLUP_BATCH_SIZE') or 50000)
+
+    # 学习活动批量写入：先写入本地spool文件，达到数量或时间阈值后批量插入数据库
+    ACTIVITY_SPOOL_DIRECTORY = os.environ.get('ACTIVITY_SPOOL_DIRECTORY') or 'data/spool/activities'
+    ACTIVITY_BUFFER_MAX_SIZE = int(os.environ.get('ACTIVITY_BUFFER_MAX_SIZE') or 500)
+    ACTIVITY_BUFFER_FLUSH_INTERVAL = float(os.environ.get('ACTIVITY_BUFFER_FLUSH_INTERVAL') or 2.0)
+    ACTIVITY_BULK_MAX_EVENTS = int(os.environ.get('ACTIVITY_BULK_MAX_EVENTS') or 500)
+
+    # 学习活动表按月分区：预建分区的月数，以及保留的月数（0表示永久保留）和删除前的归档目录
+    ACTIVITY_PARTITION_MONTHS_AHEAD = int(os.environ.get('ACTIVITY_PARTITION_MONTHS_AHEAD') or 3)
+    ACTIVITY_RETENTION_MONTHS = int(os.environ.get('ACTIVITY_RETENTION_MONTHS') or 0)
+    ACTIVITY_ARCHIVE_DIRECTORY = os.environ.get('ACTIVITY_ARCHIVE_DIRECTORY') or ''
+
+    # 课程掌握度矩阵的进程内缓存，掌握度更新时立即失效，其他进程的更新最多延迟TTL秒
+    MASTERY_CACHE_TTL = float(os.environ.get('MASTERY_CACHE_TTL') or 300)
+    MASTERY_CACHE_MAX_COURSES = int(os.environ.get('MASTERY_CACHE_MAX_COURSES') or 256)
+
+    # 学生分析快照的进程内缓存，学习活动、掌握度和作业变化时立即失效，TTL为兜底
+    STUDENT_ANALYTICS_CACHE_TTL = float(os.environ.get('STUDENT_ANALYTICS_CACHE_TTL') or 60)
+    STUDENT_ANALYTICS_CACHE_MAX_ENTRIES = int(os.environ.get('STUDENT_ANALYTICS_CACHE_MAX_ENTRIES') or 10000)
+
+    # 是否在后台线程中接收其他进程（如事件消费者）的掌握度变化通知，立即使本进程的缓存失效
+    MASTERY_CHANGE_LISTENER = (os.environ.get('MASTERY_CHANGE_LISTENER') or '1') == '1'
+
+    # 学生仪表盘数据的进程内缓存，选课、作业和学习活动变化时立即失效，TTL为兜底
+    DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL') or 60)
+    DASHBOARD_CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES') or 10000)
+
+    # 掌握度遗忘曲线：掌握度为0时的半衰期（天，掌握度为1时加倍），保持率降到目标值时安排复习
+    MASTERY_HALF_LIFE_DAYS = float(os.environ.get('MASTERY_HALF_LIFE_DAYS') or 7)
+    REVIEW_TARGET_RETENTION = float(os.environ.get('REVIEW_TARGET_RETENTION') or 0.7)
+
+    # 群体分位数草图：KLL精度参数k、stale草图的最短重建间隔（秒）、直接查询精确值的最大群体人数
+    COHORT_SKETCH_K = int(os.environ.get('COHORT_SKETCH_K') or 200)
+    COHORT_SKETCH_REFRESH_SECONDS = int(os.environ.get('COHORT_SKETCH_REFRESH_SECONDS') or 60)
+    COHORT_EXACT_MAX_SIZE = int(os.environ.get('COHORT_EXACT_MAX_SIZE') or 500)
+
+    # 参与度时间序列：结果缓存秒数与条目数、单次请求的最大时间桶数
+    ENGAGEMENT_CACHE_TTL = float(os.environ.get('ENGAGEMENT_CACHE_TTL') or 30)
+    ENGAGEMENT_CACHE_MAX_ENTRIES = int(os.environ.get('ENGAGEMENT_CACHE_MAX_ENTRIES') or 1024)
+    ENGAGEMENT_MAX_BUCKETS = int(os.environ.get('ENGAGEMENT_MAX_BUCKETS') or 2000)
+
+    # 学习风险评分：逻辑回归参数文件（为空时使用内置的默认权重）、每批（每个进程任务）评分的课程数
+    RISK_MODEL_PATH = os.environ.get('RISK_MODEL_PATH') or ''
+    RISK_SCORE_CHUNK_COURSES = int(os.environ.get('RISK_SCORE_CHUNK_COURSES') or 50)
+
+    # 学习事件日志：消费者每批处理的事件数、只处理发布超过LAG秒的事件（避免遗漏尚未提交的事务）、
+    # 所有消费者都处理过的事件保留的天数
+    EVENT_CONSUMER_BATCH_SIZE = int(os.environ.get('EVENT_CONSUMER_BATCH_SIZE') or 1000)
+    EVENT_SAFETY_LAG_SECONDS = int(os.environ.get('EVENT_SAFETY_LAG_SECONDS') or 10)
+    EVENT_RETENTION_DAYS = int(os.environ.get('EVENT_RETENTION_DAYS') or 30)
+
+    # 作业和知识点统计：计算区分度所需的最少学生数
+    ITEM_STATISTICS_MIN_STUDENTS = int(os.environ.get('ITEM_STATISTICS_MIN_STUDENTS') or 5)
+
+    # 分析接口耗时统计：超过该毫秒数的调用记入慢调用日志（保留最近SIZE条）；
+    # 设置TOKEN后/admin/metrics也接受Authorization: Bearer <TOKEN>，便于监控系统抓取
+    METRICS_SLOW_CALL_MS = float(os.environ.get('METRICS_SLOW_CALL_MS') or 500)
+    METRICS_SLOW_LOG_SIZE = int(os.environ.get('METRICS_SLOW_LOG_SIZE') or 100)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or ''
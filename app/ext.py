@@ -1,13 +1,74 @@
 # extensions
 
+from peewee import _savepoint
 from playhouse.postgres_ext import PostgresqlExtDatabase
-from chromadb import PersistentClient
+import threading
 import os
+from app.utils.logging import logger
+from app.utils.metrics import record_query
 
-db = PostgresqlExtDatabase(None)
+class _Savepoint(_savepoint):
+    """回滚到保存点时丢弃保存点内登记的提交后回调"""
+
+    def __enter__(self):
+        self._mark = len(self.db._after_commit())
+        return super().__enter__()
+
+    def rollback(self):
+        super().rollback()
+        del self.db._after_commit()[self._mark:]
+
+class InstrumentedDatabase(PostgresqlExtDatabase):
+    """每条SQL执行后把语句数和返回（或修改）的行数计入当前线程正在统计的调用，见app.utils.metrics；
+    on_commit登记的回调在事务提交后执行"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._callbacks = threading.local()
+
+    def execute_sql(self, sql, params=None, commit=None):
+        cursor = super().execute_sql(sql, params, commit)
+        record_query(cursor.rowcount)
+        return cursor
+
+    def _after_commit(self):
+        if not hasattr(self._callbacks, 'pending'):
+            self._callbacks.pending = []
+        return self._callbacks.pending
+
+    def on_commit(self, callback):
+        """当前线程的事务提交后调用callback，事务回滚时丢弃；不在事务中时立即调用。
+
+        用于更新进程内缓存：在事务内更新会让其他请求在提交前读到未提交的数据，
+        事务回滚后缓存中还会留下从未生效的数据。
+        """
+        if self.in_transaction():
+            self._after_commit().append(callback)
+        else:
+            callback()
+
+    def savepoint(self, sid=None):
+        return _Savepoint(self, sid)
+
+    def commit(self):
+        result = super().commit()
+        callbacks, self._callbacks.pending = self._after_commit(), []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"After-commit callback failed: {e}")
+        return result
+
+    def rollback(self):
+        self._callbacks.pending = []
+        return super().rollback()
+
+db = InstrumentedDatabase(None)
 
 chroma_client = None
 knowledge_base_collection = None
+_chroma_lock = threading.Lock()
 
 def initialize_extensions():
     # initialize database
@@ -16,9 +77,15 @@ def initialize_extensions():
             user=os.getenv("DATABASE_USER"),
             password=os.getenv("DATABASE_PASSWORD"),
             port=os.getenv("DATABASE_PORT"))
-    
+
+    # chroma在首次使用知识库时才初始化，避免启动时导入chromadb
+
+def get_knowledge_base_collection():
     # initialize chroma
-    global chroma_client
-    chroma_client = PersistentClient(path=os.getenv("CHROMA_PERSIST_DIRECTORY"))
-    global knowledge_base_collection
-    knowledge_base_collection = chroma_client.get_or_create_collection("knowledge_base")
\ No newline at end of file
+    global chroma_client, knowledge_base_collection
+    with _chroma_lock:
+        if knowledge_base_collection is None:
+            from chromadb import PersistentClient
+            chroma_client = PersistentClient(path=os.getenv("CHROMA_PERSIST_DIRECTORY"))
+            knowledge_base_collection = chroma_client.get_or_create_collection("knowledge_base")
+        return knowledge_base_collection
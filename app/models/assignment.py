@@ -10,6 +10,11 @@ class Assignment(BaseModel):
     due_date = DateTimeField()
     total_points = FloatField(default=100.0)
     
+    class Meta:
+        indexes = (
+            (('course', 'due_date'), False),  # 按课程读取最近的作业
+        )
+    
     def __repr__(self):
         return f'<Assignment {self.title} for {self.course.code}>'
 
@@ -1,4 +1,4 @@
-from peewee import CharField, TextField, ForeignKeyField, DateTimeField, FloatField, IntegerField
+from peewee import CharField, TextField, ForeignKeyField, DateField, DateTimeField, FloatField, IntegerField, BigIntegerField, BooleanField, BigAutoField, SQL
 from playhouse.postgres_ext import JSONField
 from app.models.base import BaseModel
 from app.models.user import User
@@ -20,10 +20,12 @@ class StudentKnowledgePoint(BaseModel):
     knowledge_point = ForeignKeyField(KnowledgePoint, backref='student_progress')
     mastery_level = FloatField(default=0.0)  # 0-1表示掌握程度
     last_interaction = DateTimeField(null=True)
+    review_due_at = DateTimeField(null=True)  # 按遗忘曲线预测需要复习的时间，随掌握度更新
     
     class Meta:
         indexes = (
             (('student', 'knowledge_point'), True),
+            (('student', 'review_due_at'), False),
         )
 
 class LearningActivity(BaseModel):
@@ -34,6 +36,129 @@ class LearningActivity(BaseModel):
     duration = IntegerField(default=0)  # 活动持续时间（秒）
     timestamp = DateTimeField()
     metadata = JSONField(null=True)  # 存储额外数据，如页面访问路径、交互细节等
+    # 记录实际写入数据库的时间，由数据库生成；缓冲或补写的记录timestamp可能早得多
+    inserted_at = DateTimeField(null=True, constraints=[SQL('DEFAULT clock_timestamp()')])
+
+    class Meta:
+        # 表按timestamp按月分区，由PartitionService建表，主键为(id, timestamp)
+        indexes = (
+            (('student', 'course', 'timestamp'), False),
+            (('course', 'timestamp'), False),
+        )
+
+LearningActivity.add_index(LearningActivity.index(LearningActivity.timestamp, using='brin'))
+
+class DailyActivityRollup(BaseModel):
+    """学习活动按天汇总，由ActivityRollupService根据水位线增量维护"""
+    student = ForeignKeyField(User, backref='daily_activity_rollups')
+    course = ForeignKeyField(Course, backref='daily_activity_rollups')
+    day = DateField()
+    activity_type = CharField(max_length=50)
+    activity_count = IntegerField(default=0)
+    total_duration = BigIntegerField(default=0)  # 秒
+
+    class Meta:
+        table_name = 'daily_activity_rollup'
+        indexes = (
+            (('student', 'course', 'day', 'activity_type'), True),
+            (('course', 'day'), False),
+        )
+
+class RollupWatermark(BaseModel):
+    """汇总任务的水位线，记录已汇总的最大源记录ID"""
+    name = CharField(max_length=100, unique=True)
+    last_id = BigIntegerField(default=0)
+
+    class Meta:
+        table_name = 'rollup_watermark'
+
+class LearningIssue(BaseModel):
+    """学习问题快照，由LearningIssueService定期批量检测后刷新；course为空表示跨所有课程的汇总"""
+    student = ForeignKeyField(User, backref='learning_issues')
+    course = ForeignKeyField(Course, backref='learning_issues', null=True)
+    issue_type = CharField(max_length=30)  # low_mastery、overdue_assignments、inactive
+    message = CharField(max_length=255)
+    details = JSONField(null=True)
+    detected_at = DateTimeField()
+
+    class Meta:
+        table_name = 'issues'
+        indexes = (
+            (('student', 'course'), False),
+            (('course', 'issue_type'), False),
+        )
+
+class CohortSketch(BaseModel):
+    """群体分布的KLL分位数草图，由CohortService维护；scope为course_mastery时scope_id是课程ID，
+    为assignment_score时是作业ID"""
+    scope = CharField(max_length=30)
+    scope_id = IntegerField()
+    sketch = JSONField()
+    stale = BooleanField(default=False)  # 草图中有已被修改的旧值，下次读取时按需重建
+
+    class Meta:
+        table_name = 'cohort_sketches'
+        indexes = (
+            (('scope', 'scope_id'), True),
+        )
+
+class RiskScore(BaseModel):
+    """学生在课程中的学习风险评分，由RiskService批量计算；rank为课程内的风险排名（1风险最高）"""
+    student = ForeignKeyField(User, backref='risk_scores')
+    course = ForeignKeyField(Course, backref='risk_scores')
+    score = FloatField()  # 0-1，模型预测的风险概率
+    rank = IntegerField()
+    features = JSONField()  # 特征名到特征值的字典，用于解释评分
+    scored_at = DateTimeField()
+
+    class Meta:
+        table_name = 'risk_scores'
+        indexes = (
+            (('student', 'course'), True),
+            (('course', 'rank'), False),
+        )
+
+class ItemStatistic(BaseModel):
+    """作业或知识点的题目统计（难度、得分方差、区分度），由ItemStatisticsService按课程批量计算；
+    scope为assignment时scope_id是作业ID，为knowledge_point时是知识点ID"""
+    scope = CharField(max_length=30)
+    scope_id = IntegerField()
+    course = ForeignKeyField(Course, backref='item_statistics')
+    student_count = IntegerField()  # 有评分记录的学生数
+    mean_score = FloatField()  # 平均得分率，0-1
+    difficulty = FloatField()  # 1 - 平均得分率，越大越难
+    variance = FloatField(null=True)  # 得分率的样本方差
+    discrimination = FloatField(null=True)  # 得分率与其余作业得分率的相关系数（修正的题目-总分相关）
+    computed_at = DateTimeField()
+
+    class Meta:
+        table_name = 'item_statistics'
+        indexes = (
+            (('scope', 'scope_id'), True),
+            (('course', 'scope'), False),
+        )
+
+class LearningEvent(BaseModel):
+    """只追加的学习事件日志（活动、作业提交、评分），由EventService发布，消费者按ID顺序增量处理；
+    学生和课程只记录ID，不加外键约束"""
+    id = BigAutoField()
+    event_type = CharField(max_length=50)
+    student_id = IntegerField()
+    course_id = IntegerField(null=True)
+    payload = JSONField(null=True)
+    occurred_at = DateTimeField()
+
+    class Meta:
+        table_name = 'learning_events'
+
+class EventConsumerOffset(BaseModel):
+    """事件消费者的游标，记录已处理的最大事件ID"""
+    name = CharField(max_length=100, unique=True)
+    last_id = BigIntegerField(default=0)
+    processed = BigIntegerField(default=0)  # 累计交给处理函数的事件数
+
+    class Meta:
+        table_name = 'event_consumer_offsets'
 
 class AssignmentKnowledgePoint(BaseModel):
     assignment = ForeignKeyField(Assignment, backref='knowledge_points')
@@ -4,16 +4,14 @@
 #from src.tools.google import web_search as google_search
 #from .tools.wiki import search as wiki_search
 #from .tools.bocha import bocha_search
-#from .tools.sql import *
 #from vertexai.generative_models import Part 
 from app.utils.io import write_to_file
 from app.utils.logging import logger
 #from src.config.setup import config
 #from app.utils.llm.gemini import generate
-from app.utils.llm.deepseek import chat_deepseek
-#from app.utils.llm.silicon import chat_silicon
-#from app.utils.llm.lm_studio import chat_lm_studio
-from app.react.tools_register import student_tools, teacher_tools, admin_tools
+from app.utils.llm.provider import chat
+from app.react.tools_register import get_tools
+from app.react.tool_retriever import select_tools
 from app.utils.io import read_file
 from pydantic import BaseModel
 from typing import Callable
@@ -22,7 +20,6 @@ from typing import Union
 from typing import List 
 from typing import Dict 
 import json
-from app.services.user_service import UserService
 
 from playhouse.shortcuts import model_to_dict
 from flask import session
@@ -97,6 +94,7 @@ class Agent:
         """
         self.model = model
         self.tools: Dict[str, Tool] = {}
+        self.catalog: Dict[str, dict] = {}
         self.messages: List[Message] = []
         self.query = ""
         self.max_iterations = 20
@@ -122,6 +120,14 @@ class Agent:
         """
         self.tools[name] = Tool(name, func, description)
 
+    def expand_tools(self) -> None:
+        """
+        Registers every tool of the catalog, used when the preselected tools are not enough.
+        """
+        for name, tool in self.catalog.items():
+            if name not in self.tools:
+                self.register(name, tool['function'], tool['description'])
+
     def trace(self, role: str, content: str) -> None:
         """
         Logs the message with the specified role and content and writes to file.
@@ -134,6 +140,18 @@ class Agent:
             self.messages.append(Message(role=role, content=content))
         write_to_file(path=OUTPUT_TRACE_PATH, content=f"{role}: {content}\n")
 
+    def format_tools(self) -> str:
+        """
+        Formats the registered tools for the prompt.
+
+        Returns:
+            str: Tool names with their descriptions.
+        """
+        return '\n\n'.join([
+            f"{str(tool.name)}: \n \'\'\'{tool.description}\n\'\'\'" 
+            for tool in self.tools.values()
+            ])
+
     def get_history(self) -> str:
         """
         Retrieves the conversation history.
@@ -156,13 +174,11 @@ class Agent:
             self.trace("assistant", "I'm sorry, but I couldn't find a satisfactory answer within the allowed number of iterations. Here's what I know so far: " + self.get_history())
             return
 
+        from app.services.user_service import UserService
         prompt = self.template.format(
             query=self.query, 
             history=self.get_history(),
-            tools='\n\n'.join([
-                f"{str(tool.name)}: \n \'\'\'{tool.description}\n\'\'\'" 
-                for tool in self.tools.values()
-                ]),
+            tools=self.format_tools(),
             user_info=json.dumps(UserService.get_user_info(session.get('user_id')), indent=4)
             #database_schema=database_schema
         )
@@ -218,6 +234,11 @@ class Agent:
             query (str): The query for the tool.
         """
         tool = self.tools.get(tool_name)
+        if not tool and tool_name in self.catalog:
+            # 模型选择了未预选的工具：扩展为完整工具集
+            logger.info(f"Tool {tool_name} was not preselected, expanding to all tools")
+            self.expand_tools()
+            tool = self.tools.get(tool_name)
         if tool:
             result = tool.use(query)
             observation = f"Observation from {tool_name}: {result}"
@@ -256,7 +277,7 @@ class Agent:
         """
         #contents = [Part.from_text(prompt)]
         #response = generate(self.model, contents)
-        response = chat_deepseek([
+        response = chat([
             {
                 "role": "user",
                 "content": prompt
@@ -275,9 +296,9 @@ def run(query: str, role: str) -> str:
         str: The agent's final answer.
     """
     agent = Agent(model=None)
-    tools =  student_tools if role == "student" \
-        else teacher_tools if role == "teacher" \
-        else admin_tools
+    agent.catalog = get_tools(role)
+    # 只把与问题相关的工具写入prompt，未命中时为完整工具集
+    tools = select_tools(query, agent.catalog)
     for name, tool in tools.items(): 
         agent.register(name, tool['function'], tool['description'])
     answer = agent.execute(query)
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import Config
+from app.utils.logging import logger
+
+_embedding_function = None
+_catalog_cache: Dict[str, "ToolRetriever"] = {}
+_lock = threading.Lock()
+
+
+def default_embedding_function() -> Callable[[List[str]], List[List[float]]]:
+    """
+    Returns the local sentence embedding model bundled with chromadb, loading it on first use.
+    """
+    global _embedding_function
+    with _lock:
+        if _embedding_function is None:
+            from chromadb.utils import embedding_functions
+            _embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        return _embedding_function
+
+
+def tool_text(name: str, description: str) -> str:
+    """
+    Text embedded for a tool: its name and the summary part of its docstring.
+    """
+    summary = description.split("Args:")[0].split("Returns:")[0].strip()
+    return f"{name.replace('_', ' ')}: {summary}"
+
+
+class ToolRetriever:
+    """
+    Selects the tools most relevant to a query by cosine similarity between the
+    query embedding and the tool description embeddings, computed once per catalog.
+    """
+
+    def __init__(self, tools: Dict[str, dict], embed: Optional[Callable] = None,
+                 top_k: int = 6, min_score: float = 0.25) -> None:
+        """
+        Initializes the retriever and embeds the tool descriptions.
+
+        Args:
+            tools (Dict[str, dict]): Tool name to registry entry with a "description".
+            embed (Optional[Callable]): Embedding function taking a list of texts, defaults to the chromadb model.
+            top_k (int): Number of tools to select per query.
+            min_score (float): If no tool reaches this similarity the query counts as a miss.
+        """
+        self.embed = embed or default_embedding_function()
+        self.top_k = top_k
+        self.min_score = min_score
+        self.names = list(tools)
+        self.matrix = self._normalize(np.asarray(
+            self.embed([tool_text(name, tools[name]["description"]) for name in self.names]),
+            dtype=np.float32
+        ))
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def scores(self, query: str) -> Dict[str, float]:
+        """
+        Returns the cosine similarity of every tool to the query.
+        """
+        query_vector = self._normalize(np.asarray(self.embed([query]), dtype=np.float32))[0]
+        return dict(zip(self.names, (self.matrix @ query_vector).tolist()))
+
+    def select(self, query: str) -> Optional[List[str]]:
+        """
+        Returns the names of the top_k tools for the query, or None on a miss.
+
+        Args:
+            query (str): The user query.
+
+        Returns:
+            Optional[List[str]]: Selected tool names, best first; None if no tool is similar enough.
+        """
+        if len(self.names) <= self.top_k:
+            return list(self.names)
+        scores = self.scores(query)
+        ranked = sorted(scores, key=scores.get, reverse=True)
+        if scores[ranked[0]] < self.min_score:
+            return None
+        return ranked[:self.top_k]
+
+
+def catalog_key(tools: Dict[str, dict]) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(tools):
+        digest.update(name.encode("utf-8"))
+        digest.update(tools[name]["description"].encode("utf-8"))
+    return digest.hexdigest()
+
+
+def get_retriever(tools: Dict[str, dict]) -> "ToolRetriever":
+    """
+    Returns the retriever for a tool catalog; descriptions are embedded once per process.
+    """
+    key = catalog_key(tools)
+    with _lock:
+        retriever = _catalog_cache.get(key)
+    if retriever is None:
+        retriever = ToolRetriever(tools, top_k=Config.TOOL_ROUTING_TOP_K,
+                                  min_score=Config.TOOL_ROUTING_MIN_SCORE)
+        with _lock:
+            _catalog_cache[key] = retriever
+    return retriever
+
+
+def select_tools(query: str, tools: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    Returns the subset of tools to put in the prompt for a query.
+
+    Falls back to the full catalog when routing is disabled (TOOL_ROUTING_TOP_K = 0),
+    when no tool is similar enough, or when the embedding model is unavailable.
+    """
+    if Config.TOOL_ROUTING_TOP_K <= 0 or len(tools) <= Config.TOOL_ROUTING_TOP_K:
+        return tools
+    try:
+        selected = get_retriever(tools).select(query)
+    except Exception as e:
+        logger.error(f"Tool routing failed, using all tools: {e}")
+        return tools
+    if selected is None:
+        logger.info("Tool routing miss, using all tools")
+        return tools
+    logger.info(f"Tool routing selected: {', '.join(selected)}")
+    return {name: tools[name] for name in selected}
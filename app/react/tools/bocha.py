@@ -1,30 +1,35 @@
-import requests
-import json
+import os
 
-url = "https://api.bochaai.com/v1/web-search"
-api_key = ""
+from app.react.tools.fetcher import fetcher
 
+url = os.getenv("BOCHA_API_URL") or "https://api.bochaai.com/v1/web-search"
+api_key = os.getenv("BOCHA_API_KEY") or ""
 
-def bocha_search(query: str) -> str:
+
+async def fetch_bocha(query: str) -> list:
 
     summary=True
     count=3
     page=1
 
-    payload = json.dumps({
+    payload = {
     "query": query,
     "summary": summary,
     "count": count,
     "page": page
-    })
+    }
 
     headers = {
     'Authorization': 'Bearer ' + api_key,
     'Content-Type': 'application/json'
     }
 
-    response = requests.request("POST", url, headers=headers, data=payload)
-    return str(response.json()['data']['webPages']['value'])
+    response = await fetcher.post_json(url, payload=payload, headers=headers)
+    return response['data']['webPages']['value']
+
+
+def bocha_search(query: str) -> str:
+    return str(fetcher.search("bocha", query, fetch_bocha))
 
 if __name__ == "__main__":
     query = "Lambda-CDM"
@@ -32,4 +37,4 @@ if __name__ == "__main__":
     #print(response)
     #print(response['data']['webPages']['value'][0]['summary'])
     #print(response['data']['webPages']['value'][0]['url'])
-    print(f"{response}")
\ No newline at end of file
+    print(f"{response}")
@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.config import Config
+from app.utils.logging import logger
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a search query so trivially different spellings share a cache entry.
+
+    Args:
+        query (str): The raw query string.
+
+    Returns:
+        str: The query casefolded with whitespace collapsed.
+    """
+    return " ".join(str(query).casefold().split())
+
+
+class DiskTTLCache:
+    """
+    A JSON file cache with per-entry expiry, keyed by engine and normalized query.
+    """
+
+    def __init__(self, directory: str, ttl: float) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            directory (str): Directory holding one file per entry.
+            ttl (float): Seconds an entry stays valid.
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, engine: str, query: str) -> str:
+        digest = hashlib.sha256(f"{engine}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, engine, f"{digest}.json")
+
+    def get(self, engine: str, query: str) -> Optional[Any]:
+        """
+        Returns the cached value, or None if it is missing or expired.
+        """
+        path = self._path(engine, query)
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                entry = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            return None
+        return entry.get("value")
+
+    def set(self, engine: str, query: str, value: Any) -> None:
+        """
+        Stores a JSON serializable value. The file is replaced atomically.
+        """
+        path = self._path(engine, query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"query": normalize_query(query), "expires_at": time.time() + self.ttl, "value": value}
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(entry, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class AsyncFetcher:
+    """
+    Runs HTTP requests for the search tools on one background event loop, so a single
+    httpx.AsyncClient (and its connection pool) is reused by every tool call.
+    """
+
+    def __init__(self, cache: Optional[DiskTTLCache] = None, timeout: float = 10.0,
+                 max_connections: int = 20) -> None:
+        """
+        Initializes the fetcher. The event loop thread is started on first use.
+
+        Args:
+            cache (Optional[DiskTTLCache]): Cache for search results, None disables caching.
+            timeout (float): Request timeout in seconds.
+            max_connections (int): Connection pool size of the shared client.
+        """
+        self.cache = cache
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="search-fetcher", daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The shared client. Must be used from the fetcher's event loop.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                follow_redirects=True
+            )
+        return self._client
+
+    def run(self, coro: Awaitable) -> Any:
+        """
+        Runs a coroutine on the fetcher's event loop and blocks for its result.
+
+        Args:
+            coro (Awaitable): The coroutine to run.
+
+        Returns:
+            Any: The coroutine's result.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result()
+
+    async def get_json(self, url: str, params: Optional[Dict[str, Any]] = None,
+                       headers: Optional[Dict[str, str]] = None) -> Any:
+        response = await self.client.get(url, params=params, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def post_json(self, url: str, payload: Optional[Dict[str, Any]] = None,
+                        headers: Optional[Dict[str, str]] = None) -> Any:
+        response = await self.client.post(url, json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_text(self, url: str) -> str:
+        response = await self.client.get(url)
+        response.raise_for_status()
+        return response.text
+
+    async def cached(self, engine: str, query: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        """
+        Returns the cached result for (engine, query), calling fetch on a miss.
+        Only successful results are cached.
+
+        Args:
+            engine (str): Name of the search engine, part of the cache key.
+            query (str): The search query.
+            fetch (Callable[[str], Awaitable[Any]]): Coroutine function producing a JSON serializable result.
+
+        Returns:
+            Any: The search result.
+        """
+        if self.cache is not None:
+            hit = self.cache.get(engine, query)
+            if hit is not None:
+                logger.info(f"Search cache hit: {engine} '{normalize_query(query)}'")
+                return hit
+        result = await fetch(query)
+        if self.cache is not None and result is not None:
+            self.cache.set(engine, query, result)
+        return result
+
+    def search(self, engine: str, query: str, fetch: Callable[[str], Awaitable[Any]]) -> Any:
+        """
+        Synchronous entry point for a single cached search.
+        """
+        return self.run(self.cached(engine, query, fetch))
+
+    def fan_out(self, query: str, engines: Dict[str, Callable[[str], Awaitable[Any]]]) -> Dict[str, Any]:
+        """
+        Queries several engines concurrently.
+
+        Args:
+            query (str): The search query.
+            engines (Dict[str, Callable[[str], Awaitable[Any]]]): Engine name to fetch coroutine function.
+
+        Returns:
+            Dict[str, Any]: Engine name to result, or to {"error": ...} if that engine failed.
+        """
+        async def gather():
+            names = list(engines)
+            results = await asyncio.gather(
+                *(self.cached(name, query, engines[name]) for name in names),
+                return_exceptions=True
+            )
+            output = {}
+            for name, result in zip(names, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Search engine {name} failed: {result}")
+                    output[name] = {"error": str(result)}
+                else:
+                    output[name] = result
+            return output
+
+        return self.run(gather())
+
+
+fetcher = AsyncFetcher(
+    cache=DiskTTLCache(Config.SEARCH_CACHE_DIRECTORY, Config.SEARCH_CACHE_TTL),
+    timeout=Config.SEARCH_TIMEOUT
+)
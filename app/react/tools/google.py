@@ -1,35 +1,50 @@
-from googleapiclient.discovery import build
-import requests
-from bs4 import BeautifulSoup
-import yaml
+from app.react.tools.fetcher import fetcher
+from app.utils.io import load_yaml
+from app.utils.logging import logger
+import os
 
 google_config_path = '.\\credentials\\google.yml'
-with open(google_config_path, 'r') as f:
-    google_config = yaml.safe_load(f)
-    api_key = google_config['api_key']
-    cx      = google_config['cx']
+GOOGLE_API_URL = os.getenv("GOOGLE_API_URL") or "https://www.googleapis.com/customsearch/v1"
+
+
+def load_google_config():
+    # 优先使用环境变量，其次读取凭据文件
+    if os.getenv("GOOGLE_API_KEY") and os.getenv("GOOGLE_CX"):
+        return os.getenv("GOOGLE_API_KEY"), os.getenv("GOOGLE_CX")
+    google_config = load_yaml(google_config_path)
+    return google_config['api_key'], google_config['cx']
+
+async def fetch_google(query):
+    api_key, cx = load_google_config()
+    res = await fetcher.get_json(GOOGLE_API_URL, params={'key': api_key, 'cx': cx, 'q': query})
+    return res.get('items', [])[:5]
 
 def google_search(query):
-    with build('customsearch', 'v1', developerKey=api_key) as service:
-        res = service.cse().list(q=query, cx=cx).execute()
-    return res['items'][:5]
+    return fetcher.search("google", query, fetch_google)
 
-def fetch_page_content(url):
+async def fetch_page_content_async(url):
+    from bs4 import BeautifulSoup
     try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            paragraphs = soup.find_all('p')
-            content = ' '.join([para.get_text() for para in paragraphs])
-            return content
-        else:
-            return None
+        html = await fetcher.get_text(url)
+        soup = BeautifulSoup(html, 'html.parser')
+        paragraphs = soup.find_all('p')
+        content = ' '.join([para.get_text() for para in paragraphs])
+        return content
     except Exception as e:
-        print(f'Error fetching {url}: {e}')
+        logger.error(f'Error fetching {url}: {e}')
+        return None
+
+def fetch_page_content(url):
+    return fetcher.run(fetch_page_content_async(url))
+
+async def fetch_web(query):
+    results = await fetch_google(query)
+    if not results:
         return None
+    return await fetch_page_content_async(results[0]['link'])
 
 def web_search(query : str) -> str:
-    return fetch_page_content(google_search(query)[0]['link'])
+    return fetcher.search("google_page", query, fetch_web)
 
 if __name__ == '__main__':
     #print(fetch_page_content(google_search('Group theory')[0]['link']))
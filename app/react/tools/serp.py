@@ -1,16 +1,17 @@
-from src.config.logging import logger
-from src.utils.io import load_yaml
-from typing import Tuple
-from typing import Union
+from app.utils.logging import logger
+from app.utils.io import load_yaml
+from app.react.tools.fetcher import fetcher
 from typing import Dict
 from typing import List
 from typing import Any 
-import requests
+import httpx
 import json
+import os
 
 
 # Static paths
 CREDENTIALS_PATH = './credentials/key.yml'
+SERP_API_URL = os.getenv("SERP_API_URL") or "https://serpapi.com/search.json"
 
 class SerpAPIClient:
     """
@@ -27,9 +28,9 @@ class SerpAPIClient:
             The API key for authenticating with the SERP API.
         """
         self.api_key = api_key
-        self.base_url = "https://serpapi.com/search.json"
+        self.base_url = SERP_API_URL
 
-    def __call__(self, query: str, engine: str = "google", location: str = "") -> Union[Dict[str, Any], Tuple[int, str]]:
+    async def __call__(self, query: str, engine: str = "google", location: str = "") -> Dict[str, Any]:
         """
         Perform Google search using the SERP API.
 
@@ -44,9 +45,13 @@ class SerpAPIClient:
 
         Returns:
         --------
-        Union[Dict[str, Any], Tuple[int, str]]
-            The search results as a JSON dictionary if successful, or a tuple containing the HTTP status code
-            and error message if the request fails.
+        Dict[str, Any]
+            The search results as a JSON dictionary.
+
+        Raises:
+        -------
+        httpx.HTTPError
+            If the request fails.
         """
         params = {
             "engine": engine,
@@ -55,13 +60,7 @@ class SerpAPIClient:
             "location": location
         }
 
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request to SERP API failed: {e}")
-            return response.status_code, str(e)
+        return await fetcher.get_json(self.base_url, params=params)
 
 
 def load_api_key(credentials_path: str) -> str:
@@ -76,13 +75,15 @@ def load_api_key(credentials_path: str) -> str:
     Returns:
     --------
     str
-        The API key extracted from the YAML file.
+        The API key from the SERP_API_KEY environment variable, or extracted from the YAML file.
 
     Raises:
     -------
     KeyError
         If the 'serp' or 'key' keys are missing in the YAML file.
     """
+    if os.getenv("SERP_API_KEY"):
+        return os.getenv("SERP_API_KEY")
     config = load_yaml(credentials_path)
     return config['serp']['key']
 
@@ -114,6 +115,30 @@ def format_top_search_results(results: Dict[str, Any], top_n: int = 10) -> List[
     ]
 
 
+async def fetch_serp(search_query: str, location: str = "") -> Dict[str, Any]:
+    """
+    Execute the Google search using SERP API and return the formatted top results.
+
+    Parameters:
+    -----------
+    search_query : str
+        The search query to be executed using the SERP API.
+    location : str, optional
+        The location to include in the search query (default is an empty string).
+
+    Returns:
+    --------
+    Dict[str, Any]
+        A dictionary with the formatted top search results under "top_results".
+    """
+    # Initialize the SERP API client
+    serp_client = SerpAPIClient(load_api_key(CREDENTIALS_PATH))
+
+    # Perform the search
+    results = await serp_client(search_query, location=location)
+    return {"top_results": format_top_search_results(results)}
+
+
 def search(search_query: str, location: str = "") -> str:
     """
     Main function to execute the Google search using SERP API and return the top results as a JSON string.
@@ -130,28 +155,18 @@ def search(search_query: str, location: str = "") -> str:
     str
         A JSON string containing the top search results or an error message, with updated key names.
     """
-    # Load the API key
-    api_key = load_api_key(CREDENTIALS_PATH)
-
-    # Initialize the SERP API client
-    serp_client = SerpAPIClient(api_key)
-
-    # Perform the search
-    results = serp_client(search_query, location=location)
-
-    # Check if the search was successful
-    if isinstance(results, dict):
-        # Format and return the top search results as JSON with updated key names
-        top_results = format_top_search_results(results)
-        return json.dumps({"top_results": top_results}, indent=2)
-    else:
+    try:
+        # Results are cached per location as well as per query
+        cache_key = f"{search_query} @{location}" if location else search_query
+        top_results = fetcher.search("serp", cache_key, lambda _: fetch_serp(search_query, location))
+        return json.dumps(top_results, indent=2)
+    except httpx.HTTPError as e:
         # Handle the error response
-        status_code, error_message = results
-        error_json = json.dumps({"error": f"Search failed with status code {status_code}: {error_message}"})
+        status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+        error_json = json.dumps({"error": f"Search failed with status code {status_code}: {e}"})
         logger.error(error_json)
         return error_json
 
-
 if __name__ == "__main__":
     search_query = "Best gyros in Barcelona, Spain"
     result_json = search(search_query, '')
@@ -1,148 +1,211 @@
-import pymysql
-from pymysql import cursors
-from dbutils.pooled_db import PooledDB
-#from ..config import DevelopmentConfig
-
-class MySQLConnection:
-    def __init__(self):
-        self.pool = PooledDB(
-            creator=pymysql,
-            host='localhost',
-            port=3306,
-            user='root',
-            password='rachel',
-            database='eduassistant',
-            cursorclass=cursors.DictCursor,
-            autocommit=True,
-            maxconnections=5,
-            connect_timeout=10
-        )
-    
-    def get_conn(self):
-        return self.pool.connection()
-
-#db_conn = None
-db_conn = MySQLConnection()
-
-def sql_select(query: str) -> str:
-    with db_conn.get_conn() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                return cursor.fetchall()
-
-def sql_insert(query: str) -> str:
-     with db_conn.get_conn() as conn:
-            with conn.cursor() as cursor:
-                cursor.execute(query)
-                return cursor.lastrowid
-
-database_schema = """
--- 用户表（学生/教师共用）
-CREATE TABLE users (
-    user_id INT AUTO_INCREMENT PRIMARY KEY,
-    username VARCHAR(200) UNIQUE NOT NULL,
-    password_hash VARCHAR(300) NOT NULL,
-    role ENUM('student', 'teacher') NOT NULL,
-    registration_date DATETIME DEFAULT CURRENT_TIMESTAMP
-);
-
--- 知识点体系
-CREATE TABLE knowledge_points (
-    point_id INT AUTO_INCREMENT PRIMARY KEY,
-    point_name VARCHAR(100) NOT NULL,
-    parent_point_id INT NULL,  -- 支持知识点层级结构
-    description TEXT
-);
-
--- 课程表
-CREATE TABLE courses (
-    course_id INT AUTO_INCREMENT PRIMARY KEY,
-    course_name VARCHAR(100) NOT NULL,
-    teacher_id INT NOT NULL,
-    description TEXT,
-    FOREIGN KEY (teacher_id) REFERENCES users(user_id)
-);
-
--- 学生选课关系
-CREATE TABLE student_courses (
-    student_id INT NOT NULL,
-    course_id INT NOT NULL,
-    PRIMARY KEY (student_id, course_id),
-    FOREIGN KEY (student_id) REFERENCES users(user_id),
-    FOREIGN KEY (course_id) REFERENCES courses(course_id)
-);
-
--- 作业表
-CREATE TABLE assignments (
-    assignment_id INT AUTO_INCREMENT PRIMARY KEY,
-    course_id INT NOT NULL,
-    title VARCHAR(200) NOT NULL,
-    description TEXT,
-    publish_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-    deadline DATETIME,
-    FOREIGN KEY (course_id) REFERENCES courses(course_id)
-);
-
--- 试题库
-CREATE TABLE questions (
-    question_id INT AUTO_INCREMENT PRIMARY KEY,
-    assignment_id INT,
-    question_text TEXT NOT NULL,
-    question_type ENUM('choice', 'fill_blank', 'essay') NOT NULL,
-    difficulty FLOAT CHECK (difficulty BETWEEN 0 AND 1),  -- 试题难度系数
-    answer TEXT NOT NULL,
-    max_score FLOAT,
-    analysis TEXT,
-    FOREIGN KEY (assignment_id) REFERENCES assignments(assignment_id)
-);
-
--- 知识点-试题关联表
-CREATE TABLE question_points (
-    question_id INT NOT NULL,
-    point_id INT NOT NULL,
-    weight FLOAT DEFAULT 1.0,  -- 知识点权重
-    PRIMARY KEY (question_id, point_id),
-    FOREIGN KEY (question_id) REFERENCES questions(question_id),
-    FOREIGN KEY (point_id) REFERENCES knowledge_points(point_id)
-);
-
--- 学生提交作业记录
-CREATE TABLE submit_records (
-    record_id BIGINT AUTO_INCREMENT PRIMARY KEY,
-    student_id INT NOT NULL,
-    assignment_id INT NOT NULL,
-    submit_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-    duration_seconds INT,  -- 答题耗时
-    FOREIGN KEY (student_id) REFERENCES users(user_id),
-    FOREIGN KEY (assignment_id) REFERENCES assignments(assignment_id)
-);
-
--- 学生答题记录
-CREATE TABLE answer_records (
-    record_id BIGINT AUTO_INCREMENT PRIMARY KEY,
-    student_id INT NOT NULL,
-    question_id INT NOT NULL,
-    submission_id BIGINT NOT NULL,
-    answer TEXT NOT NULL,
-    -- answer_time DATETIME DEFAULT CURRENT_TIMESTAMP,
-    -- is_correct BOOLEAN,
-    score FLOAT,
-    -- duration_seconds INT,  -- 答题耗时
-    FOREIGN KEY (student_id) REFERENCES users(user_id),
-    FOREIGN KEY (question_id) REFERENCES questions(question_id),
-    FOREIGN KEY (submission_id) REFERENCES submit_records(record_id)
-);
-
--- 在线学习行为表
-CREATE TABLE learning_activities (
-    activity_id BIGINT AUTO_INCREMENT PRIMARY KEY,
-    student_id INT NOT NULL,
-    course_id INT NOT NULL,
-    activity_type ENUM('video', 'exercise', 'reading'),
-    start_time DATETIME,
-    end_time DATETIME,
-    FOREIGN KEY (student_id) REFERENCES users(user_id),
-    FOREIGN KEY (course_id) REFERENCES courses(course_id)
-);
-
-"""
\ No newline at end of file
+import functools
+import json
+import os
+import re
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+import psycopg2
+from psycopg2.pool import ThreadedConnectionPool
+
+from app.config import Config
+from app.models.base import BaseModel
+from app.react.tools_register import register_as_tool
+from app.utils.logging import logger
+
+# 导入全部模型模块，使BaseModel的子类完整
+import app.models.user
+import app.models.course
+import app.models.assignment
+import app.models.learning_data
+import app.models.knowledge_base
+import app.models.chat
+
+# 不向agent暴露的列（只读角色也不应拥有这些列的权限，见scripts/create_readonly_role.py）
+HIDDEN_COLUMNS = {
+    ("user", "password_hash"),
+}
+
+_READ_ONLY_QUERY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+# 字符串常量、带引号的标识符、美元符号引用的字符串和注释，其中的分号不分隔语句
+_QUOTED_OR_COMMENT = re.compile(
+    r"'(?:[^']|'')*'"
+    r'|"(?:[^"]|"")*"'
+    r"|(\$[A-Za-z_0-9]*\$)[\s\S]*?\1"
+    r"|--[^\n]*"
+    r"|/\*[\s\S]*?\*/"
+)
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    """
+    Returns the connection pool of the read-only role, creating it on first use.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(
+                minconn=1,
+                maxconn=Config.SQL_TOOL_POOL_SIZE,
+                dbname=os.getenv("DATABASE_NAME"),
+                host=os.getenv("DATABASE_HOST"),
+                port=os.getenv("DATABASE_PORT"),
+                user=Config.SQL_TOOL_DATABASE_USER,
+                password=Config.SQL_TOOL_DATABASE_PASSWORD,
+                connect_timeout=10,
+                # 即使角色配置有误，会话本身也是只读且有超时限制的
+                options=f"-c default_transaction_read_only=on "
+                        f"-c statement_timeout={Config.SQL_TOOL_STATEMENT_TIMEOUT_MS}"
+            )
+        return _pool
+
+
+def _validate(query: str) -> str:
+    """
+    Checks that the query is a single SELECT / WITH statement. Semicolons inside
+    string literals, quoted identifiers and comments are allowed.
+
+    Args:
+        query (str): The SQL query.
+
+    Returns:
+        str: The query without a trailing semicolon.
+
+    Raises:
+        ValueError: If the query is empty, not a query, or contains several statements.
+    """
+    query = (query or "").strip().rstrip(";").strip()
+    if not query:
+        raise ValueError("SQL查询不能为空")
+    if not _READ_ONLY_QUERY.match(query):
+        raise ValueError("只允许执行SELECT或WITH查询")
+    if ";" in _QUOTED_OR_COMMENT.sub(" ", query):
+        raise ValueError("一次只能执行一条SQL语句")
+    return query
+
+
+def stream_query(query: str, max_rows: Optional[int] = None, batch_size: int = 100) -> Iterator[Dict[str, Any]]:
+    """
+    Runs a read-only query through a server-side cursor and yields rows as dicts.
+
+    Args:
+        query (str): A single SELECT / WITH statement.
+        max_rows (Optional[int]): Maximum number of rows to yield, defaults to Config.SQL_TOOL_MAX_ROWS.
+        batch_size (int): Rows fetched from the server per round trip.
+
+    Yields:
+        Dict[str, Any]: One row keyed by column name.
+    """
+    query = _validate(query)
+    max_rows = max_rows or Config.SQL_TOOL_MAX_ROWS
+    pool = _get_pool()
+    conn = pool.getconn()
+    try:
+        conn.set_session(readonly=True)
+        # 命名游标即服务端游标，结果按批取回，不会一次性加载到内存
+        with conn.cursor(name=f"sql_tool_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(query)
+            columns = None
+            remaining = max_rows
+            while remaining > 0:
+                rows = cursor.fetchmany(min(batch_size, remaining))
+                if not rows:
+                    break
+                if columns is None:
+                    columns = [column.name for column in cursor.description]
+                for row in rows:
+                    yield dict(zip(columns, row))
+                remaining -= len(rows)
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+# 只读角色可以读取所有表（包括所有用户的邮箱、聊天记录和其他教师课程的成绩），只向管理员开放
+@register_as_tool(roles=[])
+def sql_query(query: str) -> str:
+    """在数据库上执行只读SQL查询（PostgreSQL），适合用一条查询完成统计分析，避免多次调用其他工具。
+
+    调用前先使用get_database_schema工具获取表结构。只允许单条SELECT或WITH语句，
+    查询有超时限制，最多返回有限行数，请尽量在SQL中完成聚合、排序和LIMIT。
+
+    Args:
+        query (str): SQL查询语句
+
+    Returns:
+        str: JSON字符串，包含columns、rows和truncated（结果是否因行数上限被截断）
+    """
+    max_rows = Config.SQL_TOOL_MAX_ROWS
+    try:
+        # 多取一行用于判断是否被截断
+        rows = list(stream_query(query, max_rows=max_rows + 1))
+    except psycopg2.errors.QueryCanceled:
+        raise ValueError(f"查询超过{Config.SQL_TOOL_STATEMENT_TIMEOUT_MS}毫秒被取消，请缩小查询范围")
+    truncated = len(rows) > max_rows
+    rows = rows[:max_rows]
+    logger.info(f"sql_query returned {len(rows)} rows (truncated={truncated})")
+    return json.dumps({
+        "columns": list(rows[0].keys()) if rows else [],
+        "rows": rows,
+        "truncated": truncated
+    }, ensure_ascii=False, default=str)
+
+
+def all_models() -> List[type]:
+    models, pending = [], list(BaseModel.__subclasses__())
+    while pending:
+        model = pending.pop(0)
+        models.append(model)
+        pending.extend(model.__subclasses__())
+    return sorted(models, key=lambda model: model._meta.table_name)
+
+
+@functools.lru_cache(maxsize=1)
+def describe_schema() -> str:
+    """
+    Generates a CREATE TABLE style description of the application tables from the peewee models.
+    The result is cached for the lifetime of the process.
+    """
+    database = BaseModel._meta.database
+    field_types = database.get_context_options()["field_types"]
+    tables = []
+    for model in all_models():
+        table = model._meta.table_name
+        columns = []
+        for field in model._meta.sorted_fields:
+            if (table, field.column_name) in HIDDEN_COLUMNS:
+                continue
+            column = f"    {field.column_name} {field_types.get(field.field_type, field.field_type)}"
+            if field.primary_key:
+                column += " PRIMARY KEY"
+            elif not field.null:
+                column += " NOT NULL"
+            rel_model = getattr(field, "rel_model", None)
+            if rel_model is not None:
+                column += f' REFERENCES "{rel_model._meta.table_name}"({field.rel_field.column_name})'
+            columns.append(column)
+        for index in model._meta.indexes:
+            if not isinstance(index, tuple):
+                continue
+            fields, unique = index
+            if unique:
+                names = [model._meta.fields[name].column_name for name in fields]
+                columns.append(f"    UNIQUE ({', '.join(names)})")
+        doc = f"-- {model.__doc__.strip()}\n" if model.__doc__ else ""
+        tables.append(f'{doc}CREATE TABLE "{table}" (\n' + ",\n".join(columns) + "\n);")
+    return "\n\n".join(tables)
+
+
+@register_as_tool(roles=[])
+def get_database_schema() -> str:
+    """获取数据库表结构（PostgreSQL建表语句形式），用于编写sql_query工具的查询。
+
+    Returns:
+        str: 所有表的结构描述
+    """
+    return describe_schema()
@@ -0,0 +1,39 @@
+from app.react.tools.fetcher import fetcher
+from app.react.tools.bocha import fetch_bocha
+from app.react.tools.google import fetch_google
+from app.react.tools.serp import fetch_serp
+from app.react.tools.wiki import fetch_wiki
+from typing import Iterable, Optional
+import json
+
+ENGINES = {
+    "bocha": fetch_bocha,
+    "google": fetch_google,
+    "serp": fetch_serp,
+    "wiki": fetch_wiki,
+}
+
+DEFAULT_ENGINES = ("bocha", "wiki")
+
+
+def multi_search(query: str, engines: Optional[Iterable[str]] = None) -> str:
+    """
+    Query several search engines concurrently and return all results as JSON.
+
+    Args:
+        query (str): The search query string.
+        engines (Optional[Iterable[str]]): Engine names from ENGINES, defaults to DEFAULT_ENGINES.
+
+    Returns:
+        str: A JSON object mapping each engine to its results, or to an error message if it failed.
+    """
+    names = list(engines or DEFAULT_ENGINES)
+    unknown = [name for name in names if name not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown search engines: {', '.join(unknown)}")
+    results = fetcher.fan_out(query, {name: ENGINES[name] for name in names})
+    return json.dumps(results, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    print(multi_search("Lambda-CDM"))
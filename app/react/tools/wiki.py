@@ -1,12 +1,47 @@
-from src.config.logging import logger
+from app.utils.logging import logger
+from app.react.tools.fetcher import fetcher
 from typing import Optional
-import wikipediaapi
+from urllib.parse import quote
+import httpx
 import json
+import os
+
+# MediaWiki REST接口，可通过环境变量指向本地mock服务
+WIKI_API_URL = os.getenv("WIKI_API_URL") or "https://{language}.wikipedia.org/api/rest_v1"
+USER_AGENT = 'ReAct Agents (a151150637@outlook.com)'
+
+
+async def fetch_wiki(query: str, language: str = 'en') -> Optional[dict]:
+    """
+    Fetch the summary of the Wikipedia page matching the query.
+
+    Args:
+        query (str): The search query string, used as the page title.
+        language (str): Wikipedia language edition.
+
+    Returns:
+        Optional[dict]: The query, title, and summary, or None if the page does not exist.
+    """
+    base_url = WIKI_API_URL.format(language=language)
+    try:
+        page = await fetcher.get_json(f"{base_url}/page/summary/{quote(query.replace(' ', '_'), safe='')}",
+                                      headers={"User-Agent": USER_AGENT})
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            return None
+        raise
+    if page.get("type") == "disambiguation" or not page.get("extract"):
+        return None
+    return {
+        "query": query,
+        "title": page.get("title"),
+        "summary": page.get("extract")
+    }
 
 
 def search(query: str) -> Optional[str]:
     """
-    Fetch Wikipedia information for a given search query using Wikipedia-API and return as JSON.
+    Fetch Wikipedia information for a given search query and return as JSON.
 
     Args:
         query (str): The search query string.
@@ -14,21 +49,11 @@ def search(query: str) -> Optional[str]:
     Returns:
         Optional[str]: A JSON string containing the query, title, and summary, or None if no result is found.
     """
-    # Initialize Wikipedia API with a user agent
-    wiki = wikipediaapi.Wikipedia(user_agent='ReAct Agents (a151150637@outlook.com)',
-                                  language='en')
-
     try:
         logger.info(f"Searching Wikipedia for: {query}")
-        page = wiki.page(query)
-
-        if page.exists():
-            # Create a dictionary with query, title, and summary
-            result = {
-                "query": query,
-                "title": page.title,
-                "summary": page.summary
-            }
+        result = fetcher.search("wiki", query, fetch_wiki)
+
+        if result:
             logger.info(f"Successfully retrieved summary for: {query}")
             return json.dumps(result, ensure_ascii=False, indent=2)
         else:
@@ -48,4 +73,4 @@ if __name__ == '__main__':
         if result:
             print(f"JSON result for '{query}':\n{result}\n")
         else:
-            print(f"No result found for '{query}'\n")
\ No newline at end of file
+            print(f"No result found for '{query}'\n")
@@ -1,4 +1,3 @@
-import pandas as pd
 from datetime import datetime
 from app.models.learning_data import LearningActivity, StudentKnowledgePoint, KnowledgePoint
 from app.models.assignment import StudentAssignment, Assignment
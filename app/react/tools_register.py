@@ -1,11 +1,15 @@
 import inspect
 import functools
+import hashlib
+import importlib
+import importlib.util
+import threading
+import os
 
 import json
 
 from typing import Dict, Any, Callable, List, Type, Union, get_type_hints, get_origin, get_args
 from datetime import datetime, date
-from flask import jsonify, Response
 from app.utils.logging import logger
 from app.models.base import BaseModel
 from playhouse.shortcuts import model_to_dict
@@ -17,11 +21,35 @@ class ToolExecutionError(Exception):
         self.original_error = original_error
         super().__init__(self.message)
 
-# Tool registry
+# Tool registry, filled on first use by load_tools()
 student_tools = {}
 teacher_tools = {}
 admin_tools = {}
 
+# Modules defining tools, imported when the agent first needs its tools
+TOOL_MODULES = [
+    "app.services.analytics_service",
+    "app.services.assignment_service",
+    "app.services.cohort_service",
+    "app.services.course_service",
+    "app.services.engagement_service",
+    "app.services.item_statistics_service",
+    "app.services.learning_issue_service",
+    "app.services.risk_service",
+    "app.react.tools.sql",
+]
+
+# Prebuilt tool metadata (scripts/build_tool_manifest.py). When present, tools are
+# listed from it and their modules are only imported when a tool is executed.
+TOOL_MANIFEST_PATH = os.getenv("TOOL_MANIFEST_PATH") or "./data/input/tools_manifest.json"
+
+# (function, roles) recorded by register_as_tool; load_tools() registers them
+_declared_tools = []
+_registered_count = 0
+_loaded = False
+_from_manifest = False
+_load_lock = threading.RLock()
+
 def create_tool_executor(func: Callable) -> Callable:
     """Create a function that executes a service method with JSON/Dict parameters.
     
@@ -53,18 +81,35 @@ def create_tool_executor(func: Callable) -> Callable:
     return executor
 
 
-def _register_tool(func: Callable, tools: Dict[str, Any]):
-    """Register a function to the tool registry."""
-    signature = inspect.signature(func)
-    docstring = inspect.getdoc(func) or ""
-    
-    # Get the actual function from staticmethod
-    actual_func = func.__func__ if isinstance(func, staticmethod) else func
+def create_lazy_tool_executor(module: str, qualname: str) -> Callable:
+    """Create an executor that imports and resolves the function on its first call.
 
-    # Register the tool with metadata
-    tools[func.__name__] = {
-        "function": create_tool_executor(actual_func),
-        "description": docstring,
+    Args:
+        module: The module defining the function
+        qualname: The function's qualified name within the module, e.g. "AnalyticsService.detect_learning_issues"
+
+    Returns:
+        A function that accepts JSON/Dict and calls the resolved function
+    """
+    executor = None
+
+    def lazy_executor(params: Dict[str, Any]) -> Any:
+        nonlocal executor
+        if executor is None:
+            target = importlib.import_module(module)
+            for attr in qualname.split("."):
+                target = getattr(target, attr)
+            executor = create_tool_executor(target)
+        return executor(params)
+
+    return lazy_executor
+
+
+def _describe_tool(func: Callable) -> Dict[str, Any]:
+    """Collect the metadata of a tool function."""
+    signature = inspect.signature(func)
+    return {
+        "description": inspect.getdoc(func) or "",
         "parameters": {
             name: {
                 "type": param.annotation.__name__ if param.annotation != inspect.Parameter.empty else "any",
@@ -74,22 +119,138 @@ def _register_tool(func: Callable, tools: Dict[str, Any]):
         }
     }
 
+
+def _register_tool(func: Callable, tools: Dict[str, Any], metadata: Dict[str, Any]):
+    """Register a function to the tool registry."""
+    # Get the actual function from staticmethod
+    actual_func = func.__func__ if isinstance(func, staticmethod) else func
+
+    # Register the tool with metadata
+    tools[func.__name__] = {
+        "function": create_tool_executor(actual_func),
+        **metadata
+    }
+
+
+def _register_pending():
+    """Register the tools recorded by register_as_tool since the last call."""
+    global _registered_count
+    while _registered_count < len(_declared_tools):
+        func, roles = _declared_tools[_registered_count]
+        _registered_count += 1
+        metadata = _describe_tool(func)
+        if "student" in roles:
+            _register_tool(func, student_tools, metadata)
+        if "teacher" in roles:
+            _register_tool(func, teacher_tools, metadata)
+        # admin can use all tools
+        _register_tool(func, admin_tools, metadata)
+        logger.debug(f"tool registered: {func.__name__} for {', '.join(roles) or 'admin'}")
+
+
+def tool_sources_hash() -> str:
+    """Hash of TOOL_MODULES and their source files, read without importing the modules."""
+    digest = hashlib.sha256()
+    for module in TOOL_MODULES:
+        digest.update(module.encode())
+        spec = importlib.util.find_spec(module)
+        if spec is not None and spec.origin and os.path.exists(spec.origin):
+            with open(spec.origin, 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _load_manifest(path: str) -> bool:
+    """Fill the registry from a prebuilt manifest.
+
+    Returns False if there is none, or if it was built from different tool
+    sources, in which case the tools are collected by importing the modules.
+    """
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    if manifest.get("source_hash") != tool_sources_hash():
+        logger.warning(f"Tool manifest {path} is out of date with the tool modules, importing them instead; "
+                       f"re-run scripts/build_tool_manifest.py")
+        return False
+    for entry in manifest["tools"]:
+        tool = {
+            "function": create_lazy_tool_executor(entry["module"], entry["qualname"]),
+            "description": entry["description"],
+            "parameters": entry["parameters"]
+        }
+        if "student" in entry["roles"]:
+            student_tools[entry["name"]] = tool
+        if "teacher" in entry["roles"]:
+            teacher_tools[entry["name"]] = tool
+        admin_tools[entry["name"]] = tool
+    logger.info(f"Loaded {len(manifest['tools'])} tools from manifest {path}")
+    return True
+
+
+def load_tools(use_manifest: bool = True) -> None:
+    """Collect tool metadata on first use.
+
+    Uses the manifest if one exists, otherwise imports TOOL_MODULES and
+    registers the functions recorded by register_as_tool.
+    """
+    global _loaded, _from_manifest
+    with _load_lock:
+        if _loaded:
+            return
+        _from_manifest = use_manifest and _load_manifest(TOOL_MANIFEST_PATH)
+        if not _from_manifest:
+            for module in TOOL_MODULES:
+                importlib.import_module(module)
+            _register_pending()
+            logger.info(f"Registered {len(admin_tools)} tools")
+        _loaded = True
+
+
+def get_tools(role: str) -> Dict[str, Any]:
+    """Return the tools available to a role, loading the registry if needed."""
+    load_tools()
+    return student_tools if role == "student" \
+        else teacher_tools if role == "teacher" \
+        else admin_tools
+
+
+def build_manifest() -> Dict[str, Any]:
+    """Import TOOL_MODULES and return the manifest describing every registered tool."""
+    for module in TOOL_MODULES:
+        importlib.import_module(module)
+    with _load_lock:
+        entries = {}
+        for func, roles in _declared_tools:
+            actual_func = func.__func__ if isinstance(func, staticmethod) else func
+            entries[func.__name__] = {
+                "name": func.__name__,
+                "module": actual_func.__module__,
+                "qualname": actual_func.__qualname__,
+                "roles": list(roles),
+                **_describe_tool(func)
+            }
+    return {"source_hash": tool_sources_hash(), "tools": list(entries.values())}
+
+
 def register_as_tool(roles: List[str]) -> Callable:
-    """Register a function as a tool for the ReAct agent."""
+    """Register a function as a tool for the ReAct agent.
+
+    Only records the function; its metadata is collected by load_tools() when
+    the agent first needs its tools.
+    """
     def decorator(func: Callable) -> Callable:
         
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             return func(*args, **kwargs)
         
-        if "student" in roles:
-            _register_tool(func, student_tools)
-            logger.info(f"tool registered: {func.__name__} for student")
-        if "teacher" in roles:
-            _register_tool(func, teacher_tools)
-            logger.info(f"tool registered: {func.__name__} for teacher")
-        # admin can use all tools
-        _register_tool(func, admin_tools)
+        with _load_lock:
+            _declared_tools.append((func, tuple(roles)))
+            # Modules imported after the registry was built register immediately
+            if _loaded and not _from_manifest:
+                _register_pending()
         
         return wrapper
     
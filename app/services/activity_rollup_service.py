@@ -0,0 +1,221 @@
+from datetime import timedelta
+from peewee import fn, EXCLUDED, SQL
+from app.config import Config
+from app.ext import db
+from app.models.learning_data import LearningActivity, DailyActivityRollup, RollupWatermark
+
+ROLLUP_NAME = 'daily_activity_rollup'
+
+class ActivityRollupService:
+    """学习活动按天汇总服务。
+
+    daily_activity_rollup按学生、课程、日期和活动类型保存活动次数与总时长。
+    汇总任务根据水位线（已汇总的最大LearningActivity ID）只处理新增记录；
+    查询时把汇总表与水位线之后尚未汇总的少量原始记录合并，结果始终完整。
+    """
+
+    @staticmethod
+    def get_watermark():
+        """获取已汇总的最大学习活动ID。
+
+        Returns:
+            int: 水位线，尚未汇总时为0
+        """
+        watermark = RollupWatermark.get_or_none(RollupWatermark.name == ROLLUP_NAME)
+        return watermark.last_id if watermark else 0
+
+    @staticmethod
+    def _lock_watermark():
+        RollupWatermark.insert(name=ROLLUP_NAME, last_id=0).on_conflict_ignore().execute()
+        return (RollupWatermark.select()
+                .where(RollupWatermark.name == ROLLUP_NAME)
+                .for_update()
+                .get())
+
+    @staticmethod
+    def _merge_range(lower_id, upper_id):
+        """把ID在(lower_id, upper_id]范围内的学习活动累加到汇总表。"""
+        day = LearningActivity.timestamp.cast('date')
+        source = (LearningActivity
+                  .select(LearningActivity.student,
+                          LearningActivity.course,
+                          day,
+                          LearningActivity.activity_type,
+                          fn.COUNT(LearningActivity.id),
+                          fn.COALESCE(fn.SUM(LearningActivity.duration), 0),
+                          fn.NOW(),
+                          fn.NOW())
+                  .where((LearningActivity.id > lower_id) & (LearningActivity.id <= upper_id))
+                  .group_by(LearningActivity.student, LearningActivity.course, day, LearningActivity.activity_type))
+
+        rollup = DailyActivityRollup
+        return (rollup
+                .insert_from(source, [rollup.student, rollup.course, rollup.day, rollup.activity_type,
+                                      rollup.activity_count, rollup.total_duration,
+                                      rollup.created_at, rollup.updated_at])
+                .on_conflict(
+                    conflict_target=[rollup.student, rollup.course, rollup.day, rollup.activity_type],
+                    update={
+                        rollup.activity_count: rollup.activity_count + EXCLUDED.activity_count,
+                        rollup.total_duration: rollup.total_duration + EXCLUDED.total_duration,
+                        rollup.updated_at: EXCLUDED.updated_at
+                    })
+                .execute())
+
+    @staticmethod
+    def catch_up(batch_size=None, lag_seconds=None):
+        """汇总水位线之后的新学习活动，可由定时任务反复调用。
+
+        每批在一个事务内累加汇总表并推进水位线，重复运行不会重复计数。
+        写入数据库（inserted_at）不足lag_seconds的记录留到下次处理，避免跳过ID较小但尚未提交的事务。
+        按写入时间而不是活动的timestamp判断：缓冲区或spool补写的记录timestamp可能早于水位线处理的时间。
+
+        Args:
+            batch_size (int, optional): 每批处理的最大ID跨度，默认Config.ROLLUP_BATCH_SIZE
+            lag_seconds (int, optional): 安全延迟秒数，默认Config.ROLLUP_SAFETY_LAG_SECONDS
+
+        Returns:
+            int: 本次推进的ID数量
+        """
+        batch_size = batch_size or Config.ROLLUP_BATCH_SIZE
+        lag_seconds = Config.ROLLUP_SAFETY_LAG_SECONDS if lag_seconds is None else lag_seconds
+        advanced = 0
+
+        while True:
+            with db.atomic():
+                watermark = ActivityRollupService._lock_watermark()
+                lower_id = watermark.last_id
+                upper_id = (LearningActivity
+                            .select(fn.MAX(LearningActivity.id))
+                            .where(LearningActivity.id > lower_id)
+                            .scalar())
+                if upper_id is None:
+                    return advanced
+
+                # 使用数据库时钟，不受各应用服务器时钟偏差影响
+                cutoff = SQL('clock_timestamp() - make_interval(secs => %s)', (lag_seconds,))
+                first_recent = (LearningActivity
+                                .select(fn.MIN(LearningActivity.id))
+                                .where((LearningActivity.id > lower_id) & (LearningActivity.inserted_at > cutoff))
+                                .scalar())
+                if first_recent is not None:
+                    upper_id = min(upper_id, first_recent - 1)
+                upper_id = min(upper_id, lower_id + batch_size)
+                if upper_id <= lower_id:
+                    return advanced
+
+                ActivityRollupService._merge_range(lower_id, upper_id)
+                watermark.last_id = upper_id
+                watermark.save()
+                advanced += upper_id - lower_id
+
+    @staticmethod
+    def add_inserted_at_column():
+        """为已有数据库的学习活动表添加inserted_at列。
+
+        已有记录保持为空（视为早已提交），只有新写入的记录由数据库填写，添加时不需要重写整张表。
+
+        Returns:
+            bool: 添加了列返回True，列已存在返回False
+        """
+        table = LearningActivity._meta.table_name
+        if 'inserted_at' in {column.name for column in db.get_columns(table)}:
+            return False
+        with db.atomic():
+            db.execute_sql(f'ALTER TABLE "{table}" ADD COLUMN "inserted_at" TIMESTAMP')
+            db.execute_sql(f'ALTER TABLE "{table}" ALTER COLUMN "inserted_at" SET DEFAULT clock_timestamp()')
+        return True
+
+    @staticmethod
+    def rebuild(batch_size=None):
+        """清空汇总表并从头重新汇总，用于导入历史数据或修正数据后回填。
+
+        清空期间的查询会直接读取原始记录，结果仍然完整。最近写入的记录同样遵守安全延迟，
+        留给之后的catch_up处理。
+
+        Args:
+            batch_size (int, optional): 每批处理的最大ID跨度
+
+        Returns:
+            int: 重新汇总的ID数量
+        """
+        with db.atomic():
+            watermark = ActivityRollupService._lock_watermark()
+            DailyActivityRollup.delete().execute()
+            watermark.last_id = 0
+            watermark.save()
+        return ActivityRollupService.catch_up(batch_size=batch_size)
+
+    @staticmethod
+    def summarize(dimensions, start_date, student_id=None, course_id=None, end_date=None):
+        """按维度统计start_date当天及之后（到end_date当天为止）的学习活动。
+
+        汇总表与水位线之后的原始记录在同一条SQL中合并，读取的是同一个快照，
+        即使汇总任务同时运行也不会重复或遗漏。
+
+        Args:
+            dimensions (list): 分组维度，可选student_id、course_id、day、week（所在周的周一）、activity_type
+            start_date (date): 起始日期（按天统计）
+            student_id (int or list, optional): 学生用户ID，也可以是学生ID列表
+            course_id (int or list, optional): 课程ID，也可以是课程ID列表
+            end_date (date, optional): 结束日期（包含）
+
+        Returns:
+            list: 元组列表，每个元组为各维度值、活动次数、总时长（秒）和最近活动日期
+        """
+        rollup, raw = DailyActivityRollup, LearningActivity
+        raw_day = raw.timestamp.cast('date')
+        rollup_columns = {'student_id': rollup.student, 'course_id': rollup.course,
+                          'day': rollup.day, 'week': fn.date_trunc('week', rollup.day).cast('date'),
+                          'activity_type': rollup.activity_type}
+        raw_columns = {'student_id': raw.student, 'course_id': raw.course,
+                       'day': raw_day, 'week': fn.date_trunc('week', raw.timestamp).cast('date'),
+                       'activity_type': raw.activity_type}
+        keys = list(dimensions) + ([] if 'day' in dimensions else ['day'])
+
+        rollup_condition = rollup.day >= start_date
+        raw_condition = (raw.timestamp >= start_date) & (raw.id > (
+            RollupWatermark
+            .select(fn.COALESCE(fn.MAX(RollupWatermark.last_id), 0))
+            .where(RollupWatermark.name == ROLLUP_NAME)))
+        if end_date:
+            rollup_condition &= rollup.day <= end_date
+            raw_condition &= raw.timestamp < end_date + timedelta(days=1)
+        if isinstance(student_id, (list, tuple, set)):
+            rollup_condition &= rollup.student.in_(list(student_id))
+            raw_condition &= raw.student.in_(list(student_id))
+        elif student_id:
+            rollup_condition &= rollup.student == student_id
+            raw_condition &= raw.student == student_id
+        if isinstance(course_id, (list, tuple, set)):
+            rollup_condition &= rollup.course.in_(list(course_id))
+            raw_condition &= raw.course.in_(list(course_id))
+        elif course_id:
+            rollup_condition &= rollup.course == course_id
+            raw_condition &= raw.course == course_id
+
+        summarized = (rollup
+                      .select(*[rollup_columns[key].alias(key) for key in keys],
+                              rollup.activity_count.alias('activity_count'),
+                              rollup.total_duration.alias('total_duration'))
+                      .where(rollup_condition))
+        tail = (raw
+                .select(*[raw_columns[key].alias(key) for key in keys],
+                        fn.COUNT(raw.id).alias('activity_count'),
+                        fn.COALESCE(fn.SUM(raw.duration), 0).alias('total_duration'))
+                .where(raw_condition)
+                .group_by(*[raw_columns[key] for key in keys]))
+
+        combined = (summarized + tail).alias('combined')
+        group = [getattr(combined.c, key) for key in dimensions]
+        query = (rollup
+                 .select(*group,
+                         fn.SUM(combined.c.activity_count),
+                         fn.SUM(combined.c.total_duration),
+                         fn.MAX(combined.c.day))
+                 .from_(combined)
+                 .tuples())
+        if group:
+            query = query.group_by(*group)
+
+        return [row[:-3] + (int(row[-3] or 0), int(row[-2] or 0), row[-1]) for row in query]
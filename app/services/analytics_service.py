@@ -1,9 +1,50 @@
-import pandas as pd
 from datetime import datetime, timedelta
-from app.models.learning_data import LearningActivity, StudentKnowledgePoint, KnowledgePoint
+import warnings
+import numpy as np
+from app.config import Config
+from app.ext import db
+from app.models.learning_data import LearningActivity, StudentKnowledgePoint, KnowledgePoint, AssignmentKnowledgePoint
 from app.models.assignment import StudentAssignment, Assignment
 from app.models.course import Course
+from app.services.activity_rollup_service import ActivityRollupService
+from app.services.cache_invalidation import notify_mastery_changed
+from app.services.cohort_service import CohortService
+from app.services.dashboard_service import DashboardService
+from app.services.event_service import EventService, ACTIVITY_RECORDED
+from app.services.learning_issue_service import LearningIssueService, build_issues
+from app.services.mastery_engine import MasteryEngine
+from app.services.forgetting_curve import effective_mastery, review_interval_factor
 from app.react.tools_register import register_as_tool
+from app.utils.activity_buffer import get_activity_buffer
+from app.utils.cache import TTLCache
+from app.utils.metrics import instrumented
+
+_snapshot_cache = TTLCache(ttl=Config.STUDENT_ANALYTICS_CACHE_TTL,
+                           max_entries=Config.STUDENT_ANALYTICS_CACHE_MAX_ENTRIES)
+
+def _activity_event(row):
+    """学习活动记录对应的activity_recorded事件。"""
+    timestamp = row['timestamp']
+    return {
+        'event_type': ACTIVITY_RECORDED,
+        'student_id': row['student'],
+        'course_id': row['course'],
+        'payload': {
+            'activity_type': row['activity_type'],
+            'duration': row['duration'],
+            'knowledge_point_id': row['knowledge_point'],
+            'timestamp': timestamp if isinstance(timestamp, str) else timestamp.isoformat()
+        }
+    }
+
+def _publish_inserted(rows):
+    """在活动缓冲区的插入事务中发布对应的学习事件。"""
+    EventService.publish_many([_activity_event(row) for row in rows])
+
+def _invalidate_inserted(events):
+    """活动缓冲区写入数据库后使相关学生的分析快照失效。"""
+    for student_id in {event['student'] for event in events}:
+        AnalyticsService.invalidate_student_analytics(student_id)
 
 class AnalyticsService:
     """学习数据分析服务，处理学习行为数据分析和学习情况评估。
@@ -13,6 +54,7 @@ class AnalyticsService:
     """
     
     @staticmethod
+    @instrumented
     def record_learning_activity(student_id, course_id, activity_type, 
                                 duration=0, knowledge_point_id=None, metadata=None):
         """记录学习活动。
@@ -28,19 +70,74 @@ class AnalyticsService:
         Returns:
             LearningActivity: 创建的学习活动记录
         """
-        leanring_activity = LearningActivity.create(
-            student_id=student_id,
-            course_id=course_id,
-            activity_type=activity_type,
-            duration=duration,
-            knowledge_point_id=knowledge_point_id,
-            timestamp=datetime.now(),
-            metadata=metadata
-        )
-        leanring_activity.save()
-        return leanring_activity
+        with db.atomic():
+            activity = LearningActivity.create(
+                student_id=student_id,
+                course_id=course_id,
+                activity_type=activity_type,
+                duration=duration,
+                knowledge_point_id=knowledge_point_id,
+                timestamp=datetime.now(),
+                metadata=metadata
+            )
+            EventService.publish_many([_activity_event({
+                'student': student_id, 'course': course_id, 'activity_type': activity_type,
+                'duration': duration, 'knowledge_point': knowledge_point_id, 'timestamp': activity.timestamp
+            })])
+        AnalyticsService.invalidate_student_analytics(student_id)
+        return activity
     
     @staticmethod
+    @instrumented
+    def enqueue_learning_activities(student_id, events, buffer=None):
+        """批量记录学习活动，写入缓冲区后由后台线程批量插入数据库。
+        
+        Args:
+            student_id (int): 学生用户ID
+            events (list): 活动字典列表，每项包含course_id、activity_type，
+                           可选duration、knowledge_point_id、metadata
+            buffer (ActivityBuffer, optional): 写入的缓冲区，默认使用进程共享的缓冲区
+            
+        Returns:
+            int: 接收的活动数量
+            
+        Raises:
+            ValueError: 如果活动数据不合法
+        """
+        timestamp = datetime.now().isoformat()
+        rows = []
+        for event in events:
+            if not isinstance(event, dict):
+                raise ValueError("活动数据格式错误")
+            activity_type = event.get('activity_type')
+            if not isinstance(activity_type, str) or not 0 < len(activity_type) <= 50:
+                raise ValueError("活动类型不能为空且不超过50个字符")
+            metadata = event.get('metadata')
+            if metadata is not None and not isinstance(metadata, dict):
+                raise ValueError("metadata必须是对象")
+            try:
+                course_id = int(event['course_id'])
+                duration = max(0, int(event.get('duration') or 0))
+                knowledge_point_id = event.get('knowledge_point_id')
+                knowledge_point_id = int(knowledge_point_id) if knowledge_point_id is not None else None
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("course_id、duration和knowledge_point_id必须是整数")
+            rows.append({
+                'student': student_id,
+                'course': course_id,
+                'activity_type': activity_type,
+                'duration': duration,
+                'knowledge_point': knowledge_point_id,
+                'metadata': metadata,
+                'timestamp': timestamp
+            })
+        
+        # 学习事件与活动在同一事务中发布；快照在活动真正写入数据库后才失效，见_invalidate_inserted
+        return (buffer or get_activity_buffer(on_insert=_invalidate_inserted,
+                                              before_commit=_publish_inserted)).add(rows)
+    
+    @staticmethod
+    @instrumented
     def update_knowledge_mastery(student_id, knowledge_point_id, score_change):
         """更新知识点掌握度。
         
@@ -52,22 +149,90 @@ class AnalyticsService:
         Returns:
             StudentKnowledgePoint: 更新后的学生知识点对象
         """
-        record, created = StudentKnowledgePoint.get_or_create(
-            student_id=student_id,
-            knowledge_point_id=knowledge_point_id,
-            defaults={'mastery_level': 0.0}
+        AnalyticsService.bulk_update_mastery([(student_id, knowledge_point_id, score_change)])
+        return StudentKnowledgePoint.get(
+            (StudentKnowledgePoint.student_id == student_id) &
+            (StudentKnowledgePoint.knowledge_point_id == knowledge_point_id)
         )
+    
+    @staticmethod
+    @instrumented
+    def bulk_update_mastery(updates, batch_size=1000):
+        """批量更新知识点掌握度。
         
-        # 更新掌握度，确保在0-1范围内
-        new_level = record.mastery_level + score_change
-        record.mastery_level = max(0.0, min(1.0, new_level))
-        record.last_interaction = datetime.now()
-        record.save()
+        每批用一条INSERT ... ON CONFLICT DO UPDATE语句在数据库中累加并截断到0-1范围，
+        读取和写入在同一行锁内完成，并发更新不会互相覆盖。在调用方的事务中执行时，
+        缓存的掌握度矩阵和学生分析数据在事务提交后才更新。
         
-        return record
+        Args:
+            updates (iterable): (学生ID, 知识点ID, 分数变化)元组，同一学生和知识点的变化会先合并
+            batch_size (int): 每条语句更新的最大记录数
+            
+        Returns:
+            int: 更新或新建的记录数
+        """
+        deltas = {}
+        for student_id, knowledge_point_id, delta in updates:
+            key = (int(student_id), int(knowledge_point_id))
+            deltas[key] = deltas.get(key, 0.0) + float(delta)
+        if not deltas:
+            return 0
+        
+        table = StudentKnowledgePoint._meta.table_name
+        # 复习间隔 = 半衰期 × 半衰期数，半衰期 = MASTERY_HALF_LIFE_DAYS × (1 + 掌握度)
+        interval_days = Config.MASTERY_HALF_LIFE_DAYS * review_interval_factor()
+        new_level = f"""LEAST(1, GREATEST(0, "{table}".mastery_level + (
+                        SELECT d.delta FROM deltas d
+                        WHERE d.student_id = EXCLUDED.student_id
+                          AND d.knowledge_point_id = EXCLUDED.knowledge_point_id)))"""
+        # 按主键顺序加锁，避免并发批次互相死锁
+        items = sorted(deltas.items())
+        changes, seen_at = [], None
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            values = ', '.join(['(%s::integer, %s::integer, %s::double precision)'] * len(batch))
+            params = [value for (student_id, knowledge_point_id), delta in batch
+                      for value in (student_id, knowledge_point_id, delta)]
+            # 新记录从0开始；已有记录在DO UPDATE中按CTE里的原始变化量累加，同时重新安排复习时间
+            cursor = db.execute_sql(f"""
+                WITH deltas (student_id, knowledge_point_id, delta) AS (VALUES {values})
+                INSERT INTO "{table}" (student_id, knowledge_point_id, mastery_level,
+                                       last_interaction, review_due_at, created_at, updated_at)
+                SELECT student_id, knowledge_point_id, LEAST(1, GREATEST(0, delta)), NOW(),
+                       NOW() + %s * (1 + LEAST(1, GREATEST(0, delta))) * INTERVAL '1 day', NOW(), NOW()
+                FROM deltas
+                ON CONFLICT (student_id, knowledge_point_id) DO UPDATE SET
+                    mastery_level = {new_level},
+                    review_due_at = EXCLUDED.last_interaction + %s * (1 + {new_level}) * INTERVAL '1 day',
+                    last_interaction = EXCLUDED.last_interaction,
+                    updated_at = EXCLUDED.updated_at
+                RETURNING student_id, knowledge_point_id, mastery_level, last_interaction
+            """, params + [interval_days, interval_days])
+            rows = cursor.fetchall()
+            changes.extend(row[:3] for row in rows)
+            if rows:
+                seen_at = rows[0][3]
+        
+        knowledge_point_ids = {knowledge_point_id for _, knowledge_point_id in deltas}
+        student_ids = {student_id for student_id, _ in deltas}
+        CohortService.mark_knowledge_points_changed(knowledge_point_ids)
+        # 其他进程（如Web进程之于事件消费者）在提交时收到通知，使各自的缓存失效
+        notify_mastery_changed(student_ids, knowledge_point_ids)
+
+        def update_caches():
+            # 把新掌握度直接写入缓存的矩阵，章节汇总随之增量更新
+            if changes:
+                MasteryEngine.apply_levels(changes, seen_at=seen_at)
+            for student_id in student_ids:
+                AnalyticsService.invalidate_student_analytics(student_id)
+
+        # 在调用方的事务中执行时，提交后才更新缓存
+        db.on_commit(update_caches)
+        return len(changes)
     
     @register_as_tool(roles=["student", "teacher"])
     @staticmethod
+    @instrumented
     def get_student_knowledge_mastery(student_id, course_id=None):
         """获取学生知识点掌握情况。
         
@@ -78,10 +243,13 @@ class AnalyticsService:
         Returns:
             dict: 以知识点ID为键，掌握度为值的字典
         """
-        query = StudentKnowledgePoint.select().where(StudentKnowledgePoint.student_id == student_id)
+        query = (StudentKnowledgePoint
+                 .select(StudentKnowledgePoint, KnowledgePoint)
+                 .join(KnowledgePoint)
+                 .where(StudentKnowledgePoint.student_id == student_id))
         
         if course_id:
-            query = query.join(KnowledgePoint).where(KnowledgePoint.course_id == course_id)
+            query = query.where(KnowledgePoint.course_id == course_id)
             
         results = {}
         for record in query:
@@ -95,6 +263,7 @@ class AnalyticsService:
     
     @register_as_tool(roles=["student", "teacher"])
     @staticmethod
+    @instrumented
     def get_student_activity_summary(student_id, course_id=None, days=30):
         """获取学生活动概要。
         
@@ -106,58 +275,30 @@ class AnalyticsService:
         Returns:
             dict: 包含活动统计信息的字典
         """
-        start_date = datetime.now() - timedelta(days=days)
-        
-        query = LearningActivity.select().where(
-            (LearningActivity.student_id == student_id) &
-            (LearningActivity.timestamp >= start_date)
-        )
+        start_date = (datetime.now() - timedelta(days=days)).date()
         
-        if course_id:
-            query = query.where(LearningActivity.course_id == course_id)
-            
-        activities = list(query)
+        # 从按天汇总表读取，按活动类型和日期统计
+        rows = ActivityRollupService.summarize(['activity_type', 'day'], start_date,
+                                               student_id=student_id, course_id=course_id)
         
-        if not activities:
-            return {
-                'total_activities': 0,
-                'total_duration': 0,
-                'activity_types': {},
-                'daily_activities': {}
-            }
-            
-        # 将活动数据转换为DataFrame以便于分析
-        df = pd.DataFrame([{
-            'timestamp': a.timestamp,
-            'activity_type': a.activity_type,
-            'duration': a.duration
-        } for a in activities])
-        
-        # 按活动类型统计
-        activity_types = df.groupby('activity_type').agg({
-            'activity_type': 'count',
-            'duration': 'sum'
-        }).rename(columns={'activity_type': 'count'}).to_dict('index')
-        
-        # 按日期统计
-        df['date'] = df['timestamp'].dt.date
-        daily_activities = df.groupby('date').agg({
-            'timestamp': 'count',
-            'duration': 'sum'
-        }).rename(columns={'timestamp': 'count'}).to_dict('index')
-        
-        # 转换日期格式为字符串以便JSON序列化
-        daily_activities = {str(k): v for k, v in daily_activities.items()}
+        activity_types = {}
+        daily_activities = {}
+        for activity_type, day, count, duration, _ in sorted(rows, key=lambda row: row[1]):
+            for key, totals in ((activity_type, activity_types), (str(day), daily_activities)):
+                entry = totals.setdefault(key, {'count': 0, 'duration': 0})
+                entry['count'] += count
+                entry['duration'] += duration
         
         return {
-            'total_activities': len(activities),
-            'total_duration': df['duration'].sum(),
+            'total_activities': sum(v['count'] for v in activity_types.values()),
+            'total_duration': sum(v['duration'] for v in activity_types.values()),
             'activity_types': activity_types,
             'daily_activities': daily_activities
         }
     
     @register_as_tool(roles=["student", "teacher"])
     @staticmethod
+    @instrumented
     def detect_learning_issues(student_id, course_id=None, threshold=0.5):
         """检测学习问题，包括低活跃度、低掌握度等。
         
@@ -169,61 +310,287 @@ class AnalyticsService:
         Returns:
             dict: 检测到的问题列表
         """
-        issues = []
-        
-        # 检查低掌握度知识点
-        mastery_data = AnalyticsService.get_student_knowledge_mastery(student_id, course_id)
+        # 只读取低于阈值的掌握度记录，不加载完整的学生分析快照
+        query = (StudentKnowledgePoint
+                 .select(StudentKnowledgePoint.knowledge_point_id, KnowledgePoint.name,
+                         StudentKnowledgePoint.mastery_level)
+                 .join(KnowledgePoint)
+                 .where((StudentKnowledgePoint.student_id == student_id) &
+                        (StudentKnowledgePoint.mastery_level < threshold)))
+        if course_id:
+            query = query.where(KnowledgePoint.course_id == course_id)
         low_mastery_points = [
-            {'id': point_id, 'name': data['knowledge_point_name'], 'level': data['mastery_level']}
-            for point_id, data in mastery_data.items()
-            if data['mastery_level'] < threshold
+            {'id': point_id, 'name': name, 'level': level}
+            for point_id, name, level in query.tuples()
         ]
         
-        if low_mastery_points:
-            issues.append({
-                'type': 'low_mastery',
-                'message': f'发现{len(low_mastery_points)}个掌握度较低的知识点',
-                'details': low_mastery_points
-            })
-        
         # 检查未提交作业
-        overdue_assignments = []
-        now = datetime.now()
-        
-        query = StudentAssignment.select().join(Assignment)
-        query = query.where(
-            (StudentAssignment.student_id == student_id) &
-            (StudentAssignment.completed == False) &
-            (Assignment.due_date < now)
-        )
+        query = (StudentAssignment
+                 .select(Assignment.id, Assignment.title, Assignment.due_date)
+                 .join(Assignment)
+                 .where((StudentAssignment.student_id == student_id) &
+                        (StudentAssignment.completed == False) &
+                        (Assignment.due_date < datetime.now())))
         
         if course_id:
             query = query.where(Assignment.course_id == course_id)
             
-        for sa in query:
-            overdue_assignments.append({
-                'id': sa.assignment_id,
-                'title': sa.assignment.title,
-                'due_date': str(sa.assignment.due_date)
-            })
-            
-        if overdue_assignments:
-            issues.append({
-                'type': 'overdue_assignments',
-                'message': f'发现{len(overdue_assignments)}个已过期未提交的作业',
-                'details': overdue_assignments
-            })
+        overdue_assignments = [
+            {'id': assignment_id, 'title': title, 'due_date': str(due_date)}
+            for assignment_id, title, due_date in query.tuples()
+        ]
             
-        # 检查低活跃度
-        activity_summary = AnalyticsService.get_student_activity_summary(student_id, course_id, days=7)
-        if activity_summary['total_activities'] == 0:
-            issues.append({
-                'type': 'inactive',
-                'message': '过去7天内无学习活动记录',
-                'details': None
-            })
+        # 检查低活跃度：最近7天的活动总数
+        recent_start = (datetime.now() - timedelta(days=7)).date()
+        (recent_activities, _, _), = ActivityRollupService.summarize([], recent_start,
+                                                                    student_id=student_id, course_id=course_id)
+        issues = build_issues(low_mastery_points, overdue_assignments, recent_activities == 0)
             
         return {
             'has_issues': len(issues) > 0,
             'issues': issues
         }
+    
+    @staticmethod
+    @instrumented
+    def get_student_analytics(student_id, course_id=None):
+        """获取学生分析页面所需的全部数据，结果按学生和课程缓存。
+        
+        学习活动、掌握度变化和作业提交、评分时缓存立即失效；其他进程中的掌握度变化通过通知失效，
+        其余变化最多在STUDENT_ANALYTICS_CACHE_TTL秒后可见。
+        
+        Args:
+            student_id (int): 学生用户ID
+            course_id (int, optional): 课程ID
+            
+        Returns:
+            dict: 包含activity_summary（30天活动概要）、knowledge_mastery（知识点掌握情况）、
+                  mastery_tree（章节掌握度，未指定课程时为空）、learning_issues（学习问题快照）
+                  和due_reviews（需要复习的知识点）的字典，调用方不应修改
+        """
+        def load():
+            return {
+                'activity_summary': AnalyticsService.get_student_activity_summary(student_id, course_id),
+                'knowledge_mastery': AnalyticsService.get_student_knowledge_mastery(student_id, course_id),
+                'mastery_tree': AnalyticsService.get_student_mastery_tree(student_id, course_id) if course_id else [],
+                'learning_issues': LearningIssueService.get_learning_issues(student_id, course_id),
+                'due_reviews': AnalyticsService.get_due_reviews(student_id, course_id)
+            }
+        
+        return _snapshot_cache.get_or_load((student_id, course_id), load)
+    
+    @staticmethod
+    @instrumented
+    def invalidate_student_analytics(student_id):
+        """使学生所有课程的分析快照和仪表盘缓存失效。
+        
+        Args:
+            student_id (int): 学生用户ID
+        """
+        # 该学生正在生成的数据可能已读到旧数据，也不再写入缓存；其他学生不受影响
+        _snapshot_cache.invalidate_where(lambda key: key[0] == student_id)
+        DashboardService.invalidate_student_dashboard(student_id)
+    
+    @staticmethod
+    @instrumented
+    def get_course_mastery_matrix(course_id):
+        """获取课程内所有学生的知识点掌握情况。
+        
+        Args:
+            course_id (int): 课程ID
+            
+        Returns:
+            dict: 包含knowledge_points（知识点ID到名称）和students（学生ID到
+                  mastery掌握度字典及average_mastery平均掌握度）的字典
+        """
+        matrix = MasteryEngine.get_matrix(course_id)
+        averages = matrix.student_means()
+        
+        students = {}
+        for row, student_id in enumerate(matrix.student_ids.tolist()):
+            students[student_id] = {
+                'mastery': matrix.student_row(student_id),
+                'average_mastery': float(averages[row])
+            }
+            
+        return {
+            'knowledge_points': dict(matrix.kp_names),
+            'students': students
+        }
+    
+    @staticmethod
+    @instrumented
+    def get_course_effective_mastery(course_id, now=None):
+        """获取课程内所有学生按遗忘曲线衰减后的当前掌握度，整门课程一次向量化计算。
+        
+        Args:
+            course_id (int): 课程ID
+            now (datetime, optional): 计算时刻，默认当前时间
+            
+        Returns:
+            dict: 与get_course_mastery_matrix结构相同，掌握度为衰减后的有效掌握度
+        """
+        matrix = MasteryEngine.get_matrix(course_id)
+        effective = matrix.effective(now.timestamp() if now else None)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            averages = np.nanmean(effective, axis=1)
+        
+        students = {}
+        for row, student_id in enumerate(matrix.student_ids.tolist()):
+            columns = np.flatnonzero(~np.isnan(effective[row]))
+            students[student_id] = {
+                'mastery': {int(matrix.kp_ids[column]): float(effective[row, column]) for column in columns},
+                'average_mastery': float(averages[row])
+            }
+        
+        return {
+            'knowledge_points': dict(matrix.kp_names),
+            'students': students
+        }
+    
+    @register_as_tool(roles=["student", "teacher"])
+    @staticmethod
+    @instrumented
+    def get_due_reviews(student_id, course_id=None, limit=20):
+        """获取学生当前需要复习的知识点，按应复习时间从早到晚排列。
+        
+        复习时间在掌握度更新时按遗忘曲线预先算好，这里只做一次索引查询。
+        
+        Args:
+            student_id (int): 学生用户ID
+            course_id (int, optional): 课程ID
+            limit (int): 最多返回的知识点数量
+            
+        Returns:
+            list: 知识点列表，每项包含knowledge_point_id、knowledge_point_name、course_id、
+                  mastery_level（记录的掌握度）、effective_mastery（衰减后的掌握度）和review_due_at
+        """
+        now = datetime.now()
+        query = (StudentKnowledgePoint
+                 .select(StudentKnowledgePoint.knowledge_point_id, KnowledgePoint.name, KnowledgePoint.course_id,
+                         StudentKnowledgePoint.mastery_level, StudentKnowledgePoint.last_interaction,
+                         StudentKnowledgePoint.review_due_at)
+                 .join(KnowledgePoint)
+                 .where((StudentKnowledgePoint.student_id == student_id) &
+                        (StudentKnowledgePoint.review_due_at <= now)))
+        
+        if course_id:
+            query = query.where(KnowledgePoint.course_id == course_id)
+        
+        rows = list(query.order_by(StudentKnowledgePoint.review_due_at).limit(limit).tuples())
+        elapsed_days = [(now - last).total_seconds() / 86400 if last else np.nan for _, _, _, _, last, _ in rows]
+        effective = effective_mastery([row[3] for row in rows], elapsed_days)
+        return [
+            {
+                'knowledge_point_id': kp_id,
+                'knowledge_point_name': name,
+                'course_id': kp_course_id,
+                'mastery_level': level,
+                'effective_mastery': float(effective_level),
+                'review_due_at': due_at
+            }
+            for (kp_id, name, kp_course_id, level, _, due_at), effective_level in zip(rows, effective)
+        ]
+    
+    @staticmethod
+    @instrumented
+    def reschedule_reviews(course_id=None):
+        """按当前遗忘曲线参数重新计算复习时间，用于回填或修改参数之后。
+        
+        Args:
+            course_id (int, optional): 课程ID，不指定时处理所有课程
+            
+        Returns:
+            int: 更新的记录数
+        """
+        table = StudentKnowledgePoint._meta.table_name
+        params = [Config.MASTERY_HALF_LIFE_DAYS * review_interval_factor()]
+        condition = ''
+        if course_id:
+            condition = f'AND knowledge_point_id IN (SELECT id FROM "{KnowledgePoint._meta.table_name}" WHERE course_id = %s)'
+            params.append(course_id)
+        cursor = db.execute_sql(f"""
+            UPDATE "{table}"
+            SET review_due_at = last_interaction + %s * (1 + mastery_level) * INTERVAL '1 day'
+            WHERE last_interaction IS NOT NULL {condition}
+        """, params)
+        return cursor.rowcount
+    
+    @register_as_tool(roles=["student", "teacher"])
+    @staticmethod
+    @instrumented
+    def get_student_mastery_tree(student_id, course_id):
+        """按知识点树获取学生在每个章节（子树）上的汇总掌握度。
+        
+        节点的汇总掌握度是其子树中所有有记录知识点掌握度的平均值。
+        
+        Args:
+            student_id (int): 学生用户ID
+            course_id (int): 课程ID
+            
+        Returns:
+            list: 按树的先序排列的节点列表，每个节点包含id、name、parent_id、depth、
+                  is_leaf、mastery（汇总掌握度）和own_mastery（自身掌握度），没有记录时为None
+        """
+        matrix = MasteryEngine.get_matrix(course_id)
+        row = matrix.student_index.get(student_id)
+        if row is None:
+            rollup = own = [None] * len(matrix.kp_ids)
+        else:
+            rollup = [None if np.isnan(value) else float(value) for value in matrix.rollup()[row]]
+            own = [None if np.isnan(value) else float(value) for value in matrix.values[row]]
+        
+        children = {}
+        for kp_id in matrix.kp_ids.tolist():
+            parent_id = matrix.kp_parents.get(kp_id)
+            children.setdefault(parent_id if parent_id in matrix.kp_index else None, []).append(kp_id)
+        
+        nodes = []
+        stack = [(kp_id, 0) for kp_id in reversed(children.get(None, []))]
+        while stack:
+            kp_id, depth = stack.pop()
+            column = matrix.kp_index[kp_id]
+            nodes.append({
+                'id': kp_id,
+                'name': matrix.kp_names[kp_id],
+                'parent_id': matrix.kp_parents.get(kp_id),
+                'depth': depth,
+                'is_leaf': kp_id not in children,
+                'mastery': rollup[column],
+                'own_mastery': own[column]
+            })
+            stack.extend((child, depth + 1) for child in reversed(children.get(kp_id, [])))
+        return nodes
+    
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    @instrumented
+    def get_course_activity_summary(course_id, days=30):
+        """获取课程内所有学生的活动概要。
+        
+        Args:
+            course_id (int): 课程ID
+            days (int): 统计天数，默认30天
+            
+        Returns:
+            dict: 包含课程总活动次数total_activities、总时长total_duration，
+                  以及students（学生ID到其活动次数、时长和最近活动日期的字典）
+        """
+        start_date = (datetime.now() - timedelta(days=days)).date()
+        
+        rows = ActivityRollupService.summarize(['student_id'], start_date, course_id=course_id)
+        
+        students = {}
+        for student_id, count, duration, last_active in rows:
+            students[student_id] = {
+                'total_activities': count,
+                'total_duration': duration,
+                'last_active_date': str(last_active)
+            }
+            
+        return {
+            'total_activities': sum(s['total_activities'] for s in students.values()),
+            'total_duration': sum(s['total_duration'] for s in students.values()),
+            'students': students
+        }
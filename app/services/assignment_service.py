@@ -1,7 +1,13 @@
 from datetime import datetime
 from typing import Optional
+from peewee import fn, JOIN
+from app.ext import db
 from app.models.assignment import Assignment, StudentAssignment
 from app.models.course import Course, StudentCourse
+from app.services.analytics_service import AnalyticsService
+from app.services.cohort_service import CohortService
+from app.services.dashboard_service import DashboardService
+from app.services.event_service import EventService, ASSIGNMENT_SUBMITTED, ASSIGNMENT_GRADED
 from app.react.tools_register import register_as_tool
 
 class AssignmentService:
@@ -72,6 +78,7 @@ class AssignmentService:
                     student=student_course.student,
                     assignment=assignment
                 )
+                DashboardService.invalidate_student_dashboard(student_course.student_id)
                 created += 1
         
         return created
@@ -89,20 +96,26 @@ class AssignmentService:
             StudentAssignment: 更新后的学生作业对象
             
         """
-        #student_assignment = StudentAssignment.get_or_none(
-        student_assignment, created = StudentAssignment.get_or_create(
-            student = student_id,
-            assignment = assignment_id
-        )
-        
-        #if not student_assignment:
-        #    raise ValueError("无法找到对应的学生作业记录")
-        
-        student_assignment.answer = answer
-        student_assignment.submitted_at = datetime.now()
-        student_assignment.attempts += 1
+        with db.atomic():
+            #student_assignment = StudentAssignment.get_or_none(
+            student_assignment, created = StudentAssignment.get_or_create(
+                student = student_id,
+                assignment = assignment_id
+            )
+            
+            #if not student_assignment:
+            #    raise ValueError("无法找到对应的学生作业记录")
             
-        student_assignment.save()
+            student_assignment.answer = answer
+            student_assignment.submitted_at = datetime.now()
+            student_assignment.attempts += 1
+                
+            student_assignment.save()
+            EventService.publish(ASSIGNMENT_SUBMITTED, student_id, student_assignment.assignment.course_id, {
+                'assignment_id': assignment_id,
+                'attempts': student_assignment.attempts
+            })
+        AnalyticsService.invalidate_student_analytics(student_id)
         return student_assignment
     
     @register_as_tool(roles=["teacher"])
@@ -121,14 +134,25 @@ class AssignmentService:
         Raises:
             DoesNotExist: 如果找不到对应的作业对象
         """
-        student_assignment = StudentAssignment.get(
-            StudentAssignment.student==student_id,
-            StudentAssignment.assignment==assignment_id
-        )
-        student_assignment.score = score
-        student_assignment.feedback = feedback
-        student_assignment.completed = True
-        student_assignment.save()
+        with db.atomic():
+            student_assignment = StudentAssignment.get(
+                StudentAssignment.student==student_id,
+                StudentAssignment.assignment==assignment_id
+            )
+            previous_score = student_assignment.score
+            student_assignment.score = score
+            student_assignment.feedback = feedback
+            student_assignment.completed = True
+            student_assignment.save()
+            assignment = student_assignment.assignment
+            EventService.publish(ASSIGNMENT_GRADED, student_id, assignment.course_id, {
+                'assignment_id': assignment_id,
+                'score': score,
+                'previous_score': previous_score,
+                'total_points': assignment.total_points
+            })
+            CohortService.record_score(assignment_id, score, previous_score)
+        AnalyticsService.invalidate_student_analytics(student_id)
         return student_assignment
     
     @register_as_tool(roles=["student", "teacher"])
@@ -166,3 +190,50 @@ class AssignmentService:
             list: 作业对象列表
         """
         return list(Assignment.select().where(Assignment.course_id == course_id))
+    
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    def get_recent_assignments_for_teacher(teacher_id, limit=5):
+        """获取教师所有课程中截止日期最近的作业及其提交和评分人数。
+        
+        先在数据库中排序并截取最近的作业，再与学生作业记录连接统计人数，只需一条SQL。
+        
+        Args:
+            teacher_id (int): 教师用户ID
+            limit (int): 返回的作业数量，默认5
+            
+        Returns:
+            list: 按截止日期从晚到早排列的字典列表，每项包含id、title、due_date、total_points、
+                  course_id、course_name、assigned_count（分配人数）、submitted_count（提交人数）
+                  和graded_count（已评分人数）
+        """
+        recent = (Assignment
+                  .select(Assignment.id, Assignment.title, Assignment.due_date, Assignment.total_points,
+                          Course.id.alias('course_id'), Course.name.alias('course_name'))
+                  .join(Course)
+                  .where(Course.teacher_id == teacher_id)
+                  .order_by(Assignment.due_date.desc(), Assignment.id.desc())
+                  .limit(limit)
+                  .alias('recent'))
+        columns = [recent.c.id, recent.c.title, recent.c.due_date, recent.c.total_points,
+                   recent.c.course_id, recent.c.course_name]
+        query = (StudentAssignment
+                 .select(*columns, fn.COUNT(StudentAssignment.id), fn.COUNT(StudentAssignment.submitted_at),
+                         fn.COUNT(StudentAssignment.score))
+                 .from_(recent)
+                 .join(StudentAssignment, JOIN.LEFT_OUTER, on=(StudentAssignment.assignment == recent.c.id))
+                 .group_by(*columns)
+                 .order_by(recent.c.due_date.desc(), recent.c.id.desc())
+                 .tuples())
+        return [{
+            'id': assignment_id,
+            'title': title,
+            'due_date': due_date,
+            'total_points': total_points,
+            'course_id': course_id,
+            'course_name': course_name,
+            'assigned_count': assigned,
+            'submitted_count': submitted,
+            'graded_count': graded
+        } for assignment_id, title, due_date, total_points, course_id, course_name, assigned, submitted, graded
+            in query]
@@ -0,0 +1,80 @@
+import json
+import os
+import select
+import threading
+import time
+from app.ext import db
+from app.utils.logging import logger
+
+# 掌握度变化通过PostgreSQL的NOTIFY通知所有进程：通知在事务提交时才送达、回滚时丢弃，
+# 事件消费者等其他进程中的更新也能立即让各个Web进程的缓存失效，而不是等到TTL过期
+CHANNEL = 'mastery_changed'
+
+# NOTIFY的内容不能超过8000字节，ID较多时分成多条通知
+IDS_PER_NOTIFICATION = 500
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def notify_mastery_changed(student_ids, knowledge_point_ids):
+    """通知其他进程这些学生和知识点的掌握度已变化，在写入掌握度的同一事务中调用。
+
+    Args:
+        student_ids (iterable): 学生用户ID
+        knowledge_point_ids (iterable): 知识点ID
+    """
+    student_ids, knowledge_point_ids = sorted(student_ids), sorted(knowledge_point_ids)
+    for start in range(0, max(len(student_ids), len(knowledge_point_ids)), IDS_PER_NOTIFICATION):
+        payload = json.dumps({
+            'pid': os.getpid(),
+            'student_ids': student_ids[start:start + IDS_PER_NOTIFICATION],
+            'knowledge_point_ids': knowledge_point_ids[start:start + IDS_PER_NOTIFICATION]
+        })
+        db.execute_sql('SELECT pg_notify(%s, %s)', (CHANNEL, payload))
+
+def _invalidate(student_ids, knowledge_point_ids):
+    from app.services.analytics_service import AnalyticsService
+    from app.services.mastery_engine import MasteryEngine
+    MasteryEngine.invalidate_knowledge_points(knowledge_point_ids)
+    for student_id in student_ids:
+        AnalyticsService.invalidate_student_analytics(student_id)
+
+def _handle(payload):
+    message = json.loads(payload)
+    # 本进程在提交后已经更新过自己的缓存
+    if message['pid'] != os.getpid():
+        _invalidate(message['student_ids'], message['knowledge_point_ids'])
+
+def _listen(interval):
+    import psycopg2
+    # 断线期间错过的通知由各缓存的TTL兜底
+    while True:
+        try:
+            connection = psycopg2.connect(dbname=db.database, **db.connect_params)
+            try:
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                while True:
+                    if select.select([connection], [], [], interval)[0]:
+                        connection.poll()
+                        while connection.notifies:
+                            _handle(connection.notifies.pop(0).payload)
+            finally:
+                connection.close()
+        except Exception as e:
+            logger.error(f"Mastery change listener failed, reconnecting: {e}")
+            time.sleep(interval)
+
+def start_listener(interval=5.0):
+    """在后台线程中接收其他进程的掌握度变化通知并使本进程的缓存失效，每个进程只启动一次。
+
+    Args:
+        interval (float): 等待通知的超时和断线重连的间隔（秒）
+    """
+    global _listener
+    with _listener_lock:
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(target=_listen, args=(interval,), name='mastery-change-listener',
+                                         daemon=True)
+            _listener.start()
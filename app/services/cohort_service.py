@@ -0,0 +1,265 @@
+from datetime import datetime, timedelta
+from peewee import fn, EXCLUDED
+from app.config import Config
+from app.ext import db
+from app.models.learning_data import StudentKnowledgePoint, KnowledgePoint, CohortSketch
+from app.models.assignment import StudentAssignment, Assignment
+from app.react.tools_register import register_as_tool
+from app.utils.quantile_sketch import KLLSketch
+
+COURSE_MASTERY = 'course_mastery'
+ASSIGNMENT_SCORE = 'assignment_score'
+DEFAULT_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+def _summary(sketch, quantiles):
+    """把草图整理为返回给调用方的统计字典。"""
+    return {
+        'count': sketch.n,
+        'exact': sketch.is_exact,
+        'min': sketch.min,
+        'max': sketch.max,
+        'quantiles': {str(q): sketch.quantile(q) for q in quantiles}
+    }
+
+class CohortService:
+    """群体分位数统计服务。
+
+    每门课程的学生平均掌握度和每份作业的得分各用一个KLL分位数草图保存在
+    cohort_sketches表中，多门课程（平行班）的草图可以直接合并。首次评分时
+    把分数追加进草图；重新评分或掌握度变化会让旧值失效，此时草图标记为stale，
+    在读取时（最多每COHORT_SKETCH_REFRESH_SECONDS秒一次）用一条聚合查询重建。
+    不超过COHORT_EXACT_MAX_SIZE人的群体直接查询精确值。
+    """
+
+    @staticmethod
+    def _values_query(scope, scope_ids):
+        if scope == COURSE_MASTERY:
+            return (StudentKnowledgePoint
+                    .select(fn.AVG(StudentKnowledgePoint.mastery_level))
+                    .join(KnowledgePoint)
+                    .where(KnowledgePoint.course_id.in_(scope_ids))
+                    .group_by(KnowledgePoint.course_id, StudentKnowledgePoint.student_id))
+        if scope == ASSIGNMENT_SCORE:
+            return (StudentAssignment
+                    .select(StudentAssignment.score)
+                    .where(StudentAssignment.assignment_id.in_(scope_ids) &
+                           StudentAssignment.score.is_null(False)))
+        raise ValueError(f"未知的统计范围: {scope}")
+
+    @staticmethod
+    def cohort_values(scope, scope_ids):
+        """精确查询群体的全部取值。
+
+        Args:
+            scope (str): course_mastery或assignment_score
+            scope_ids (list): 课程ID或作业ID列表
+
+        Returns:
+            list: 取值列表，course_mastery为每个学生在每门课程中的平均掌握度
+        """
+        return [value for (value,) in CohortService._values_query(scope, list(scope_ids)).tuples()]
+
+    @staticmethod
+    def _lock_sketch(scope, scope_id):
+        # 同一草图的重建和更新持有同一个事务级咨询锁：重建在取得锁之后才读取取值，
+        # 评分在保存分数的事务内取锁，新分数要么已被重建读到，要么在重建之后追加，不会计入两次
+        db.execute_sql('SELECT pg_advisory_xact_lock(hashtext(%s), %s)', (scope, scope_id))
+
+    @staticmethod
+    def rebuild(scope, scope_id):
+        """从数据库重建一个草图并保存。
+
+        Returns:
+            KLLSketch: 重建的草图
+        """
+        with db.atomic():
+            CohortService._lock_sketch(scope, scope_id)
+            sketch = KLLSketch(k=Config.COHORT_SKETCH_K).update(CohortService.cohort_values(scope, [scope_id]))
+            now = datetime.now()
+            (CohortSketch
+             .insert(scope=scope, scope_id=scope_id, sketch=sketch.to_dict(), stale=False,
+                     created_at=now, updated_at=now)
+             .on_conflict(conflict_target=[CohortSketch.scope, CohortSketch.scope_id],
+                          update={CohortSketch.sketch: EXCLUDED.sketch,
+                                  CohortSketch.stale: False,
+                                  CohortSketch.updated_at: EXCLUDED.updated_at})
+             .execute())
+        return sketch
+
+    @staticmethod
+    def get_sketches(scope, scope_ids):
+        """获取多个草图，缺失或过期的stale草图会先重建。
+
+        Returns:
+            dict: ID到KLLSketch的字典
+        """
+        scope_ids = list(scope_ids)
+        refresh_before = datetime.now() - timedelta(seconds=Config.COHORT_SKETCH_REFRESH_SECONDS)
+        rows = {row.scope_id: row for row in
+                CohortSketch.select().where((CohortSketch.scope == scope) & CohortSketch.scope_id.in_(scope_ids))}
+        sketches = {}
+        for scope_id in scope_ids:
+            row = rows.get(scope_id)
+            if row is None or (row.stale and row.updated_at < refresh_before):
+                sketches[scope_id] = CohortService.rebuild(scope, scope_id)
+            else:
+                sketches[scope_id] = KLLSketch.from_dict(row.sketch)
+        return sketches
+
+    @staticmethod
+    def _exact_if_small(scope, scope_ids, sketch):
+        """小群体的草图已被压缩时，改用精确值构建不压缩的草图。"""
+        if sketch.is_exact or sketch.n > Config.COHORT_EXACT_MAX_SIZE:
+            return sketch
+        values = CohortService.cohort_values(scope, scope_ids)
+        return KLLSketch(k=len(values)).update(values)
+
+    @staticmethod
+    def _merged(scope, scope_ids):
+        sketch = KLLSketch(k=Config.COHORT_SKETCH_K)
+        for part in CohortService.get_sketches(scope, scope_ids).values():
+            sketch.merge(part)
+        return CohortService._exact_if_small(scope, scope_ids, sketch)
+
+    @staticmethod
+    def get_percentiles(scope, scope_ids, quantiles=DEFAULT_QUANTILES):
+        """获取一个或多个（合并后）群体的分位数。
+
+        Args:
+            scope (str): course_mastery或assignment_score
+            scope_ids (list): 课程ID或作业ID列表，多个ID的群体会合并统计
+            quantiles (tuple): 需要的分位点，0-1
+
+        Returns:
+            dict: 包含count、exact（是否精确）、min、max和quantiles（分位点到取值）的字典
+        """
+        return _summary(CohortService._merged(scope, scope_ids), quantiles)
+
+    @staticmethod
+    def get_rank(scope, scope_ids, value):
+        """某个取值在群体中的百分位排名（不高于该值的比例，0-1），群体为空时返回None。"""
+        return CohortService._merged(scope, scope_ids).rank(value)
+
+    @staticmethod
+    def record_score(assignment_id, score, previous_score=None):
+        """评分后更新作业得分草图，应在保存分数的同一事务中调用。
+
+        首次评分把分数追加进草图；重新评分时旧分数无法从草图中删除，标记为stale。
+
+        Args:
+            assignment_id (int): 作业ID
+            score (float): 新分数
+            previous_score (float, optional): 评分前的分数
+        """
+        with db.atomic():
+            CohortService._lock_sketch(ASSIGNMENT_SCORE, assignment_id)
+            if previous_score is not None:
+                CohortService.mark_stale(ASSIGNMENT_SCORE, [assignment_id])
+                return
+            row = (CohortSketch
+                   .select()
+                   .where((CohortSketch.scope == ASSIGNMENT_SCORE) & (CohortSketch.scope_id == assignment_id))
+                   .first())
+            if row is None:
+                # 本事务已保存新分数，重建的草图会包含它
+                CohortService.rebuild(ASSIGNMENT_SCORE, assignment_id)
+                return
+            sketch = KLLSketch.from_dict(row.sketch)
+            sketch.add(score)
+            row.sketch = sketch.to_dict()
+            row.save()
+
+    @staticmethod
+    def mark_stale(scope, scope_ids):
+        """标记草图包含过期取值，下次读取时重建。"""
+        (CohortSketch
+         .update(stale=True)
+         .where((CohortSketch.scope == scope) & CohortSketch.scope_id.in_(list(scope_ids)))
+         .execute())
+
+    @staticmethod
+    def mark_knowledge_points_changed(knowledge_point_ids):
+        """掌握度变化后标记相关课程的掌握度草图过期，一条语句完成。"""
+        courses = (KnowledgePoint
+                   .select(KnowledgePoint.course_id)
+                   .where(KnowledgePoint.id.in_(list(knowledge_point_ids))))
+        (CohortSketch
+         .update(stale=True)
+         .where((CohortSketch.scope == COURSE_MASTERY) & CohortSketch.scope_id.in_(courses))
+         .execute())
+
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    def get_course_cohort_statistics(course_id, compare_course_ids=None):
+        """获取课程学生平均掌握度和各作业得分的分位数分布，可与其他课程（平行班）合并比较。
+
+        Args:
+            course_id (int): 课程ID
+            compare_course_ids (list, optional): 一起比较的其他课程ID列表
+
+        Returns:
+            dict: 包含mastery（本课程掌握度分布）、combined_mastery（与比较课程合并后的分布，
+                  未指定比较课程时为None）和assignments（作业ID到包含title和分数分布的字典）的字典
+        """
+        assignments = list(Assignment
+                           .select(Assignment.id, Assignment.title)
+                           .where(Assignment.course_id == course_id)
+                           .tuples())
+        sketches = CohortService.get_sketches(ASSIGNMENT_SCORE, [assignment_id for assignment_id, _ in assignments])
+        return {
+            'mastery': CohortService.get_percentiles(COURSE_MASTERY, [course_id]),
+            'combined_mastery': CohortService.get_percentiles(COURSE_MASTERY, [course_id, *compare_course_ids])
+                                if compare_course_ids else None,
+            'assignments': {
+                assignment_id: {
+                    'title': title,
+                    **_summary(CohortService._exact_if_small(ASSIGNMENT_SCORE, [assignment_id], sketches[assignment_id]),
+                               DEFAULT_QUANTILES)
+                }
+                for assignment_id, title in assignments
+            }
+        }
+
+    @register_as_tool(roles=["student", "teacher"])
+    @staticmethod
+    def get_student_cohort_position(student_id, course_id, compare_course_ids=None):
+        """获取学生的平均掌握度和各作业得分在班级（及平行班）中的百分位排名。
+
+        Args:
+            student_id (int): 学生用户ID
+            course_id (int): 课程ID
+            compare_course_ids (list, optional): 一起比较的其他课程ID列表
+
+        Returns:
+            dict: 包含average_mastery、mastery_rank（0-1，不高于该学生的比例）、
+                  combined_mastery_rank和assignments（作业ID到score、rank的字典）的字典
+        """
+        average = (StudentKnowledgePoint
+                   .select(fn.AVG(StudentKnowledgePoint.mastery_level))
+                   .join(KnowledgePoint)
+                   .where((StudentKnowledgePoint.student_id == student_id) &
+                          (KnowledgePoint.course_id == course_id))
+                   .scalar())
+        scores = list(StudentAssignment
+                      .select(StudentAssignment.assignment_id, StudentAssignment.score)
+                      .join(Assignment)
+                      .where((StudentAssignment.student_id == student_id) &
+                             (Assignment.course_id == course_id) &
+                             StudentAssignment.score.is_null(False))
+                      .tuples())
+        sketches = CohortService.get_sketches(ASSIGNMENT_SCORE, [assignment_id for assignment_id, _ in scores])
+        return {
+            'average_mastery': average,
+            'mastery_rank': CohortService.get_rank(COURSE_MASTERY, [course_id], average)
+                            if average is not None else None,
+            'combined_mastery_rank': CohortService.get_rank(COURSE_MASTERY, [course_id, *compare_course_ids], average)
+                                     if average is not None and compare_course_ids else None,
+            'assignments': {
+                assignment_id: {
+                    'score': score,
+                    'rank': CohortService._exact_if_small(ASSIGNMENT_SCORE, [assignment_id],
+                                                          sketches[assignment_id]).rank(score)
+                }
+                for assignment_id, score in scores
+            }
+        }
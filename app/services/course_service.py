@@ -1,6 +1,7 @@
 from app.models.course import Course, StudentCourse
 from app.models.assignment import *
 from app.models.user import User
+from app.services.dashboard_service import DashboardService
 from app.react.tools_register import register_as_tool
 
 class CourseService:
@@ -64,10 +65,12 @@ class CourseService:
                 assignment=assignment
             ).save()
 
-        return StudentCourse.create(
+        student_course = StudentCourse.create(
             course_id=course_id,
             student_id=student_id
         )
+        DashboardService.invalidate_student_dashboard(student_id)
+        return student_course
     
     @staticmethod
     def unenroll_student(course_id, student_id):
@@ -87,7 +90,9 @@ class CourseService:
             (StudentCourse.course_id == course_id) & 
             (StudentCourse.student_id == student_id)
         ).get()
-        return student_course.delete_instance()
+        deleted = student_course.delete_instance()
+        DashboardService.invalidate_student_dashboard(student_id)
+        return deleted
 
     @register_as_tool(roles=["student", "teacher"])
     @staticmethod
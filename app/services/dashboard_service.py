@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from peewee import JOIN
+from app.config import Config
+from app.models.assignment import StudentAssignment, Assignment
+from app.models.course import Course, StudentCourse
+from app.services.activity_rollup_service import ActivityRollupService
+from app.services.learning_issue_service import LearningIssueService
+from app.utils.cache import TTLCache
+from app.utils.metrics import instrumented
+
+_dashboard_cache = TTLCache(ttl=Config.DASHBOARD_CACHE_TTL, max_entries=Config.DASHBOARD_CACHE_MAX_ENTRIES)
+
+class DashboardService:
+    """仪表盘数据服务。
+
+    学生仪表盘需要的课程、待完成作业、近期活动和学习问题由一次调用组装：
+    课程与待完成作业在同一条连接查询中读取，活动总量读取按天汇总表，学习问题读取快照，
+    未命中缓存时共三条SQL。结果按学生缓存，选课、作业分配、提交、评分和学习活动
+    发生时立即失效，TTL为兜底。
+    """
+
+    @staticmethod
+    def _load_student_dashboard(student_id, days):
+        pending = (StudentAssignment
+                   .select(Assignment.course_id.alias('course_id'), Assignment.id.alias('assignment_id'),
+                           Assignment.title.alias('title'), Assignment.due_date.alias('due_date'))
+                   .join(Assignment)
+                   .where((StudentAssignment.student_id == student_id) & (StudentAssignment.completed == False))
+                   .alias('pending'))
+        rows = (Course
+                .select(Course.id, Course.name, Course.code, Course.description,
+                        pending.c.assignment_id, pending.c.title, pending.c.due_date)
+                .join(StudentCourse)
+                .switch(Course)
+                .join(pending, JOIN.LEFT_OUTER, on=(pending.c.course_id == Course.id))
+                .where(StudentCourse.student_id == student_id)
+                .order_by(Course.id, pending.c.due_date)
+                .tuples())
+
+        courses = {}
+        incomplete_assignments = []
+        for course_id, name, code, description, assignment_id, title, due_date in rows:
+            if course_id not in courses:
+                courses[course_id] = {'id': course_id, 'name': name, 'code': code, 'description': description}
+            if assignment_id is not None:
+                incomplete_assignments.append({
+                    'id': assignment_id,
+                    'title': title,
+                    'due_date': due_date,
+                    'course_id': course_id,
+                    'course_name': name
+                })
+        incomplete_assignments.sort(key=lambda assignment: assignment['due_date'])
+
+        start_date = (datetime.now() - timedelta(days=days)).date()
+        (total_activities, total_duration, _), = ActivityRollupService.summarize([], start_date, student_id=student_id)
+
+        return {
+            'courses': list(courses.values()),
+            'incomplete_assignments': incomplete_assignments,
+            'activity_summary': {
+                'total_activities': total_activities,
+                'total_duration': total_duration
+            },
+            'learning_issues': LearningIssueService.get_learning_issues(student_id),
+            'generated_at': datetime.now()
+        }
+
+    @staticmethod
+    @instrumented
+    def get_student_dashboard(student_id, days=30):
+        """获取学生仪表盘所需的全部数据。
+
+        Args:
+            student_id (int): 学生用户ID
+            days (int): 活动统计天数，默认30天
+
+        Returns:
+            dict: 包含courses（选修课程）、incomplete_assignments（按截止日期排列的待完成作业，
+                  含course_name）、activity_summary（total_activities和total_duration）、
+                  learning_issues和generated_at的字典，调用方不应修改
+        """
+        return _dashboard_cache.get_or_load(
+            (student_id, days), lambda: DashboardService._load_student_dashboard(student_id, days))
+
+    @staticmethod
+    def invalidate_student_dashboard(student_id):
+        """使学生的仪表盘缓存失效。
+
+        Args:
+            student_id (int): 学生用户ID
+        """
+        # 该学生正在生成的数据可能已读到旧数据，也不再写入缓存；其他学生不受影响
+        _dashboard_cache.invalidate_where(lambda key: key[0] == student_id)
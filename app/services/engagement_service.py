@@ -0,0 +1,158 @@
+from datetime import datetime, date, timedelta
+from peewee import fn
+from app.config import Config
+from app.models.learning_data import LearningActivity
+from app.services.activity_rollup_service import ActivityRollupService
+from app.react.tools_register import register_as_tool
+from app.utils.cache import TTLCache
+
+GRANULARITIES = ('hour', 'day', 'week')
+
+_cache = TTLCache(ttl=Config.ENGAGEMENT_CACHE_TTL, max_entries=Config.ENGAGEMENT_CACHE_MAX_ENTRIES)
+
+def _as_date(value):
+    """接受date或YYYY-MM-DD字符串（工具调用时传入的是字符串）。"""
+    if value is None or isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+def _bucket_starts(granularity, start, end):
+    """start到end（都包含）之间每个桶的起点，连续不缺桶。"""
+    if granularity == 'hour':
+        current, step = datetime.combine(start, datetime.min.time()), timedelta(hours=1)
+        end = datetime.combine(end, datetime.max.time())
+    elif granularity == 'week':
+        current, step = start - timedelta(days=start.weekday()), timedelta(weeks=1)
+    else:
+        current, step = start, timedelta(days=1)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        current += step
+    return buckets
+
+class EngagementService:
+    """学习参与度时间序列服务。
+
+    按小时、天或周把学习活动分桶，返回补齐空桶后的等长数组，可直接用于图表。
+    天和周从按天汇总表读取（尚未汇总的记录从原始表补齐）；小时和星期×小时
+    热力图只能从原始记录按date_trunc/date_part分组，时间范围受ENGAGEMENT_MAX_BUCKETS限制。
+    结果缓存ENGAGEMENT_CACHE_TTL秒，图表轮询时不会反复查询数据库。
+    """
+
+    @staticmethod
+    def _check_range(granularity, start_date, end_date):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity必须是{', '.join(GRANULARITIES)}之一")
+        if start_date > end_date:
+            raise ValueError("开始日期不能晚于结束日期")
+        buckets = _bucket_starts(granularity, start_date, end_date)
+        if len(buckets) > Config.ENGAGEMENT_MAX_BUCKETS:
+            raise ValueError(f"时间范围过大，最多{Config.ENGAGEMENT_MAX_BUCKETS}个时间桶")
+        return buckets
+
+    @staticmethod
+    def _raw_condition(start_date, end_date, course_id, student_id):
+        activity = LearningActivity
+        condition = ((activity.timestamp >= start_date) &
+                     (activity.timestamp < end_date + timedelta(days=1)))
+        if course_id:
+            condition &= activity.course == course_id
+        if student_id:
+            condition &= activity.student == student_id
+        return condition
+
+    @register_as_tool(roles=["student", "teacher"])
+    @staticmethod
+    def get_engagement_timeseries(granularity='day', start_date=None, end_date=None, course_id=None, student_id=None):
+        """获取按小时、天或周分桶的学习活动时间序列，可按课程和/或学生筛选。
+
+        Args:
+            granularity (str): 分桶粒度，hour、day或week（从起始日期所在周的周一开始）
+            start_date (date, optional): 开始日期（包含），默认为结束日期前29天
+            end_date (date, optional): 结束日期（包含），默认为今天
+            course_id (int, optional): 课程ID
+            student_id (int, optional): 学生用户ID
+
+        Returns:
+            dict: 包含granularity、buckets（每个桶的起始时间，ISO格式）以及与之等长的
+                  activity_counts、durations（秒）和active_students（活跃学生数）数组的字典
+
+        Raises:
+            ValueError: 如果粒度不合法或时间桶过多
+        """
+        end_date = _as_date(end_date) or date.today()
+        start_date = _as_date(start_date) or end_date - timedelta(days=29)
+        buckets = EngagementService._check_range(granularity, start_date, end_date)
+
+        def load():
+            if granularity == 'hour':
+                activity = LearningActivity
+                bucket = fn.date_trunc('hour', activity.timestamp)
+                rows = (activity
+                        .select(bucket, fn.COUNT(activity.id), fn.COALESCE(fn.SUM(activity.duration), 0),
+                                fn.COUNT(activity.student.distinct()))
+                        .where(EngagementService._raw_condition(start_date, end_date, course_id, student_id))
+                        .group_by(bucket)
+                        .tuples())
+                totals = {started: (count, duration, students) for started, count, duration, students in rows}
+            else:
+                # 按桶和学生分组，才能统计每个桶的活跃学生数
+                rows = ActivityRollupService.summarize([granularity, 'student_id'], buckets[0],
+                                                       student_id=student_id, course_id=course_id, end_date=end_date)
+                totals = {}
+                for started, _, count, duration, _ in rows:
+                    previous = totals.get(started, (0, 0, 0))
+                    totals[started] = (previous[0] + count, previous[1] + duration, previous[2] + 1)
+
+            empty = (0, 0, 0)
+            return {
+                'granularity': granularity,
+                'buckets': [started.isoformat() for started in buckets],
+                'activity_counts': [totals.get(started, empty)[0] for started in buckets],
+                'durations': [int(totals.get(started, empty)[1]) for started in buckets],
+                'active_students': [totals.get(started, empty)[2] for started in buckets]
+            }
+
+        key = ('timeseries', granularity, start_date, end_date, course_id, student_id)
+        return _cache.get_or_load(key, load)
+
+    @register_as_tool(roles=["student", "teacher"])
+    @staticmethod
+    def get_activity_heatmap(start_date=None, end_date=None, course_id=None, student_id=None):
+        """获取星期×小时的学习活动热力图。
+
+        Args:
+            start_date (date, optional): 开始日期（包含），默认为结束日期前27天
+            end_date (date, optional): 结束日期（包含），默认为今天
+            course_id (int, optional): 课程ID
+            student_id (int, optional): 学生用户ID
+
+        Returns:
+            dict: 包含activity_counts和durations（秒）的字典，均为7×24的二维数组，
+                  行为星期一到星期日，列为0-23时
+
+        Raises:
+            ValueError: 如果时间范围过大
+        """
+        end_date = _as_date(end_date) or date.today()
+        start_date = _as_date(start_date) or end_date - timedelta(days=27)
+        EngagementService._check_range('hour', start_date, end_date)
+
+        def load():
+            activity = LearningActivity
+            weekday = fn.date_part('isodow', activity.timestamp)
+            hour = fn.date_part('hour', activity.timestamp)
+            rows = (activity
+                    .select(weekday, hour, fn.COUNT(activity.id), fn.COALESCE(fn.SUM(activity.duration), 0))
+                    .where(EngagementService._raw_condition(start_date, end_date, course_id, student_id))
+                    .group_by(weekday, hour)
+                    .tuples())
+            counts = [[0] * 24 for _ in range(7)]
+            durations = [[0] * 24 for _ in range(7)]
+            for day, hour_of_day, count, duration in rows:
+                counts[int(day) - 1][int(hour_of_day)] = count
+                durations[int(day) - 1][int(hour_of_day)] = int(duration)
+            return {'activity_counts': counts, 'durations': durations}
+
+        return _cache.get_or_load(('heatmap', start_date, end_date, course_id, student_id), load)
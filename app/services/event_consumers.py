@@ -0,0 +1,57 @@
+from app.models.learning_data import AssignmentKnowledgePoint
+from app.services.analytics_service import AnalyticsService
+from app.services.event_service import event_consumer, ASSIGNMENT_SUBMITTED, ASSIGNMENT_GRADED
+from app.services.item_statistics_service import ItemStatisticsService
+from app.services.risk_service import RiskService
+
+# 单次评分对知识点掌握度的最大影响
+GRADE_LEARNING_RATE = 0.2
+
+# 内置的学习事件消费者，导入本模块即完成注册（见scripts.run_event_consumers）
+
+@event_consumer('grade_mastery', event_types=[ASSIGNMENT_GRADED])
+def apply_grade_mastery(events):
+    """按评分调整作业关联知识点的掌握度。
+
+    首次评分的变化为 学习率 × 知识点权重 × (2 × 得分率 − 1)；重新评分只计入新旧分数之差，
+    同一份作业多次评分不会重复累加。
+    """
+    assignment_ids = {event.payload['assignment_id'] for event in events}
+    weights = {}
+    for assignment_id, knowledge_point_id, weight in (AssignmentKnowledgePoint
+                                                      .select(AssignmentKnowledgePoint.assignment_id,
+                                                              AssignmentKnowledgePoint.knowledge_point_id,
+                                                              AssignmentKnowledgePoint.weight)
+                                                      .where(AssignmentKnowledgePoint.assignment_id.in_(assignment_ids))
+                                                      .tuples()):
+        weights.setdefault(assignment_id, []).append((knowledge_point_id, weight))
+
+    updates = []
+    for event in events:
+        payload = event.payload
+        total_points = payload.get('total_points') or 100.0
+        previous_score = payload.get('previous_score')
+        if previous_score is None:
+            change = 2 * payload['score'] / total_points - 1
+        else:
+            change = 2 * (payload['score'] - previous_score) / total_points
+        for knowledge_point_id, weight in weights.get(payload['assignment_id'], []):
+            updates.append((event.student_id, knowledge_point_id, GRADE_LEARNING_RATE * weight * change))
+    AnalyticsService.bulk_update_mastery(updates)
+
+@event_consumer('risk_rescore', event_types=[ASSIGNMENT_SUBMITTED, ASSIGNMENT_GRADED])
+def rescore_risk(events):
+    """有新提交或评分的课程重新计算学习风险评分，风险排名在两次全量评分之间也保持更新。
+
+    学习活动事件过于频繁，每条都重新评分整门课程代价太高，活动特征的变化由定时的全量评分反映。
+    EventService.run按名称顺序运行消费者，grade_mastery先于本消费者更新掌握度。
+    """
+    course_ids = sorted({event.course_id for event in events if event.course_id})
+    if course_ids:
+        RiskService.score_courses(course_ids)
+
+@event_consumer('item_statistics', event_types=[ASSIGNMENT_GRADED])
+def refresh_item_statistics(events):
+    """有新评分的课程重新计算作业和知识点的难度与区分度。"""
+    for course_id in sorted({event.course_id for event in events if event.course_id}):
+        ItemStatisticsService.refresh(course_id)
@@ -0,0 +1,235 @@
+from datetime import datetime, timedelta
+from peewee import fn, SQL
+from app.config import Config
+from app.ext import db
+from app.models.learning_data import LearningEvent, EventConsumerOffset
+from app.utils.logging import logger
+
+ACTIVITY_RECORDED = 'activity_recorded'
+ASSIGNMENT_SUBMITTED = 'assignment_submitted'
+ASSIGNMENT_GRADED = 'assignment_graded'
+
+INSERT_CHUNK_SIZE = 1000
+
+# 消费者名称到(处理函数, 关注的事件类型)的注册表
+_consumers = {}
+
+def event_consumer(name, event_types=None):
+    """注册事件消费者的装饰器。
+
+    处理函数接收一批LearningEvent（按ID升序），在持有游标行锁的事务内执行：
+    函数抛出异常时整批回滚、游标不前进，下次从同一位置重试。
+
+    Args:
+        name (str): 消费者名称，对应event_consumer_offsets中的一行
+        event_types (list, optional): 只处理这些类型的事件，默认处理全部
+    """
+    def decorator(handler):
+        _consumers[name] = (handler, tuple(event_types) if event_types else None)
+        return handler
+    return decorator
+
+class EventService:
+    """学习事件日志服务。
+
+    学习活动、作业提交和评分在写入业务表的同一事务中追加到learning_events表。
+    每个消费者在event_consumer_offsets中有自己的游标（已处理的最大事件ID），
+    按批增量处理新事件，可以查看积压（lag）或把游标移回任意位置重放。
+    消费者由scripts.run_event_consumers在本地运行，不依赖外部消息队列。
+    """
+
+    @staticmethod
+    def publish(event_type, student_id, course_id=None, payload=None):
+        """发布一个事件，应在写入业务数据的同一事务中调用。
+
+        Args:
+            event_type (str): 事件类型
+            student_id (int): 学生用户ID
+            course_id (int, optional): 课程ID
+            payload (dict, optional): 事件内容
+        """
+        EventService.publish_many([{'event_type': event_type, 'student_id': student_id,
+                                    'course_id': course_id, 'payload': payload}])
+
+    @staticmethod
+    def publish_many(events):
+        """批量发布事件。
+
+        Args:
+            events (list): 字典列表，每项包含event_type、student_id，可选course_id、payload
+        """
+        now = datetime.now()
+        rows = [{
+            'event_type': event['event_type'],
+            'student_id': event['student_id'],
+            'course_id': event.get('course_id'),
+            'payload': event.get('payload'),
+            # 用数据库时钟，消费者的安全延迟与发布进程的时钟无关
+            'occurred_at': SQL('clock_timestamp()'),
+            'created_at': now,
+            'updated_at': now
+        } for event in events]
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            LearningEvent.insert_many(rows[start:start + INSERT_CHUNK_SIZE]).execute()
+
+    @staticmethod
+    def consumers():
+        """已注册的消费者名称列表。"""
+        return sorted(_consumers)
+
+    @staticmethod
+    def _lock_offset(name):
+        EventConsumerOffset.insert(name=name, last_id=0).on_conflict_ignore().execute()
+        return (EventConsumerOffset.select()
+                .where(EventConsumerOffset.name == name)
+                .for_update()
+                .get())
+
+    @staticmethod
+    def _pending(offset_id, event_types):
+        query = LearningEvent.select().where(LearningEvent.id > offset_id)
+        if event_types:
+            query = query.where(LearningEvent.event_type.in_(event_types))
+        return query
+
+    @staticmethod
+    def consume(name, batch_size=None, lag_seconds=None):
+        """让消费者处理下一批事件。
+
+        发布时间（数据库时钟）不足lag_seconds的事件留到下次处理，避免跳过ID较小但尚未提交的事务。
+
+        Args:
+            name (str): 消费者名称
+            batch_size (int, optional): 每批最多处理的事件数，默认Config.EVENT_CONSUMER_BATCH_SIZE
+            lag_seconds (int, optional): 安全延迟秒数，默认Config.EVENT_SAFETY_LAG_SECONDS
+
+        Returns:
+            int: 本批处理的事件数，0表示已追上
+
+        Raises:
+            KeyError: 如果消费者未注册
+        """
+        handler, event_types = _consumers[name]
+        batch_size = batch_size or Config.EVENT_CONSUMER_BATCH_SIZE
+        lag_seconds = Config.EVENT_SAFETY_LAG_SECONDS if lag_seconds is None else lag_seconds
+        cutoff = SQL('clock_timestamp() - make_interval(secs => %s)', (lag_seconds,))
+
+        with db.atomic():
+            offset = EventService._lock_offset(name)
+            events = list(EventService._pending(offset.last_id, event_types)
+                          .where(LearningEvent.occurred_at <= cutoff)
+                          .order_by(LearningEvent.id)
+                          .limit(batch_size))
+            first_recent = (EventService._pending(offset.last_id, event_types)
+                            .select(fn.MIN(LearningEvent.id))
+                            .where(LearningEvent.occurred_at > cutoff)
+                            .scalar())
+            if first_recent is not None:
+                events = [event for event in events if event.id < first_recent]
+            if not events:
+                return 0
+
+            handler(events)
+            offset.last_id = events[-1].id
+            offset.processed += len(events)
+            offset.save()
+        return len(events)
+
+    @staticmethod
+    def run(names=None, batch_size=None, lag_seconds=None):
+        """让消费者处理完所有积压事件，可由定时任务反复调用。
+
+        一个消费者出错只记录日志，不影响其他消费者。
+
+        Args:
+            names (list, optional): 消费者名称，默认全部已注册的消费者
+            batch_size (int, optional): 每批事件数
+            lag_seconds (int, optional): 安全延迟秒数
+
+        Returns:
+            dict: 消费者名称到本次处理事件数的字典
+        """
+        results = {}
+        for name in names or EventService.consumers():
+            results[name] = 0
+            try:
+                while True:
+                    count = EventService.consume(name, batch_size, lag_seconds)
+                    if not count:
+                        break
+                    results[name] += count
+            except Exception as e:
+                logger.error(f"Event consumer {name} failed after {results[name]} events: {e}")
+        return results
+
+    @staticmethod
+    def lag(names=None):
+        """查看消费者的积压情况。
+
+        Args:
+            names (list, optional): 消费者名称，默认全部已注册的消费者
+
+        Returns:
+            dict: 消费者名称到字典的映射，包含offset（游标）、head（最新事件ID）、pending（待处理事件数）、
+                  lag_seconds（最早待处理事件距今秒数）、processed（累计处理数）和updated_at
+        """
+        head = LearningEvent.select(fn.MAX(LearningEvent.id)).scalar() or 0
+        names = list(names or EventService.consumers())
+        offsets = {row.name: row for row in
+                   EventConsumerOffset.select().where(EventConsumerOffset.name.in_(names))}
+        # 发布时间用的是数据库时钟
+        now = db.execute_sql('SELECT LOCALTIMESTAMP').fetchone()[0]
+        results = {}
+        for name in names:
+            offset = offsets.get(name)
+            last_id = offset.last_id if offset else 0
+            pending, oldest = (EventService._pending(last_id, _consumers.get(name, (None, None))[1])
+                               .select(fn.COUNT(LearningEvent.id), fn.MIN(LearningEvent.occurred_at))
+                               .tuples()
+                               .get())
+            results[name] = {
+                'offset': last_id,
+                'head': head,
+                'pending': pending,
+                'lag_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+                'processed': offset.processed if offset else 0,
+                'updated_at': offset.updated_at if offset else None
+            }
+        return results
+
+    @staticmethod
+    def replay(name, offset=0):
+        """把消费者的游标移到offset，之后ID大于offset的事件会重新处理。
+
+        重放会重复执行处理函数的副作用，只对幂等的消费者安全。
+
+        Args:
+            name (str): 消费者名称
+            offset (int): 新的游标位置，0表示从头重放
+        """
+        with db.atomic():
+            row = EventService._lock_offset(name)
+            row.last_id = offset
+            row.save()
+
+    @staticmethod
+    def prune(retention_days=None):
+        """删除早于保留天数、且所有消费者（包括已注册但尚未运行的）都已处理过的事件。
+
+        Args:
+            retention_days (int, optional): 保留天数，默认Config.EVENT_RETENTION_DAYS
+
+        Returns:
+            int: 删除的事件数
+        """
+        retention_days = Config.EVENT_RETENTION_DAYS if retention_days is None else retention_days
+        offsets = dict(EventConsumerOffset.select(EventConsumerOffset.name, EventConsumerOffset.last_id).tuples())
+        # 已注册但还没有运行过的消费者没有游标行，视为一个事件都没处理
+        consumed = min([*offsets.values(), *(0 for name in _consumers if name not in offsets)], default=0)
+        if not consumed:
+            return 0
+        cutoff = datetime.now() - timedelta(days=retention_days)
+        return (LearningEvent
+                .delete()
+                .where((LearningEvent.id <= consumed) & (LearningEvent.occurred_at < cutoff))
+                .execute())
@@ -0,0 +1,196 @@
+import csv
+import importlib.util
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+from app.ext import db
+from app.models.learning_data import LearningActivity, StudentKnowledgePoint, KnowledgePoint
+from app.models.assignment import StudentAssignment, Assignment
+
+EXPORT_CHUNK_SIZE = 10000
+
+# 每个数据集的列：(列名, 类型)，类型用于生成Parquet schema
+DATASET_COLUMNS = {
+    'activities': [
+        ('id', 'int'), ('student_id', 'int'), ('course_id', 'int'), ('knowledge_point_id', 'int'),
+        ('activity_type', 'str'), ('duration', 'int'), ('timestamp', 'datetime'), ('metadata', 'json'),
+    ],
+    'mastery': [
+        ('student_id', 'int'), ('knowledge_point_id', 'int'), ('knowledge_point_name', 'str'),
+        ('mastery_level', 'float'), ('last_interaction', 'datetime'), ('updated_at', 'datetime'),
+    ],
+    'assignments': [
+        ('student_id', 'int'), ('assignment_id', 'int'), ('assignment_title', 'str'),
+        ('score', 'float'), ('total_points', 'float'), ('submitted_at', 'datetime'),
+        ('attempts', 'int'), ('completed', 'bool'),
+    ],
+}
+
+def _date_range(field, start_date, end_date):
+    """起止日期（都包含在内）对应的时间字段条件列表。"""
+    conditions = []
+    if start_date:
+        conditions.append(field >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        conditions.append(field < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+class ExportService:
+    """课程数据导出服务。
+
+    用服务器端游标按块读取课程的学习活动、知识点掌握度和作业提交记录，
+    以CSV流或分块写入的Parquet文件输出，内存占用与导出行数无关。
+    """
+
+    @staticmethod
+    def build_query(dataset, course_id, start_date=None, end_date=None):
+        """构建数据集的导出查询，列顺序与DATASET_COLUMNS一致。
+
+        Args:
+            dataset (str): 数据集名称，activities、mastery或assignments
+            course_id (int): 课程ID
+            start_date (date, optional): 开始日期（包含）
+            end_date (date, optional): 结束日期（包含）
+
+        Returns:
+            Query: 返回元组的查询
+
+        Raises:
+            ValueError: 如果数据集名称不存在
+        """
+        if dataset == 'activities':
+            query = (LearningActivity
+                     .select(LearningActivity.id, LearningActivity.student_id, LearningActivity.course_id,
+                             LearningActivity.knowledge_point_id, LearningActivity.activity_type,
+                             LearningActivity.duration, LearningActivity.timestamp, LearningActivity.metadata)
+                     .where(LearningActivity.course_id == course_id,
+                            *_date_range(LearningActivity.timestamp, start_date, end_date))
+                     .order_by(LearningActivity.timestamp, LearningActivity.id))
+        elif dataset == 'mastery':
+            query = (StudentKnowledgePoint
+                     .select(StudentKnowledgePoint.student_id, StudentKnowledgePoint.knowledge_point_id,
+                             KnowledgePoint.name, StudentKnowledgePoint.mastery_level,
+                             StudentKnowledgePoint.last_interaction, StudentKnowledgePoint.updated_at)
+                     .join(KnowledgePoint)
+                     .where(KnowledgePoint.course_id == course_id,
+                            *_date_range(StudentKnowledgePoint.updated_at, start_date, end_date))
+                     .order_by(StudentKnowledgePoint.student_id, StudentKnowledgePoint.knowledge_point_id))
+        elif dataset == 'assignments':
+            query = (StudentAssignment
+                     .select(StudentAssignment.student_id, StudentAssignment.assignment_id, Assignment.title,
+                             StudentAssignment.score, Assignment.total_points, StudentAssignment.submitted_at,
+                             StudentAssignment.attempts, StudentAssignment.completed)
+                     .join(Assignment)
+                     .where(Assignment.course_id == course_id,
+                            *_date_range(StudentAssignment.submitted_at, start_date, end_date))
+                     .order_by(StudentAssignment.assignment_id, StudentAssignment.student_id))
+        else:
+            raise ValueError(f"未知的导出数据集: {dataset}")
+        return query.tuples()
+
+    @staticmethod
+    def iter_rows(dataset, course_id, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """用服务器端游标逐行读取导出数据，JSON列序列化为字符串。
+
+        Args:
+            dataset (str): 数据集名称
+            course_id (int): 课程ID
+            start_date (date, optional): 开始日期（包含）
+            end_date (date, optional): 结束日期（包含）
+            chunk_size (int): 每次从数据库读取的行数
+
+        Yields:
+            tuple: 一行数据
+        """
+        query = ExportService.build_query(dataset, course_id, start_date, end_date)
+        json_columns = [i for i, (_, kind) in enumerate(DATASET_COLUMNS[dataset]) if kind == 'json']
+        # peewee的连接处于autocommit模式，psycopg2的命名游标不可用，直接用DECLARE声明服务端游标；
+        # 游标只在事务内有效，结果按块FETCH，不会在客户端缓冲整个结果集
+        name = f'export_{uuid.uuid4().hex}'
+        sql, params = query.sql()
+        with db.atomic():
+            db.execute_sql(f'DECLARE {name} NO SCROLL CURSOR FOR {sql}', params)
+            while True:
+                rows = db.execute_sql(f'FETCH FORWARD {int(chunk_size)} FROM {name}').fetchall()
+                if not rows:
+                    break
+                for row in rows:
+                    if json_columns:
+                        row = list(row)
+                        for i in json_columns:
+                            if row[i] is not None:
+                                row[i] = json.dumps(row[i], ensure_ascii=False)
+                    yield row
+            db.execute_sql(f'CLOSE {name}')
+
+    @staticmethod
+    def stream_csv(dataset, course_id, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """以CSV文本块的形式流式输出数据集，第一块为表头。
+
+        Yields:
+            str: CSV文本块
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([name for name, _ in DATASET_COLUMNS[dataset]])
+        for count, row in enumerate(ExportService.iter_rows(dataset, course_id, start_date, end_date, chunk_size), 1):
+            writer.writerow(row)
+            if count % 1000 == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def parquet_supported():
+        """是否安装了导出Parquet所需的pyarrow。"""
+        return importlib.util.find_spec('pyarrow') is not None
+
+    @staticmethod
+    def write_parquet(dataset, course_id, path, start_date=None, end_date=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """把数据集按块写入Parquet文件，每块成为一个row group。
+
+        Args:
+            dataset (str): 数据集名称
+            course_id (int): 课程ID
+            path (str or file): 输出文件路径或二进制文件对象
+            start_date (date, optional): 开始日期（包含）
+            end_date (date, optional): 结束日期（包含）
+            chunk_size (int): 每个row group的行数
+
+        Returns:
+            int: 写入的行数
+
+        Raises:
+            RuntimeError: 如果没有安装pyarrow
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("导出Parquet需要安装pyarrow")
+
+        types = {'int': pa.int64(), 'float': pa.float64(), 'str': pa.string(), 'json': pa.string(),
+                 'bool': pa.bool_(), 'datetime': pa.timestamp('us')}
+        columns = DATASET_COLUMNS[dataset]
+        schema = pa.schema([(name, types[kind]) for name, kind in columns])
+
+        def write(writer, rows):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=schema.field(i).type) for i, values in enumerate(zip(*rows))],
+                schema=schema))
+
+        total = 0
+        with pq.ParquetWriter(path, schema) as writer:
+            chunk = []
+            for row in ExportService.iter_rows(dataset, course_id, start_date, end_date, chunk_size):
+                chunk.append(row)
+                if len(chunk) >= chunk_size:
+                    write(writer, chunk)
+                    total += len(chunk)
+                    chunk = []
+            if chunk:
+                write(writer, chunk)
+                total += len(chunk)
+        return total
@@ -0,0 +1,29 @@
+import math
+import numpy as np
+from app.config import Config
+
+SECONDS_PER_DAY = 86400.0
+
+def half_life_days(levels):
+    """掌握度对应的遗忘半衰期（天），掌握越好遗忘越慢。"""
+    return Config.MASTERY_HALF_LIFE_DAYS * (1.0 + np.clip(levels, 0.0, 1.0))
+
+def review_interval_factor():
+    """从上次学习到保持率降到REVIEW_TARGET_RETENTION所经过的半衰期数。"""
+    return math.log2(1.0 / Config.REVIEW_TARGET_RETENTION)
+
+def effective_mastery(levels, elapsed_days):
+    """按指数遗忘曲线计算当前的有效掌握度。
+
+    有效掌握度 = 掌握度 × 2^(-经过天数 / 半衰期)，经过时间未知（NaN）时不衰减。
+
+    Args:
+        levels (np.ndarray or float): 记录的掌握度
+        elapsed_days (np.ndarray or float): 距上次学习的天数
+
+    Returns:
+        np.ndarray: 有效掌握度，形状与输入广播后一致
+    """
+    levels = np.asarray(levels, dtype=np.float64)
+    elapsed = np.nan_to_num(np.maximum(np.asarray(elapsed_days, dtype=np.float64), 0.0), nan=0.0)
+    return levels * np.exp2(-elapsed / half_life_days(levels))
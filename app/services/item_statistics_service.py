@@ -0,0 +1,272 @@
+from datetime import datetime
+import numpy as np
+from app.config import Config
+from app.ext import db
+from app.models.learning_data import KnowledgePoint, AssignmentKnowledgePoint, ItemStatistic
+from app.models.assignment import StudentAssignment, Assignment
+from app.react.tools_register import register_as_tool
+
+ASSIGNMENT = 'assignment'
+KNOWLEDGE_POINT = 'knowledge_point'
+
+def _column_statistics(values, rest, min_students):
+    """按列计算得分率的人数、均值、样本方差和与其余得分率的相关系数。
+
+    Args:
+        values (ndarray): 学生×题目的得分率矩阵，缺失为NaN
+        rest (ndarray): 同形状的矩阵，每个学生在其余题目上的得分率，缺失为NaN
+        min_students (int): 计算区分度所需的最少学生数
+
+    Returns:
+        tuple: (人数, 均值, 方差, 区分度)四个数组，无法计算的位置为NaN
+    """
+    observed = ~np.isnan(values)
+    count = observed.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(observed, values, 0.0).sum(axis=0) / count
+        deviation = np.where(observed, values - mean, 0.0)
+        variance = np.where(count > 1, (deviation ** 2).sum(axis=0) / (count - 1), np.nan)
+
+        # 只用两个得分率都有的学生计算皮尔逊相关系数
+        paired = observed & ~np.isnan(rest)
+        paired_count = paired.sum(axis=0)
+        x = np.where(paired, values, 0.0)
+        y = np.where(paired, rest, 0.0)
+        dx = np.where(paired, x - x.sum(axis=0) / paired_count, 0.0)
+        dy = np.where(paired, y - y.sum(axis=0) / paired_count, 0.0)
+        discrimination = (dx * dy).sum(axis=0) / np.sqrt((dx ** 2).sum(axis=0) * (dy ** 2).sum(axis=0))
+    discrimination = np.where(paired_count >= max(min_students, 3), discrimination, np.nan)
+    return count, mean, variance, discrimination
+
+def compute_item_statistics(scores, weights, min_students=5):
+    """根据得分率矩阵计算作业和知识点的统计量。
+
+    知识点得分率为学生在关联作业上得分率按关联权重的加权平均；区分度为得分率与
+    该学生在其余（不关联该知识点的）作业上平均得分率的相关系数。
+
+    Args:
+        scores (ndarray): 学生×作业的得分率矩阵（0-1），未评分为NaN
+        weights (ndarray): 作业×知识点的关联权重矩阵，不关联为0
+        min_students (int): 计算区分度所需的最少学生数
+
+    Returns:
+        tuple: (作业统计, 知识点统计)，各为_column_statistics返回的四个数组
+    """
+    observed = ~np.isnan(scores)
+    filled = np.where(observed, scores, 0.0)
+    total = filled.sum(axis=1, keepdims=True)
+    count = observed.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rest = np.where(count - observed > 0, (total - filled) / (count - observed), np.nan)
+        assignment_stats = _column_statistics(scores, rest, min_students)
+
+        linked = (weights > 0).astype(float)
+        weight_sum = observed @ weights
+        point_scores = np.where(weight_sum > 0, (filled @ weights) / weight_sum, np.nan)
+        other_count = observed @ (1.0 - linked)
+        point_rest = np.where(other_count > 0, (filled @ (1.0 - linked)) / other_count, np.nan)
+    return assignment_stats, _column_statistics(point_scores, point_rest, min_students)
+
+class ItemStatisticsService:
+    """作业和知识点的题目统计服务。
+
+    按课程一次读取全部评分记录，构造学生×作业的得分率矩阵，用矩阵运算算出每份作业
+    和每个知识点（通过AssignmentKnowledgePoint的权重）的难度、得分方差和区分度，
+    写入item_statistics表。统计由定时任务或评分事件消费者刷新，学习建议和agent工具直接读取。
+    """
+
+    @staticmethod
+    def compute_course(course_id, min_students=None):
+        """计算一门课程的作业和知识点统计。
+
+        Args:
+            course_id (int): 课程ID
+            min_students (int, optional): 计算区分度所需的最少学生数，默认Config.ITEM_STATISTICS_MIN_STUDENTS
+
+        Returns:
+            list: ItemStatistic行字典列表
+        """
+        min_students = min_students or Config.ITEM_STATISTICS_MIN_STUDENTS
+        rows = list(StudentAssignment
+                    .select(StudentAssignment.student_id, StudentAssignment.assignment_id,
+                            StudentAssignment.score, Assignment.total_points)
+                    .join(Assignment)
+                    .where((Assignment.course_id == course_id) & StudentAssignment.score.is_null(False))
+                    .tuples())
+        if not rows:
+            return []
+        data = np.array(rows, dtype=float)
+        students, student_index = np.unique(data[:, 0], return_inverse=True)
+        assignment_ids, assignment_index = np.unique(data[:, 1], return_inverse=True)
+        totals = np.where(data[:, 3] > 0, data[:, 3], 100.0)
+        scores = np.full((len(students), len(assignment_ids)), np.nan)
+        scores[student_index, assignment_index] = np.clip(data[:, 2] / totals, 0.0, 1.0)
+
+        links = list(AssignmentKnowledgePoint
+                     .select(AssignmentKnowledgePoint.assignment_id, AssignmentKnowledgePoint.knowledge_point_id,
+                             AssignmentKnowledgePoint.weight)
+                     .join(KnowledgePoint)
+                     .where(AssignmentKnowledgePoint.assignment_id.in_(assignment_ids.astype(int).tolist()) &
+                            (KnowledgePoint.course_id == course_id))
+                     .tuples())
+        point_ids = np.unique([point_id for _, point_id, _ in links]).astype(int)
+        weights = np.zeros((len(assignment_ids), len(point_ids)))
+        if links:
+            link_data = np.array(links, dtype=float)
+            weights[np.searchsorted(assignment_ids, link_data[:, 0]),
+                    np.searchsorted(point_ids, link_data[:, 1])] = link_data[:, 2]
+
+        assignment_stats, point_stats = compute_item_statistics(scores, weights, min_students)
+        computed_at = datetime.now()
+        result = []
+        for scope, ids, (count, mean, variance, discrimination) in (
+                (ASSIGNMENT, assignment_ids, assignment_stats), (KNOWLEDGE_POINT, point_ids, point_stats)):
+            for i, scope_id in enumerate(ids):
+                if not count[i]:
+                    continue
+                result.append({
+                    'scope': scope,
+                    'scope_id': int(scope_id),
+                    'course': course_id,
+                    'student_count': int(count[i]),
+                    'mean_score': float(mean[i]),
+                    'difficulty': float(1.0 - mean[i]),
+                    'variance': None if np.isnan(variance[i]) else float(variance[i]),
+                    'discrimination': None if np.isnan(discrimination[i]) else float(discrimination[i]),
+                    'computed_at': computed_at
+                })
+        return result
+
+    @staticmethod
+    def refresh(course_id=None):
+        """重新计算并替换课程的统计，不指定课程时刷新所有有作业的课程。
+
+        Args:
+            course_id (int, optional): 课程ID
+
+        Returns:
+            int: 写入的统计行数
+        """
+        if course_id:
+            course_ids = [course_id]
+        else:
+            course_ids = [cid for (cid,) in
+                          Assignment.select(Assignment.course_id).distinct().order_by(Assignment.course_id).tuples()]
+        written = 0
+        for cid in course_ids:
+            rows = ItemStatisticsService.compute_course(cid)
+            with db.atomic():
+                ItemStatistic.delete().where(ItemStatistic.course_id == cid).execute()
+                if rows:
+                    ItemStatistic.insert_many(rows).execute()
+            written += len(rows)
+        return written
+
+    @staticmethod
+    def _as_dict(row, name):
+        return {
+            'id': row.scope_id,
+            'name': name,
+            'student_count': row.student_count,
+            'mean_score': row.mean_score,
+            'difficulty': row.difficulty,
+            'variance': row.variance,
+            'discrimination': row.discrimination,
+            'computed_at': row.computed_at
+        }
+
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    def get_knowledge_point_statistics(course_id):
+        """获取课程各知识点的难度、得分方差和区分度，数据来自定期计算的统计表，按难度从高到低排列。
+
+        Args:
+            course_id (int): 课程ID
+
+        Returns:
+            list: 字典列表，每项包含id、name、student_count、mean_score（平均得分率）、
+                  difficulty（1-平均得分率）、variance、discrimination（-1到1，越大越能区分学生水平）和computed_at
+        """
+        query = (ItemStatistic
+                 .select(ItemStatistic, KnowledgePoint.name)
+                 .join(KnowledgePoint, on=(ItemStatistic.scope_id == KnowledgePoint.id))
+                 .where((ItemStatistic.course_id == course_id) & (ItemStatistic.scope == KNOWLEDGE_POINT))
+                 .order_by(ItemStatistic.difficulty.desc())
+                 .objects())
+        return [ItemStatisticsService._as_dict(row, row.name) for row in query]
+
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    def get_assignment_statistics(course_id):
+        """获取课程各作业的难度、得分方差和区分度，数据来自定期计算的统计表，按难度从高到低排列。
+
+        Args:
+            course_id (int): 课程ID
+
+        Returns:
+            list: 字典列表，字段同get_knowledge_point_statistics，name为作业标题
+        """
+        query = (ItemStatistic
+                 .select(ItemStatistic, Assignment.title)
+                 .join(Assignment, on=(ItemStatistic.scope_id == Assignment.id))
+                 .where((ItemStatistic.course_id == course_id) & (ItemStatistic.scope == ASSIGNMENT))
+                 .order_by(ItemStatistic.difficulty.desc())
+                 .objects())
+        return [ItemStatisticsService._as_dict(row, row.title) for row in query]
+
+    @register_as_tool(roles=["student", "teacher"])
+    @staticmethod
+    def get_student_weak_points(student_id, course_id, limit=5):
+        """推荐学生需要加强的知识点：学生在关联作业上的得分率低于全班平均的知识点。
+
+        只读取该学生自己的评分，与预先计算的全班统计比较；差距相同时区分度高的知识点优先。
+
+        Args:
+            student_id (int): 学生用户ID
+            course_id (int): 课程ID
+            limit (int): 返回的知识点数量
+
+        Returns:
+            list: 按差距从大到小排列的字典列表，每项包含id、name、score（学生得分率）、
+                  mean_score（全班平均得分率）、gap、difficulty和discrimination
+        """
+        scores = {}
+        for score, total_points, point_id, weight in (StudentAssignment
+                                                      .select(StudentAssignment.score, Assignment.total_points,
+                                                              AssignmentKnowledgePoint.knowledge_point_id,
+                                                              AssignmentKnowledgePoint.weight)
+                                                      .join(Assignment)
+                                                      .join(AssignmentKnowledgePoint,
+                                                            on=(AssignmentKnowledgePoint.assignment == Assignment.id))
+                                                      .where((StudentAssignment.student_id == student_id) &
+                                                             (Assignment.course_id == course_id) &
+                                                             StudentAssignment.score.is_null(False))
+                                                      .tuples()):
+            if weight > 0:
+                weighted, weights = scores.get(point_id, (0.0, 0.0))
+                ratio = min(1.0, max(0.0, score / (total_points or 100.0)))
+                scores[point_id] = (weighted + weight * ratio, weights + weight)
+        if not scores:
+            return []
+
+        query = (ItemStatistic
+                 .select(ItemStatistic, KnowledgePoint.name)
+                 .join(KnowledgePoint, on=(ItemStatistic.scope_id == KnowledgePoint.id))
+                 .where((ItemStatistic.scope == KNOWLEDGE_POINT) & ItemStatistic.scope_id.in_(list(scores)))
+                 .objects())
+        weak = []
+        for row in query:
+            weighted, weights = scores[row.scope_id]
+            score = weighted / weights
+            if score < row.mean_score:
+                weak.append({
+                    'id': row.scope_id,
+                    'name': row.name,
+                    'score': score,
+                    'mean_score': row.mean_score,
+                    'gap': row.mean_score - score,
+                    'difficulty': row.difficulty,
+                    'discrimination': row.discrimination
+                })
+        weak.sort(key=lambda point: (-round(point['gap'], 6), -(point['discrimination'] or 0.0)))
+        return weak[:limit]
@@ -1,5 +1,5 @@
 from app.models.knowledge_base import KnowledgeBase
-from app.ext import knowledge_base_collection
+from app.ext import get_knowledge_base_collection
 import uuid
 
 class KnowledgeBaseService:
@@ -38,7 +38,7 @@ class KnowledgeBaseService:
         knowledge.save()
         
         # 添加到向量数据库
-        knowledge_base_collection.add(
+        get_knowledge_base_collection().add(
             ids=[vector_id],
             documents=[content],
             metadatas=[{
@@ -65,7 +65,7 @@ class KnowledgeBaseService:
             list: 匹配结果列表
         """
         # 使用ChromaDB搜索
-        search_results = knowledge_base_collection.query(
+        search_results = get_knowledge_base_collection().query(
             query_texts=[query],
             n_results=limit
         )
@@ -115,7 +115,7 @@ class KnowledgeBaseService:
             
         # 从向量数据库中删除
         try:
-            knowledge_base_collection.delete(ids=[knowledge.vector_id])
+            get_knowledge_base_collection().delete(ids=[knowledge.vector_id])
         except:
             pass  # 即使向量删除失败也继续删除数据库记录
             
@@ -162,12 +162,12 @@ class KnowledgeBaseService:
             if knowledge.vector_id:
                 try:
                     # 删除旧向量
-                    knowledge_base_collection.delete(ids=[knowledge.vector_id])
+                    get_knowledge_base_collection().delete(ids=[knowledge.vector_id])
                 except:
                     pass
                     
                 # 添加新向量
-                knowledge_base_collection.add(
+                get_knowledge_base_collection().add(
                     ids=[knowledge.vector_id],
                     documents=[knowledge.content],
                     metadatas=[{
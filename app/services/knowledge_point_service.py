@@ -6,6 +6,7 @@ from app.models.learning_data import (
 from app.models.course import Course
 from app.models.assignment import Assignment
 from app.models.knowledge_base import KnowledgeBase
+from app.services.mastery_engine import MasteryEngine
 from typing import List, Dict, Optional
 from peewee import DoesNotExist
 
@@ -47,6 +48,7 @@ class KnowledgePointService:
                 course=course,
                 parent=parent
             )
+            MasteryEngine.invalidate(course_id)
             
             return knowledge_point
         
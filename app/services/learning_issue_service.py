@@ -0,0 +1,204 @@
+from datetime import datetime, timedelta
+from app.ext import db
+from app.models.learning_data import StudentKnowledgePoint, KnowledgePoint, LearningIssue
+from app.models.assignment import StudentAssignment, Assignment
+from app.models.course import StudentCourse
+from app.services.activity_rollup_service import ActivityRollupService
+from app.react.tools_register import register_as_tool
+
+INSERT_CHUNK_SIZE = 1000
+
+def build_issues(low_mastery_points, overdue_assignments, inactive, inactive_days=7):
+    """根据低掌握度知识点、过期作业和是否不活跃生成问题列表。"""
+    issues = []
+    if low_mastery_points:
+        issues.append({
+            'type': 'low_mastery',
+            'message': f'发现{len(low_mastery_points)}个掌握度较低的知识点',
+            'details': low_mastery_points
+        })
+    if overdue_assignments:
+        issues.append({
+            'type': 'overdue_assignments',
+            'message': f'发现{len(overdue_assignments)}个已过期未提交的作业',
+            'details': overdue_assignments
+        })
+    if inactive:
+        issues.append({
+            'type': 'inactive',
+            'message': f'过去{inactive_days}天内无学习活动记录',
+            'details': None
+        })
+    return issues
+
+class LearningIssueService:
+    """学习问题批量检测服务。
+
+    用少量集合查询一次检测整门课程（或所有课程）全部学生的低掌握度、
+    过期作业和不活跃问题，结果写入issues快照表，仪表盘直接读取快照。
+    """
+
+    @staticmethod
+    def detect_issues(course_id=None, threshold=0.5, inactive_days=7, student_ids=None):
+        """批量检测学习问题。
+
+        Args:
+            course_id (int, optional): 课程ID，不指定时检测所有课程并生成跨课程汇总
+            threshold (float): 掌握度阈值，低于此值视为问题
+            inactive_days (int): 多少天内无学习活动视为不活跃
+            student_ids (list, optional): 只检测这些学生
+
+        Returns:
+            dict: 以(学生ID, 课程ID)为键、问题列表为值的字典；课程ID为None的键是跨课程汇总
+        """
+        now = datetime.now()
+
+        enrollments = StudentCourse.select(StudentCourse.student_id, StudentCourse.course_id).where(
+            StudentCourse.is_active == True)
+        low_mastery = (StudentKnowledgePoint
+                       .select(StudentKnowledgePoint.student_id, KnowledgePoint.course_id, KnowledgePoint.id,
+                               KnowledgePoint.name, StudentKnowledgePoint.mastery_level)
+                       .join(KnowledgePoint)
+                       .where(StudentKnowledgePoint.mastery_level < threshold)
+                       .order_by(StudentKnowledgePoint.mastery_level))
+        overdue = (StudentAssignment
+                   .select(StudentAssignment.student_id, Assignment.course_id, Assignment.id,
+                           Assignment.title, Assignment.due_date)
+                   .join(Assignment)
+                   .where((StudentAssignment.completed == False) & (Assignment.due_date < now))
+                   .order_by(Assignment.due_date))
+        if course_id:
+            enrollments = enrollments.where(StudentCourse.course_id == course_id)
+            low_mastery = low_mastery.where(KnowledgePoint.course_id == course_id)
+            overdue = overdue.where(Assignment.course_id == course_id)
+        if student_ids is not None:
+            student_ids = list(student_ids)
+            enrollments = enrollments.where(StudentCourse.student_id.in_(student_ids))
+            low_mastery = low_mastery.where(StudentKnowledgePoint.student_id.in_(student_ids))
+            overdue = overdue.where(StudentAssignment.student_id.in_(student_ids))
+
+        pairs = set(enrollments.tuples())
+        findings = {pair: ([], []) for pair in pairs}
+        for student_id, kp_course_id, point_id, name, level in low_mastery.tuples():
+            if (student_id, kp_course_id) in findings:
+                findings[(student_id, kp_course_id)][0].append({'id': point_id, 'name': name, 'level': level})
+        for student_id, assignment_course_id, assignment_id, title, due_date in overdue.tuples():
+            if (student_id, assignment_course_id) in findings:
+                findings[(student_id, assignment_course_id)][1].append(
+                    {'id': assignment_id, 'title': title, 'due_date': str(due_date)})
+
+        start_date = (now - timedelta(days=inactive_days)).date()
+        active = {(student_id, active_course_id) for student_id, active_course_id, *_ in
+                  ActivityRollupService.summarize(['student_id', 'course_id'], start_date,
+                                                  student_id=student_ids, course_id=course_id)}
+
+        results = {}
+        for (student_id, pair_course_id), (points, assignments) in findings.items():
+            results[(student_id, pair_course_id)] = build_issues(
+                points, assignments, (student_id, pair_course_id) not in active, inactive_days)
+
+        if not course_id:
+            # 跨课程汇总：合并各课程的问题，所有课程都无活动才算不活跃
+            active_students = {student_id for student_id, _ in active}
+            merged = {}
+            for (student_id, _), (points, assignments) in findings.items():
+                entry = merged.setdefault(student_id, ([], []))
+                entry[0].extend(points)
+                entry[1].extend(assignments)
+            for student_id, (points, assignments) in merged.items():
+                results[(student_id, None)] = build_issues(
+                    points, assignments, student_id not in active_students, inactive_days)
+
+        return results
+
+    @staticmethod
+    def refresh_snapshot(course_id=None, threshold=0.5, inactive_days=7):
+        """重新检测并替换issues快照，由定时任务调用。
+
+        只刷新一门课程时，该课程学生的跨课程汇总（仪表盘读取）也一并重新计算。
+
+        Args:
+            course_id (int, optional): 只刷新该课程的快照，不指定时刷新全部（包括跨课程汇总）
+            threshold (float): 掌握度阈值
+            inactive_days (int): 不活跃天数
+
+        Returns:
+            int: 写入的问题数量
+        """
+        detected_at = datetime.now()
+        results = LearningIssueService.detect_issues(course_id, threshold, inactive_days)
+        students = set()
+        if course_id:
+            # 课程内的学生，以及快照中仍有该课程问题的（已退课）学生
+            students = {student_id for student_id, _ in results} | {
+                student_id for (student_id,) in LearningIssue
+                .select(LearningIssue.student_id).distinct()
+                .where(LearningIssue.course_id == course_id).tuples()}
+            if students:
+                summaries = LearningIssueService.detect_issues(None, threshold, inactive_days, student_ids=students)
+                results.update({key: issues for key, issues in summaries.items() if key[1] is None})
+        rows = [{
+            'student': student_id,
+            'course': issue_course_id,
+            'issue_type': issue['type'],
+            'message': issue['message'],
+            'details': issue['details'],
+            'detected_at': detected_at
+        } for (student_id, issue_course_id), issues in results.items() for issue in issues]
+
+        with db.atomic():
+            delete = LearningIssue.delete()
+            if course_id:
+                delete = delete.where((LearningIssue.course_id == course_id) | (
+                    LearningIssue.course_id.is_null() & LearningIssue.student_id.in_(list(students))))
+            delete.execute()
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                LearningIssue.insert_many(rows[start:start + INSERT_CHUNK_SIZE]).execute()
+        return len(rows)
+
+    @staticmethod
+    def get_learning_issues(student_id, course_id=None):
+        """从快照读取学生的学习问题。
+
+        Args:
+            student_id (int): 学生用户ID
+            course_id (int, optional): 课程ID，不指定时返回跨课程汇总
+
+        Returns:
+            dict: 包含has_issues、issues问题列表和detected_at检测时间的字典
+        """
+        query = LearningIssue.select().where(LearningIssue.student_id == student_id)
+        if course_id:
+            query = query.where(LearningIssue.course_id == course_id)
+        else:
+            query = query.where(LearningIssue.course_id.is_null())
+
+        rows = list(query.order_by(LearningIssue.id))
+        return {
+            'has_issues': len(rows) > 0,
+            'issues': [{'type': row.issue_type, 'message': row.message, 'details': row.details} for row in rows],
+            'detected_at': max((row.detected_at for row in rows), default=None)
+        }
+
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    def get_course_learning_issues(course_id):
+        """获取课程内所有学生的学习问题（低掌握度、过期作业、不活跃），数据来自定期刷新的快照。
+
+        Args:
+            course_id (int): 课程ID
+
+        Returns:
+            dict: 以学生ID为键、问题列表为值的字典，每个问题包含type、message和details
+        """
+        students = {}
+        query = (LearningIssue
+                 .select(LearningIssue.student_id, LearningIssue.issue_type,
+                         LearningIssue.message, LearningIssue.details)
+                 .where(LearningIssue.course_id == course_id)
+                 .order_by(LearningIssue.student_id, LearningIssue.id)
+                 .tuples())
+        for student_id, issue_type, message, details in query:
+            students.setdefault(student_id, []).append(
+                {'type': issue_type, 'message': message, 'details': details})
+        return students
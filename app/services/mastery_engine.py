@@ -0,0 +1,312 @@
+import threading
+import time
+import warnings
+import numpy as np
+from peewee import JOIN
+from app.config import Config
+from app.models.learning_data import StudentKnowledgePoint, KnowledgePoint
+from app.services.forgetting_curve import effective_mastery, SECONDS_PER_DAY
+from app.utils.cache import TTLCache
+
+_cache = TTLCache(ttl=Config.MASTERY_CACHE_TTL, max_entries=Config.MASTERY_CACHE_MAX_COURSES)
+_kp_course = {}
+_kp_course_lock = threading.Lock()
+
+class MasteryMatrix:
+    """课程的学生×知识点掌握度矩阵。
+
+    values为float32稠密矩阵，行对应student_ids，列对应kp_ids，
+    没有掌握度记录的位置为NaN，所有统计都会忽略这些位置。
+    last_seen为同形状的上次学习时间（Unix时间戳），未知时为NaN。
+    数组创建后不再原地修改，set_levels替换为更新后的副本。
+    """
+
+    def __init__(self, course_id, student_ids, kp_ids, kp_names, values, kp_parents=None, last_seen=None):
+        self.course_id = course_id
+        self.student_ids = student_ids
+        self.kp_ids = kp_ids
+        self.kp_names = kp_names
+        self.kp_parents = kp_parents or {}
+        self.values = values
+        self.last_seen = last_seen if last_seen is not None else np.full(values.shape, np.nan)
+        self.student_index = {int(student_id): row for row, student_id in enumerate(student_ids)}
+        self.kp_index = {int(kp_id): column for column, kp_id in enumerate(kp_ids)}
+        self._lock = threading.Lock()
+        self._ancestors = None
+        self._rollup = None
+
+    @classmethod
+    def load(cls, course_id):
+        """用一条查询加载课程的掌握度矩阵。
+
+        Args:
+            course_id (int): 课程ID
+
+        Returns:
+            MasteryMatrix: 掌握度矩阵
+        """
+        # 从知识点左连接掌握度记录，没有任何记录的知识点也会成为一列
+        rows = list(KnowledgePoint
+                    .select(KnowledgePoint.id, KnowledgePoint.name, KnowledgePoint.parent_id,
+                            StudentKnowledgePoint.student_id, StudentKnowledgePoint.mastery_level,
+                            StudentKnowledgePoint.last_interaction)
+                    .join(StudentKnowledgePoint, JOIN.LEFT_OUTER)
+                    .where(KnowledgePoint.course_id == course_id)
+                    .tuples())
+
+        kp_names = {kp_id: name for kp_id, name, _, _, _, _ in rows}
+        kp_parents = {kp_id: parent_id for kp_id, _, parent_id, _, _, _ in rows}
+        kp_ids = np.array(sorted(kp_names), dtype=np.int64)
+        observed = [(kp_id, student_id, level, seen.timestamp() if seen else np.nan)
+                    for kp_id, _, _, student_id, level, seen in rows if student_id is not None]
+        if observed:
+            kp_column, student_column, levels, seen = (np.array(column) for column in zip(*observed))
+            student_ids, student_rows = np.unique(student_column.astype(np.int64), return_inverse=True)
+            kp_columns = np.searchsorted(kp_ids, kp_column.astype(np.int64))
+        else:
+            student_ids = np.array([], dtype=np.int64)
+        values = np.full((len(student_ids), len(kp_ids)), np.nan, dtype=np.float32)
+        last_seen = np.full(values.shape, np.nan)
+        if observed:
+            values[student_rows, kp_columns] = levels.astype(np.float32)
+            last_seen[student_rows, kp_columns] = seen.astype(np.float64)
+
+        with _kp_course_lock:
+            _kp_course.update((int(kp_id), course_id) for kp_id in kp_ids)
+        return cls(course_id, student_ids, kp_ids, kp_names, values, kp_parents, last_seen)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def observed(self):
+        """有掌握度记录的位置。"""
+        return ~np.isnan(self.values)
+
+    def kp_means(self):
+        """每个知识点的平均掌握度，没有记录的知识点为NaN。"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmean(self.values, axis=0)
+
+    def student_means(self):
+        """每个学生的平均掌握度。"""
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanmean(self.values, axis=1)
+
+    def kp_percentiles(self, q):
+        """每个知识点掌握度的百分位数。
+
+        Args:
+            q (float or list): 百分位，0-100
+
+        Returns:
+            np.ndarray: q为数值时形状为(知识点数,)，为列表时为(len(q), 知识点数)
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return np.nanpercentile(self.values, q, axis=0).astype(np.float32)
+
+    def at_risk_mask(self, threshold=0.5):
+        """掌握度低于阈值的位置，没有记录的位置为False。"""
+        with np.errstate(invalid='ignore'):
+            return self.values < threshold
+
+    def at_risk_students(self, threshold=0.5, min_count=1):
+        """至少有min_count个知识点掌握度低于阈值的学生。
+
+        Returns:
+            dict: 学生ID到低掌握度知识点ID列表的字典
+        """
+        mask = self.at_risk_mask(threshold)
+        rows = np.flatnonzero(mask.sum(axis=1) >= min_count)
+        return {int(self.student_ids[row]): self.kp_ids[mask[row]].tolist() for row in rows}
+
+    def filled(self):
+        """用知识点平均值填补缺失位置后的矩阵，知识点没有任何记录时填0。"""
+        values = self.values
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means = np.nan_to_num(np.nanmean(values, axis=0), nan=0.0)
+        return np.where(np.isnan(values), means[np.newaxis, :], values).astype(np.float32)
+
+    def similarity(self):
+        """学生之间的余弦相似度矩阵（先减去各知识点平均值）。"""
+        centered = self.filled() - np.nan_to_num(self.kp_means(), nan=0.0)[np.newaxis, :]
+        norms = np.linalg.norm(centered, axis=1, keepdims=True)
+        normalized = centered / np.where(norms == 0, 1, norms)
+        return normalized @ normalized.T
+
+    def similar_students(self, student_id, k=5):
+        """与某个学生掌握情况最相似的k个学生。
+
+        Returns:
+            list: (学生ID, 相似度)元组列表，按相似度从高到低
+        """
+        row = self.student_index.get(student_id)
+        if row is None:
+            return []
+        centered = self.filled() - np.nan_to_num(self.kp_means(), nan=0.0)[np.newaxis, :]
+        norms = np.linalg.norm(centered, axis=1)
+        scores = centered @ centered[row] / np.where(norms == 0, 1, norms) / (norms[row] or 1)
+        scores[row] = -np.inf
+        best = np.argsort(-scores)[:k]
+        return [(int(self.student_ids[i]), float(scores[i])) for i in best if np.isfinite(scores[i])]
+
+    def effective(self, now=None):
+        """按遗忘曲线衰减后的掌握度矩阵，读取时计算，没有记录的位置为NaN。
+
+        Args:
+            now (float, optional): 计算时刻的Unix时间戳，默认当前时间
+        """
+        now = time.time() if now is None else now
+        # set_levels同时替换两个数组，在锁内取引用保证二者对应
+        with self._lock:
+            values, last_seen = self.values, self.last_seen
+        elapsed_days = (now - last_seen) / SECONDS_PER_DAY
+        return effective_mastery(values, elapsed_days).astype(np.float32)
+
+    def ancestor_matrix(self):
+        """知识点树的祖先矩阵A，A[i, j]为1表示知识点j是i本身或i的祖先。"""
+        if self._ancestors is None:
+            ancestors = np.zeros((len(self.kp_ids), len(self.kp_ids)), dtype=np.float32)
+            for column, kp_id in enumerate(self.kp_ids.tolist()):
+                node, seen = kp_id, set()
+                # 父节点不在本课程或出现环时停止
+                while node in self.kp_index and node not in seen:
+                    seen.add(node)
+                    ancestors[column, self.kp_index[node]] = 1.0
+                    node = self.kp_parents.get(node)
+            self._ancestors = ancestors
+        return self._ancestors
+
+    def _rollup_sums(self):
+        if self._rollup is None:
+            ancestors = self.ancestor_matrix()
+            sums = np.nan_to_num(self.values, nan=0.0) @ ancestors
+            weights = self.observed.astype(np.float32) @ ancestors
+            self._rollup = (sums, weights)
+        return self._rollup
+
+    def rollup(self):
+        """每个学生在每个知识点子树上的汇总掌握度。
+
+        节点的汇总掌握度是其子树（包括自身）中所有有记录知识点掌握度的平均值，
+        每个有记录的知识点权重相同，子树内没有记录时为NaN。
+
+        Returns:
+            np.ndarray: 形状为(学生数, 知识点数)的矩阵
+        """
+        with self._lock:
+            sums, weights = self._rollup_sums()
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(weights > 0, sums / weights, np.nan).astype(np.float32)
+
+    def set_levels(self, changes, seen_at=None):
+        """用新的掌握度更新矩阵，已计算的子树汇总按祖先增量更新。
+
+        更新在数组副本上进行，完成后替换引用，不加锁读取矩阵的调用方不会看到更新到一半的数据。
+
+        Args:
+            changes (list): (学生ID, 知识点ID, 新掌握度)元组列表
+            seen_at (float, optional): 这些知识点上次学习时间的Unix时间戳
+
+        Returns:
+            bool: 有不在矩阵中的学生或知识点时返回False，调用方应使缓存失效
+        """
+        with self._lock:
+            positions = []
+            for student_id, kp_id, level in changes:
+                row, column = self.student_index.get(student_id), self.kp_index.get(kp_id)
+                if row is None or column is None:
+                    return False
+                positions.append((row, column, level))
+            values = self.values.copy()
+            last_seen = self.last_seen.copy() if seen_at is not None else self.last_seen
+            rollup = tuple(array.copy() for array in self._rollup) if self._rollup is not None else None
+            for row, column, level in positions:
+                old = values[row, column]
+                if rollup is not None:
+                    sums, weights = rollup
+                    ancestors = self.ancestor_matrix()[column]
+                    sums[row] += (level - (0.0 if np.isnan(old) else old)) * ancestors
+                    if np.isnan(old):
+                        weights[row] += ancestors
+                values[row, column] = level
+                if seen_at is not None:
+                    last_seen[row, column] = seen_at
+            self.values, self.last_seen, self._rollup = values, last_seen, rollup
+            return True
+
+    def student_row(self, student_id):
+        """某个学生的掌握度字典，知识点ID到掌握度，不包含没有记录的知识点。"""
+        row = self.student_index.get(student_id)
+        if row is None:
+            return {}
+        values = self.values[row]
+        columns = np.flatnonzero(~np.isnan(values))
+        return {int(self.kp_ids[column]): float(values[column]) for column in columns}
+
+
+class MasteryEngine:
+    """掌握度矩阵引擎，按课程缓存MasteryMatrix，掌握度更新时就地更新缓存的矩阵。
+
+    缓存在进程内，其他进程中bulk_update_mastery的更新通过cache_invalidation的通知立即失效，
+    其余变化最多在MASTERY_CACHE_TTL秒后可见。
+    """
+
+    @staticmethod
+    def get_matrix(course_id):
+        """获取课程的掌握度矩阵，优先使用缓存。
+
+        Args:
+            course_id (int): 课程ID
+
+        Returns:
+            MasteryMatrix: 掌握度矩阵，调用方不应修改
+        """
+        return _cache.get_or_load(course_id, lambda: MasteryMatrix.load(course_id))
+
+    @staticmethod
+    def invalidate(course_id=None):
+        """使课程的缓存失效，不指定课程时清空全部缓存。"""
+        if course_id is None:
+            _cache.clear()
+        else:
+            _cache.invalidate(course_id)
+
+    @staticmethod
+    def invalidate_knowledge_points(knowledge_point_ids):
+        """使包含这些知识点的课程的缓存失效，用于其他进程更新了掌握度时。"""
+        with _kp_course_lock:
+            course_ids = {_kp_course.get(kp_id) for kp_id in knowledge_point_ids}
+        # 未加载过的知识点不在任何缓存的矩阵中，只需让正在进行的加载作废
+        if None in course_ids:
+            course_ids.discard(None)
+            _cache.discard_loads()
+        for course_id in course_ids:
+            _cache.invalidate(course_id)
+
+    @staticmethod
+    def apply_levels(rows, seen_at=None):
+        """把数据库中已更新的掌握度同步到缓存的矩阵，不重新加载整门课程。
+
+        Args:
+            rows (iterable): (学生ID, 知识点ID, 新掌握度)元组
+            seen_at (datetime, optional): 这些记录的上次学习时间
+        """
+        seen_at = seen_at.timestamp() if seen_at else None
+        by_course = {}
+        with _kp_course_lock:
+            for student_id, kp_id, level in rows:
+                by_course.setdefault(_kp_course.get(kp_id), []).append((student_id, kp_id, level))
+
+        # 未加载过的知识点不在任何缓存的矩阵中，只需让正在进行的加载作废
+        if by_course.pop(None, None):
+            _cache.discard_loads()
+        for course_id, changes in by_course.items():
+            matrix = _cache.get(course_id)
+            if matrix is None or not matrix.set_levels(changes, seen_at):
+                _cache.invalidate(course_id)
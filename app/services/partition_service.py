@@ -0,0 +1,224 @@
+import gzip
+import os
+import re
+from datetime import date
+from app.ext import db
+from app.models.learning_data import LearningActivity
+from app.utils.logging import logger
+
+TABLE = LearningActivity._meta.table_name
+SEQUENCE = f'{TABLE}_id_seq'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_PATTERN = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+def create_table_sql():
+    """根据LearningActivity模型生成分区父表的建表语句。
+
+    与模型的建表语句相同，只是ID改用独立序列，主键加上分区键timestamp（分区表的主键必须包含分区键）。
+    """
+    query, _ = LearningActivity._schema._create_table(safe=True).query()
+    serial_id = '"id" SERIAL NOT NULL PRIMARY KEY'
+    if serial_id not in query:
+        raise ValueError(f"Unexpected {TABLE} DDL: {query}")
+    query = query.replace(serial_id, f'"id" INTEGER NOT NULL DEFAULT nextval(\'{SEQUENCE}\')')
+    return query[:-1] + ', PRIMARY KEY ("id", "timestamp")) PARTITION BY RANGE ("timestamp")'
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month):
+    return f'{TABLE}_p{month.year:04d}_{month.month:02d}'
+
+class PartitionService:
+    """学习活动表分区管理服务。
+
+    learningactivity按timestamp按月范围分区，另有一个default分区兜底，
+    避免超出已建分区范围的记录写入失败。索引定义在LearningActivity模型上，
+    在分区父表上创建后会自动应用到每个分区。
+    """
+
+    @staticmethod
+    def is_partitioned():
+        """判断学习活动表是否已经是分区表。
+
+        Returns:
+            bool: 是分区表返回True，表不存在或为普通表返回False
+        """
+        cursor = db.execute_sql(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", (TABLE,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def create_activity_table(months_ahead=3):
+        """创建分区的学习活动表、索引、default分区以及当前月起的月分区。
+
+        Args:
+            months_ahead (int): 预先创建的未来月份数
+            
+        Raises:
+            ValueError: 如果已存在未分区的学习活动表
+        """
+        if LearningActivity.table_exists() and not PartitionService.is_partitioned():
+            raise ValueError(f"{TABLE}已存在且未分区，请先运行 python -m scripts.partition_activities --migrate")
+        with db.atomic():
+            db.execute_sql("SELECT pg_advisory_xact_lock(hashtext(%s))", (TABLE,))
+            db.execute_sql(f'CREATE SEQUENCE IF NOT EXISTS "{SEQUENCE}"')
+            db.execute_sql(create_table_sql())
+            db.execute_sql(f'ALTER SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}"."id"')
+            LearningActivity._schema.create_indexes(safe=True)
+            db.execute_sql(f'CREATE TABLE IF NOT EXISTS "{DEFAULT_PARTITION}" PARTITION OF "{TABLE}" DEFAULT')
+        PartitionService.ensure_partitions(months_ahead=months_ahead)
+
+    @staticmethod
+    def list_partitions():
+        """获取已有的月分区。
+
+        Returns:
+            dict: 月份第一天到分区表名的字典，按月份排序
+        """
+        cursor = db.execute_sql(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)", (TABLE,))
+        partitions = {}
+        for (name,) in cursor.fetchall():
+            match = PARTITION_PATTERN.match(name)
+            if match:
+                partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+        return dict(sorted(partitions.items()))
+
+    @staticmethod
+    def create_partition(month):
+        """创建某个月的分区；default分区中属于该月的记录会被移入新分区。
+
+        用事务级advisory锁串行化，多个定时任务或部署同时运行时，后到的一方看到分区已存在直接返回。
+        移动记录期间锁住学习活动表，并发写入会等待到分区创建完成。
+
+        Args:
+            month (date): 月份内任意一天
+
+        Returns:
+            str: 分区表名
+        """
+        month = month_start(month)
+        name = partition_name(month)
+        lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+        with db.atomic():
+            db.execute_sql("SELECT pg_advisory_xact_lock(hashtext(%s))", (TABLE,))
+            if month in PartitionService.list_partitions():
+                return name
+            # 移动记录到ATTACH之间不允许再写入default分区，否则ATTACH检查default分区时会失败。
+            # 锁住父表（同时锁住各分区）而不只是default分区：只锁default分区时，等待的写入已经路由到
+            # default分区，ATTACH之后会违反其分区约束；等待父表锁的写入在提交后重新路由到新分区。
+            # 该锁与SELECT兼容，分区通常提前数月创建，default分区中没有该月记录，持有时间很短
+            db.execute_sql(f'LOCK TABLE "{TABLE}" IN SHARE ROW EXCLUSIVE MODE')
+            # 先建独立表再ATTACH，这样default分区里已有的该月记录可以先移过去
+            db.execute_sql(f'CREATE TABLE IF NOT EXISTS "{name}" (LIKE "{TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+            db.execute_sql(
+                f'WITH moved AS (DELETE FROM "{DEFAULT_PARTITION}" '
+                f'WHERE "timestamp" >= %s AND "timestamp" < %s RETURNING *) '
+                f'INSERT INTO "{name}" SELECT * FROM moved', (lower, upper))
+            db.execute_sql(
+                f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)', (lower, upper))
+        logger.info(f"Created partition {name}")
+        return name
+
+    @staticmethod
+    def ensure_partitions(months_ahead=3, start=None):
+        """确保从start所在月到当前月之后months_ahead个月的分区都存在，可由定时任务每天运行。
+
+        Args:
+            months_ahead (int): 预先创建的未来月份数
+            start (date, optional): 起始月份，默认当前月
+
+        Returns:
+            list: 新创建的分区表名列表
+        """
+        existing = PartitionService.list_partitions()
+        month = month_start(start or date.today())
+        last = add_months(month_start(date.today()), months_ahead)
+        created = []
+        while month <= last:
+            if month not in existing:
+                created.append(PartitionService.create_partition(month))
+            month = add_months(month, 1)
+        return created
+
+    @staticmethod
+    def archive_partition(name, archive_directory):
+        """把一个分区的数据以gzip压缩的CSV导出到归档目录。
+
+        Args:
+            name (str): 分区表名
+            archive_directory (str): 归档目录
+
+        Returns:
+            str: 归档文件路径
+        """
+        os.makedirs(archive_directory, exist_ok=True)
+        path = os.path.join(archive_directory, f'{name}.csv.gz')
+        with gzip.open(path, 'wt', encoding='utf-8') as file:
+            db.cursor().copy_expert(f'COPY "{name}" TO STDOUT WITH CSV HEADER', file)
+        return path
+
+    @staticmethod
+    def apply_retention(keep_months, archive_directory=None):
+        """删除早于保留期的月分区，分离并删除整个分区，不需要逐行DELETE。
+
+        按天汇总表daily_activity_rollup不受影响，历史统计仍可查询，
+        但删除后的月份无法再通过重建汇总恢复。
+
+        Args:
+            keep_months (int): 保留的月份数（包括当前月）
+            archive_directory (str, optional): 删除前先归档到该目录
+
+        Returns:
+            list: 被删除的分区表名列表
+        """
+        cutoff = add_months(month_start(date.today()), 1 - keep_months)
+        dropped = []
+        for month, name in PartitionService.list_partitions().items():
+            if month >= cutoff:
+                break
+            if archive_directory:
+                path = PartitionService.archive_partition(name, archive_directory)
+                logger.info(f"Archived partition {name} to {path}")
+            with db.atomic():
+                db.execute_sql(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+                db.execute_sql(f'DROP TABLE "{name}"')
+            logger.info(f"Dropped partition {name}")
+            dropped.append(name)
+        return dropped
+
+    @staticmethod
+    def migrate_existing_table(months_ahead=3):
+        """把已有的普通学习活动表转换为分区表，保留所有记录和ID序列。
+
+        在一个事务内完成，期间学习活动表被锁定，适合在维护窗口运行一次。
+        """
+        if PartitionService.is_partitioned():
+            return
+        legacy = f'{TABLE}_unpartitioned'
+        index_names = [index._name for index in LearningActivity._meta.fields_to_index()]
+        with db.atomic():
+            db.execute_sql(f'ALTER TABLE "{TABLE}" RENAME TO "{legacy}"')
+            db.execute_sql(f'ALTER TABLE "{legacy}" RENAME CONSTRAINT "{TABLE}_pkey" TO "{legacy}_pkey"')
+            for index_name in index_names:
+                db.execute_sql(f'DROP INDEX IF EXISTS "{index_name}"')
+            # 旧表删除时不能连带删除ID序列
+            db.execute_sql(f'ALTER SEQUENCE IF EXISTS "{SEQUENCE}" OWNED BY NONE')
+
+            bounds = db.execute_sql(f'SELECT MIN("timestamp"), MAX("timestamp") FROM "{legacy}"').fetchone()
+            PartitionService.create_activity_table(months_ahead=months_ahead)
+            if bounds[0] is not None:
+                PartitionService.ensure_partitions(months_ahead=months_ahead, start=bounds[0].date())
+            # 旧表可能缺少后来新增的列（如inserted_at），只复制两边都有的列
+            legacy_columns = {column.name for column in db.get_columns(legacy)}
+            columns = ', '.join(f'"{field.column_name}"' for field in LearningActivity._meta.sorted_fields
+                                if field.column_name in legacy_columns)
+            db.execute_sql(f'INSERT INTO "{TABLE}" ({columns}) SELECT {columns} FROM "{legacy}"')
+            db.execute_sql(f'DROP TABLE "{legacy}"')
+        logger.info(f"Converted {TABLE} to a partitioned table")
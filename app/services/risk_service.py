@@ -0,0 +1,292 @@
+import json
+import multiprocessing
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from peewee import fn, Case
+from app.config import Config
+from app.ext import db, initialize_extensions
+from app.models.course import Course, StudentCourse
+from app.models.learning_data import StudentKnowledgePoint, KnowledgePoint, RiskScore
+from app.models.assignment import StudentAssignment, Assignment
+from app.models.user import User
+from app.services.activity_rollup_service import ActivityRollupService
+from app.react.tools_register import register_as_tool
+
+INSERT_CHUNK_SIZE = 1000
+ACTIVITY_WINDOW_DAYS = 30
+RECENT_WINDOW_DAYS = 7
+LOW_MASTERY_THRESHOLD = 0.5
+# 没有掌握度或评分记录时使用的中性特征值
+MISSING_VALUE = 0.5
+
+# 特征都缩放到0-1，越大风险越高
+FEATURES = (
+    'mastery_gap',          # 1 - 平均掌握度
+    'low_mastery_ratio',    # 掌握度低于0.5的知识点比例
+    'inactivity',           # 距最近一次学习活动的天数 / 30，30天内无活动为1
+    'activity_drop',        # 最近7天活动量比前30天的周均水平下降的比例
+    'overdue_ratio',        # 已截止作业中未完成的比例
+    'score_gap',            # 1 - 已评分作业的平均得分率
+)
+
+# 默认模型：没有训练好的参数文件（RISK_MODEL_PATH）时使用的先验权重
+DEFAULT_MODEL = {
+    'intercept': -3.0,
+    'weights': {
+        'mastery_gap': 2.0,
+        'low_mastery_ratio': 1.0,
+        'inactivity': 2.0,
+        'activity_drop': 0.5,
+        'overdue_ratio': 2.0,
+        'score_gap': 1.5,
+    }
+}
+
+def load_model(path=None):
+    """读取逻辑回归参数，返回(截距, 与FEATURES顺序一致的权重向量)。
+
+    参数文件为JSON：{"intercept": float, "weights": {特征名: 权重}}，缺少的特征权重为0。
+    """
+    path = path or Config.RISK_MODEL_PATH
+    model = DEFAULT_MODEL
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            model = json.load(f)
+    weights = np.array([float(model['weights'].get(name, 0.0)) for name in FEATURES])
+    return float(model['intercept']), weights
+
+def predict(features, intercept, weights):
+    """逻辑回归：对特征矩阵的每一行计算风险概率。"""
+    return 1.0 / (1.0 + np.exp(-(features @ weights + intercept)))
+
+def rank_within_courses(course_ids, scores):
+    """计算每一行在所在课程中的风险排名，分数最高的为1。"""
+    course_ids = np.asarray(course_ids)
+    scores = np.asarray(scores)
+    order = np.lexsort((-scores, course_ids))
+    sorted_courses = course_ids[order]
+    group_starts = np.flatnonzero(np.r_[True, sorted_courses[1:] != sorted_courses[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, len(order)])
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - np.repeat(group_starts, group_sizes) + 1
+    return ranks
+
+def _init_worker():
+    """进程池的初始化函数：子进程建立自己的数据库连接。"""
+    initialize_extensions()
+
+def _score_chunk(course_ids):
+    """进程池中执行的任务：给一批课程评分。"""
+    return RiskService.score_courses(course_ids)
+
+class RiskService:
+    """学习风险预警评分服务。
+
+    按课程批量提取每个选课学生的特征（来自活动汇总表、掌握度和作业提交），
+    用NumPy上的逻辑回归一次算出全部风险概率，再按课程排名写入risk_scores表。
+    评分由定时任务（scripts.score_risk）运行，课程多时可以按课程分批用多进程并行；
+    教师仪表盘只读取预先算好的排名。
+    """
+
+    @staticmethod
+    def extract_features(course_ids, now=None):
+        """批量提取一批课程中所有在读学生的特征。
+
+        Args:
+            course_ids (list): 课程ID列表
+            now (datetime, optional): 评分时间，默认为当前时间
+
+        Returns:
+            tuple: (学生ID数组, 课程ID数组, 特征矩阵)，特征矩阵的列与FEATURES一致
+        """
+        now = now or datetime.now()
+        course_ids = list(course_ids)
+        pairs = list(StudentCourse
+                     .select(StudentCourse.student_id, StudentCourse.course_id)
+                     .where((StudentCourse.is_active == True) & StudentCourse.course_id.in_(course_ids))
+                     .order_by(StudentCourse.course_id, StudentCourse.student_id)
+                     .tuples())
+        index = {pair: row for row, pair in enumerate(pairs)}
+        n = len(pairs)
+        mastery = np.full(n, 1.0 - MISSING_VALUE)
+        low_mastery_ratio = np.zeros(n)
+        days_since_active = np.full(n, float(ACTIVITY_WINDOW_DAYS))
+        count_window = np.zeros(n)
+        count_recent = np.zeros(n)
+        due = np.zeros(n)
+        overdue = np.zeros(n)
+        score_ratio = np.full(n, 1.0 - MISSING_VALUE)
+
+        mastery_rows = (StudentKnowledgePoint
+                        .select(StudentKnowledgePoint.student_id, KnowledgePoint.course_id,
+                                fn.AVG(StudentKnowledgePoint.mastery_level),
+                                fn.AVG(Case(None, [(StudentKnowledgePoint.mastery_level < LOW_MASTERY_THRESHOLD, 1.0)],
+                                            0.0)))
+                        .join(KnowledgePoint)
+                        .where(KnowledgePoint.course_id.in_(course_ids))
+                        .group_by(StudentKnowledgePoint.student_id, KnowledgePoint.course_id)
+                        .tuples())
+        for student_id, course_id, average, low_ratio in mastery_rows:
+            row = index.get((student_id, course_id))
+            if row is not None:
+                mastery[row] = average
+                low_mastery_ratio[row] = low_ratio
+
+        today = now.date()
+        window_start = today - timedelta(days=ACTIVITY_WINDOW_DAYS - 1)
+        for student_id, course_id, count, _, last_day in ActivityRollupService.summarize(
+                ['student_id', 'course_id'], window_start, course_id=course_ids, end_date=today):
+            row = index.get((student_id, course_id))
+            if row is not None:
+                count_window[row] = count
+                days_since_active[row] = (today - last_day).days
+        for student_id, course_id, count, _, _ in ActivityRollupService.summarize(
+                ['student_id', 'course_id'], today - timedelta(days=RECENT_WINDOW_DAYS - 1),
+                course_id=course_ids, end_date=today):
+            row = index.get((student_id, course_id))
+            if row is not None:
+                count_recent[row] = count
+
+        assignment_rows = (StudentAssignment
+                           .select(StudentAssignment.student_id, Assignment.course_id,
+                                   fn.COUNT(StudentAssignment.id),
+                                   fn.SUM(Case(None, [(StudentAssignment.completed == False, 1)], 0)),
+                                   fn.AVG(StudentAssignment.score / fn.NULLIF(Assignment.total_points, 0)))
+                           .join(Assignment)
+                           .where(Assignment.course_id.in_(course_ids) & (Assignment.due_date < now))
+                           .group_by(StudentAssignment.student_id, Assignment.course_id)
+                           .tuples())
+        for student_id, course_id, due_count, overdue_count, average_ratio in assignment_rows:
+            row = index.get((student_id, course_id))
+            if row is not None:
+                due[row] = due_count
+                overdue[row] = overdue_count
+                if average_ratio is not None:
+                    score_ratio[row] = average_ratio
+
+        expected_recent = count_window * RECENT_WINDOW_DAYS / ACTIVITY_WINDOW_DAYS
+        features = np.column_stack([
+            1.0 - mastery,
+            low_mastery_ratio,
+            days_since_active / ACTIVITY_WINDOW_DAYS,
+            np.where(expected_recent > 0, 1.0 - count_recent / np.maximum(expected_recent, 1e-9), 0.0),
+            overdue / np.maximum(due, 1.0),
+            1.0 - score_ratio,
+        ]) if n else np.empty((0, len(FEATURES)))
+        students = np.array([student_id for student_id, _ in pairs], dtype=np.int64)
+        courses = np.array([course_id for _, course_id in pairs], dtype=np.int64)
+        return students, courses, np.clip(features, 0.0, 1.0)
+
+    @staticmethod
+    def score_courses(course_ids, now=None, model_path=None):
+        """给一批课程的所有在读学生评分，并替换这些课程的风险排名。
+
+        Args:
+            course_ids (list): 课程ID列表
+            now (datetime, optional): 评分时间
+            model_path (str, optional): 模型参数文件，默认Config.RISK_MODEL_PATH
+
+        Returns:
+            int: 评分的学生-课程数量
+        """
+        now = now or datetime.now()
+        students, courses, features = RiskService.extract_features(course_ids, now)
+        intercept, weights = load_model(model_path)
+        scores = predict(features, intercept, weights)
+        ranks = rank_within_courses(courses, scores)
+        rows = [{
+            'student': int(students[i]),
+            'course': int(courses[i]),
+            'score': float(scores[i]),
+            'rank': int(ranks[i]),
+            'features': {name: round(float(value), 4) for name, value in zip(FEATURES, features[i])},
+            'scored_at': now
+        } for i in range(len(students))]
+
+        with db.atomic():
+            RiskScore.delete().where(RiskScore.course_id.in_(list(course_ids))).execute()
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                RiskScore.insert_many(rows[start:start + INSERT_CHUNK_SIZE]).execute()
+        return len(rows)
+
+    @staticmethod
+    def score_all(course_id=None, processes=1, chunk_size=None):
+        """给所有启用的课程（或指定课程）评分，由定时任务调用。
+
+        课程按chunk_size门一批，processes大于1时各批在独立的进程中并行评分，
+        每个进程使用自己的数据库连接。
+
+        Args:
+            course_id (int, optional): 只评分该课程
+            processes (int): 并行进程数
+            chunk_size (int, optional): 每批课程数，默认Config.RISK_SCORE_CHUNK_COURSES
+
+        Returns:
+            int: 评分的学生-课程数量
+        """
+        if course_id:
+            course_ids = [course_id]
+        else:
+            course_ids = [cid for (cid,) in
+                          Course.select(Course.id).where(Course.is_active == True).order_by(Course.id).tuples()]
+        chunk_size = chunk_size or Config.RISK_SCORE_CHUNK_COURSES
+        chunks = [course_ids[start:start + chunk_size] for start in range(0, len(course_ids), chunk_size)]
+        if processes <= 1 or len(chunks) <= 1:
+            return sum(RiskService.score_courses(chunk) for chunk in chunks)
+
+        # 子进程不能共用父进程的数据库连接
+        db.close()
+        with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+            return sum(pool.imap_unordered(_score_chunk, chunks))
+
+    @register_as_tool(roles=["teacher"])
+    @staticmethod
+    def get_course_risk_ranking(course_id, limit=20):
+        """获取课程中学习风险最高的学生排名，数据来自定期计算的风险评分。
+
+        Args:
+            course_id (int): 课程ID
+            limit (int): 返回的学生数量
+
+        Returns:
+            list: 按风险从高到低排列的字典列表，每项包含student_id、student_name、score（0-1）、
+                  rank、features（各项特征值，越大风险越高）和scored_at
+        """
+        query = (RiskScore
+                 .select(RiskScore, User.name)
+                 .join(User)
+                 .where(RiskScore.course_id == course_id)
+                 .order_by(RiskScore.rank)
+                 .limit(limit))
+        return [{
+            'student_id': row.student_id,
+            'student_name': row.student.name,
+            'score': row.score,
+            'rank': row.rank,
+            'features': row.features,
+            'scored_at': row.scored_at
+        } for row in query]
+
+    @staticmethod
+    def get_at_risk_students(course_ids, limit=10):
+        """获取多门课程中风险最高的学生，用于教师仪表盘。
+
+        Args:
+            course_ids (list): 课程ID列表
+            limit (int): 返回的数量
+
+        Returns:
+            list: 按风险从高到低排列的RiskScore列表，已关联student和course
+        """
+        course_ids = list(course_ids)
+        if not course_ids:
+            return []
+        return list(RiskScore
+                    .select(RiskScore, User, Course)
+                    .join(User)
+                    .switch(RiskScore)
+                    .join(Course)
+                    .where(RiskScore.course_id.in_(course_ids))
+                    .order_by(RiskScore.score.desc())
+                    .limit(limit))
@@ -0,0 +1,385 @@
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from peewee import DatabaseError, DataError, IntegrityError
+
+from app.config import Config
+from app.ext import db
+from app.utils.logging import logger
+
+SPOOL_SUFFIX = ".jsonl"
+INSERT_CHUNK_SIZE = 1000
+
+_buffer: Optional["ActivityBuffer"] = None
+_buffer_lock = threading.Lock()
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _try_lock(file: IO) -> bool:
+        """
+        Takes a non-blocking exclusive lock on the segment; released when the file is closed or the process exits.
+        """
+        try:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            return False
+        return True
+
+    def _discard(path: str, file: IO) -> None:
+        # Windows cannot delete an open file
+        file.close()
+        os.remove(path)
+else:
+    import fcntl
+
+    def _try_lock(file: IO) -> bool:
+        """
+        Takes a non-blocking exclusive lock on the segment; released when the file is closed or the process exits.
+        """
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        return True
+
+    def _discard(path: str, file: IO) -> None:
+        # delete while still holding the lock, so no other worker can claim the committed segment
+        os.remove(path)
+        file.close()
+
+
+class ActivityBuffer:
+    """
+    Buffers learning activity events in memory and writes them to LearningActivity
+    with bulk inserts once max_size events are pending or flush_interval seconds pass.
+
+    Every accepted event is first appended to a spool segment on disk, and the
+    segment is deleted only after its events are committed. A buffer holds an
+    exclusive advisory lock on each segment it owns until the segment is deleted;
+    the operating system releases the locks when the process exits, so segments
+    left behind by a worker that crashed or could not reach the database are
+    claimed by locking them and replayed by the next buffer that starts, whatever
+    its pid (delivery is at least once).
+    """
+
+    def __init__(self, spool_directory: str, max_size: int = 500, flush_interval: float = 2.0,
+                 background: bool = True,
+                 on_insert: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                 before_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> None:
+        """
+        Initializes the buffer.
+
+        Args:
+            spool_directory (str): Directory holding the spool segments.
+            max_size (int): Number of pending events that triggers a flush.
+            flush_interval (float): Maximum seconds an event waits before it is flushed.
+            background (bool): Flush from a background thread; if False flush() must be called explicitly.
+            on_insert (Optional[Callable]): Called with the events of each segment after they are committed.
+            before_commit (Optional[Callable]): Called with the inserted rows inside the insert transaction,
+                so that anything it writes commits or rolls back together with them.
+        """
+        self.spool_directory = spool_directory
+        self.max_size = max(1, max_size)
+        self.flush_interval = max(0.05, flush_interval)
+        self.background = background
+        self.on_insert = on_insert
+        self.before_commit = before_commit
+        os.makedirs(spool_directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending: List[Dict[str, Any]] = []
+        self._segment: Optional[IO] = None
+        self._segment_path: Optional[str] = None
+        # (path, events, locked file) of segments waiting to be written
+        self._retry: List[Tuple[str, List[Dict[str, Any]], IO]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {
+            "received": 0,
+            "inserted": 0,
+            "dropped": 0,
+            "recovered": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "total_flush_time": 0.0,
+        }
+
+    def _open_segment(self) -> Tuple[str, IO]:
+        while True:
+            path = os.path.join(self.spool_directory, f"{uuid.uuid4().hex}{SPOOL_SUFFIX}")
+            file = open(path, "a+", encoding="utf-8")
+            if _try_lock(file):
+                return path, file
+            # another worker's recover() locked the new, empty segment first; it deletes it
+            file.close()
+
+    def _owned_paths(self) -> set:
+        with self._lock:
+            return {self._segment_path} | {path for path, _, _ in self._retry}
+
+    def recover(self) -> int:
+        """
+        Claims the spool segments no running buffer holds a lock on and queues them for retry.
+
+        Returns:
+            int: Number of recovered events.
+        """
+        recovered = 0
+        owned = self._owned_paths()
+        for filename in sorted(os.listdir(self.spool_directory)):
+            path = os.path.join(self.spool_directory, filename)
+            if not filename.endswith(SPOOL_SUFFIX) or path in owned:
+                continue
+            try:
+                file = open(path, "a+", encoding="utf-8")
+            except OSError:
+                continue
+            if not _try_lock(file):
+                # the owner is still running
+                file.close()
+                continue
+            try:
+                # the owner may have committed and deleted the segment after we opened it
+                claimed = os.path.samestat(os.fstat(file.fileno()), os.stat(path))
+            except OSError:
+                claimed = False
+            if not claimed:
+                file.close()
+                continue
+            events = []
+            file.seek(0)
+            for line in file:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    # the last line of a segment can be cut off by a crash
+                    logger.warning(f"Skipping corrupt spooled activity in {filename}")
+            if not events:
+                _discard(path, file)
+                continue
+            with self._lock:
+                self._retry.append((path, events, file))
+                self._stats["recovered"] += len(events)
+            recovered += len(events)
+        if recovered:
+            logger.info(f"Recovered {recovered} spooled learning activities")
+            if self.background:
+                self._ensure_thread()
+                self._wakeup.set()
+        return recovered
+
+    def add(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Accepts events for insertion; they are durable on disk when this returns.
+
+        Args:
+            events (List[Dict[str, Any]]): Validated LearningActivity rows keyed by field name
+                (student, course, activity_type, duration, knowledge_point, metadata) with an ISO format timestamp.
+
+        Returns:
+            int: Number of accepted events.
+
+        Raises:
+            RuntimeError: If the buffer is closed.
+        """
+        if not events:
+            return 0
+        lines = "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Activity buffer is closed")
+            if self._segment is None:
+                self._segment_path, self._segment = self._open_segment()
+            self._segment.write(lines)
+            self._segment.flush()
+            self._pending.extend(events)
+            self._stats["received"] += len(events)
+            full = len(self._pending) >= self.max_size
+        if self.background:
+            self._ensure_thread()
+            if full:
+                self._wakeup.set()
+        return len(events)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="activity-buffer", daemon=True)
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Activity buffer flush failed: {e}")
+
+    def _rotate(self) -> None:
+        with self._lock:
+            if self._segment is not None:
+                # the file stays open so that the segment stays locked until it is committed
+                self._retry.append((self._segment_path, self._pending, self._segment))
+                self._segment = None
+                self._segment_path = None
+                self._pending = []
+
+    def flush(self) -> int:
+        """
+        Writes all pending and previously failed segments to the database.
+
+        A segment that cannot be written, whatever the error, stays on disk and in
+        the retry list, and is retried by the next flush.
+
+        Returns:
+            int: Number of inserted events.
+        """
+        with self._flush_lock:
+            self._rotate()
+            with self._lock:
+                segments, self._retry = self._retry, []
+            inserted = 0
+            written = 0
+            try:
+                for path, events, file in segments:
+                    started = time.perf_counter()
+                    try:
+                        inserted += self._insert(events)
+                    except Exception as e:
+                        logger.error(f"Failed to write {len(events)} learning activities, will retry: {e}")
+                        with self._lock:
+                            self._stats["failed_flushes"] += 1
+                        if isinstance(e, DatabaseError):
+                            break
+                        raise
+                    finally:
+                        with self._lock:
+                            self._stats["total_flush_time"] += time.perf_counter() - started
+                    # only a committed segment leaves the retry list
+                    written += 1
+                    try:
+                        _discard(path, file)
+                    except OSError as e:
+                        logger.warning(f"Could not delete committed spool segment {path}: {e}")
+                    with self._lock:
+                        self._stats["flushes"] += 1
+                    if self.on_insert is not None:
+                        try:
+                            self.on_insert(events)
+                        except Exception as e:
+                            logger.error(f"Activity buffer on_insert callback failed: {e}")
+            finally:
+                with self._lock:
+                    self._retry[:0] = segments[written:]
+            return inserted
+
+    def _insert(self, events: List[Dict[str, Any]]) -> int:
+        from app.models.learning_data import LearningActivity
+
+        rows = []
+        for event in events:
+            try:
+                rows.append(dict(event, timestamp=datetime.fromisoformat(event["timestamp"])))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(f"Dropping malformed learning activity {event}: {e}")
+                with self._lock:
+                    self._stats["dropped"] += 1
+        if not rows:
+            return 0
+        opened = db.is_closed()
+        if opened:
+            db.connect()
+        try:
+            try:
+                with db.atomic():
+                    for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                        LearningActivity.insert_many(rows[start:start + INSERT_CHUNK_SIZE]).execute()
+                    if self.before_commit is not None:
+                        self.before_commit(rows)
+                inserted = len(rows)
+            except (IntegrityError, DataError):
+                # an event references a missing course or knowledge point: insert row by row and drop those
+                inserted = 0
+                for row in rows:
+                    try:
+                        with db.atomic():
+                            LearningActivity.insert(row).execute()
+                            if self.before_commit is not None:
+                                self.before_commit([row])
+                        inserted += 1
+                    except (IntegrityError, DataError) as e:
+                        logger.warning(f"Dropping invalid learning activity {row}: {e}")
+                        with self._lock:
+                            self._stats["dropped"] += 1
+        finally:
+            if opened:
+                db.close()
+        with self._lock:
+            self._stats["inserted"] += inserted
+        return inserted
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns counters of received, inserted, dropped and recovered events and flush timings.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending) + sum(len(events) for _, events, _ in self._retry)
+        stats["avg_flush_time"] = stats["total_flush_time"] / stats["flushes"] if stats["flushes"] else 0.0
+        return stats
+
+    def close(self) -> None:
+        """
+        Stops the background thread and flushes; events that still fail remain spooled on disk.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Final activity buffer flush failed, events kept in {self.spool_directory}: {e}")
+        # release the locks so that another worker can replay what is left
+        with self._lock:
+            for _, _, file in self._retry:
+                file.close()
+
+
+def get_activity_buffer(on_insert: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+                        before_commit: Optional[Callable[[List[Dict[str, Any]]], None]] = None) -> ActivityBuffer:
+    """
+    Returns the process-wide activity buffer configured from Config, creating it on first use.
+
+    Args:
+        on_insert (Optional[Callable]): Passed to the buffer when it is created; ignored afterwards.
+        before_commit (Optional[Callable]): Passed to the buffer when it is created; ignored afterwards.
+    """
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ActivityBuffer(
+                Config.ACTIVITY_SPOOL_DIRECTORY,
+                max_size=Config.ACTIVITY_BUFFER_MAX_SIZE,
+                flush_interval=Config.ACTIVITY_BUFFER_FLUSH_INTERVAL,
+                on_insert=on_insert,
+                before_commit=before_commit,
+            )
+            _buffer.recover()
+            atexit.register(_buffer.close)
+        return _buffer
@@ -0,0 +1,115 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Thread-safe in-process cache whose entries expire ttl seconds after they are stored.
+
+    get_or_load() does not store a value if its key (or the whole cache) was
+    invalidated while the value was being loaded, so a slow load cannot put
+    stale data back. Invalidating one key does not affect loads of other keys.
+    """
+
+    def __init__(self, ttl: float, max_entries: Optional[int] = None) -> None:
+        """
+        Initializes the cache.
+
+        Args:
+            ttl (float): Seconds an entry stays valid; 0 disables caching.
+            max_entries (Optional[int]): When full, the entry closest to expiring is evicted.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        # Keys with a get_or_load() in progress: key -> [loads in progress, generation]
+        self._loading: Dict[Hashable, list] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return default
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        if self.max_entries and key not in self._entries and len(self._entries) >= self.max_entries:
+            del self._entries[min(self._entries, key=lambda k: self._entries[k][0])]
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Returns the cached value for key, calling loader() and caching its result on a miss.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            version = self._version
+            loading = self._loading.setdefault(key, [0, 0])
+            loading[0] += 1
+            generation = loading[1]
+        loaded = False
+        try:
+            value = loader()
+            loaded = True
+        finally:
+            with self._lock:
+                loading[0] -= 1
+                if not loading[0]:
+                    del self._loading[key]
+                if loaded and version == self._version and generation == loading[1]:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._invalidate(key)
+
+    def _invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        if key in self._loading:
+            self._loading[key][1] += 1
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """
+        Invalidates every cached or loading key for which predicate(key) is true.
+        """
+        with self._lock:
+            for key in [key for key in (*self._entries, *self._loading) if predicate(key)]:
+                self._invalidate(key)
+
+    def discard_loads(self) -> None:
+        """
+        Makes get_or_load() calls that are currently loading not store their result.
+        """
+        with self._lock:
+            self._version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
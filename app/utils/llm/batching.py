@@ -0,0 +1,224 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.logging import logger
+
+
+class BatchDispatcher:
+    """
+    Queues requests and hands them to a handler in batches on a persistent worker
+    pool, with a bounded number of batches in flight.
+
+    Requests already waiting when a batch starts are taken together, so batching
+    costs no latency; a positive window additionally waits for stragglers, which
+    only pays off for handlers that send a whole batch in a single call.
+    """
+
+    def __init__(self, handler: Callable[[List[Any]], List[Any]], max_batch_size: int = 8,
+                 window: float = 0.0, max_concurrency: int = 4, max_queue_size: int = 256,
+                 name: str = "llm") -> None:
+        """
+        Initializes the dispatcher and starts its collector thread.
+
+        Args:
+            handler (Callable[[List[Any]], List[Any]]): Processes a batch and returns one result per item.
+                A result that is an Exception is raised to the caller of that item.
+            max_batch_size (int): Maximum number of requests in one batch.
+            window (float): Seconds to wait for more requests after the first one of a batch arrives,
+                0 takes only the requests that are already queued.
+            max_concurrency (int): Maximum number of batches being processed at the same time.
+            max_queue_size (int): Maximum number of queued requests before submit() is rejected.
+            name (str): Name used for the worker threads and in log messages.
+        """
+        self.handler = handler
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window)
+        self.max_concurrency = max(1, max_concurrency)
+        self.name = name
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix=f"{name}-batch")
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stopping = threading.Event()
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "batches": 0,
+            "batched_items": 0,
+            "max_batch_size_seen": 0,
+            "in_flight_batches": 0,
+            "total_queue_wait": 0.0,
+            "total_batch_time": 0.0,
+        }
+        self._collector = threading.Thread(target=self._collect, name=f"{name}-collector", daemon=True)
+        self._collector.start()
+
+    def submit_async(self, item: Any) -> Future:
+        """
+        Queues a request and returns a future for its result.
+
+        Args:
+            item (Any): The request passed to the handler as part of a batch.
+
+        Returns:
+            Future: Resolves to the handler's result for this item.
+
+        Raises:
+            RuntimeError: If the dispatcher is closed or the queue is full.
+        """
+        if self._closed:
+            raise RuntimeError(f"Dispatcher {self.name} is closed")
+        future: Future = Future()
+        try:
+            self._queue.put_nowait((item, future, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise RuntimeError(f"Dispatcher {self.name} queue is full ({self._queue.maxsize} pending requests)")
+        with self._lock:
+            self._stats["submitted"] += 1
+        return future
+
+    def submit(self, item: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Queues a request and blocks until its result is available.
+
+        Args:
+            item (Any): The request passed to the handler as part of a batch.
+            timeout (Optional[float]): Seconds to wait for the result, None waits forever.
+
+        Returns:
+            Any: The handler's result for this item.
+        """
+        return self.submit_async(item).result(timeout=timeout)
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Returns a snapshot of the queue and batching metrics.
+
+        Returns:
+            Dict[str, Any]: Counters, current queue depth and averages in milliseconds.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        batches = stats["batches"]
+        finished = stats["completed"] + stats["failed"]
+        stats["queue_depth"] = self._queue.qsize()
+        stats["avg_batch_size"] = stats["batched_items"] / batches if batches else 0.0
+        stats["avg_queue_wait_ms"] = stats.pop("total_queue_wait") * 1000 / finished if finished else 0.0
+        stats["avg_batch_time_ms"] = stats.pop("total_batch_time") * 1000 / batches if batches else 0.0
+        return stats
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stops accepting requests; queued requests are still processed.
+
+        Args:
+            wait (bool): Whether to wait for in-flight batches to finish.
+        """
+        self._closed = True
+        self._stopping.set()
+        try:
+            # 唤醒空闲的收集线程；队列已满时收集线程处理完积压后会看到停止标志
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        if wait:
+            self._collector.join()
+        self._executor.shutdown(wait=wait)
+
+    def _next_entry(self) -> Optional[tuple]:
+        """
+        Blocks until a request is queued; returns None once the dispatcher is closed and drained.
+        """
+        while True:
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return None
+
+    def _collect(self) -> None:
+        """
+        Collector loop: takes the first pending request, then gathers the requests
+        already queued (and, with a window, those arriving before it elapses) until
+        the batch is full, and dispatches the batch.
+        """
+        stop = False
+        while not stop:
+            first = self._next_entry()
+            if first is None:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            # 在途批次达到上限时在此阻塞，期间新请求继续排队，下一批会更大
+            self._slots.acquire()
+            with self._lock:
+                self._stats["in_flight_batches"] += 1
+            self._executor.submit(self._run_batch, batch)
+
+        # 关闭后才入队的请求不会再被处理
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not None:
+                entry[1].set_exception(RuntimeError(f"Dispatcher {self.name} is closed"))
+
+    def _run_batch(self, batch: List[tuple]) -> None:
+        """
+        Runs the handler on one batch and resolves the futures of its items.
+
+        Args:
+            batch (List[tuple]): (item, future, enqueued_at) entries.
+        """
+        started = time.monotonic()
+        items = [item for item, _, _ in batch]
+        try:
+            results = self.handler(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"Handler returned {len(results)} results for {len(items)} requests")
+        except Exception as e:
+            logger.error(f"Error processing {self.name} batch of {len(items)}: {e}")
+            results = [e] * len(items)
+        finally:
+            self._slots.release()
+
+        failed = 0
+        for (_, future, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                failed += 1
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        finished = time.monotonic()
+        with self._lock:
+            self._stats["in_flight_batches"] -= 1
+            self._stats["batches"] += 1
+            self._stats["batched_items"] += len(batch)
+            self._stats["max_batch_size_seen"] = max(self._stats["max_batch_size_seen"], len(batch))
+            self._stats["completed"] += len(batch) - failed
+            self._stats["failed"] += failed
+            self._stats["total_queue_wait"] += sum(started - enqueued_at for _, _, enqueued_at in batch)
+            self._stats["total_batch_time"] += finished - started
@@ -1,26 +1,76 @@
+import threading
 from openai import OpenAI
 
+from app.config import Config
+from app.utils.llm.batching import BatchDispatcher
 from app.utils.logging import logger
 
+_clients = {}
+_dispatcher = None
+_lock = threading.Lock()
 
-def chat_lm_studio(messages, model="meta-llama-3.1-8b-instruct"):  # 默认使用meta-llama-3.1-8b-instruct模型
+
+def _get_client(base_url):
+    # 复用客户端，使连接池在请求之间保持
+    with _lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = OpenAI(api_key="lm-studio", base_url=base_url)
+            _clients[base_url] = client
+        return client
+
+
+def chat_lm_studio(messages, model=None, base_url=None):  # 默认使用Config.LM_STUDIO_MODEL模型
+    """
+    Sends one conversation to the local server.
+
+    Errors are raised rather than swallowed so that the dispatcher counts them as failures.
+    """
+    logger.debug("messages:\n", messages[0]['content'])
+    logger.info("Generating response from LM Studio")
+    client = _get_client(base_url or Config.LM_STUDIO_BASE_URL)
+
+    response = client.chat.completions.create(
+        model=model or Config.LM_STUDIO_MODEL,
+        messages=messages,
+        stream=False
+    )
+
+    if not response.choices[0].message.content:
+        raise RuntimeError("Empty response from the model")
+
+    logger.info("Successfully generated response")
+    return response.choices[0].message.content
+
+
+def get_dispatcher():
+    """
+    Returns the process-wide dispatcher for LM Studio requests, creating it on first use.
+
+    At most LLM_MAX_CONCURRENCY requests are sent to the server at the same time;
+    the rest wait in a queue of at most LLM_MAX_QUEUE_SIZE requests.
+    """
+    global _dispatcher
+    with _lock:
+        if _dispatcher is None:
+            # chat completions接口一次只接受一段对话，合批没有收益：每个请求单独交给
+            # 常驻线程池，调度器只负责限制并发、排队和统计
+            _dispatcher = BatchDispatcher(
+                lambda batch: [chat_lm_studio(messages) for messages in batch],
+                max_batch_size=1,
+                max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                max_queue_size=Config.LLM_MAX_QUEUE_SIZE,
+                name="lm-studio"
+            )
+        return _dispatcher
+
+
+def chat_lm_studio_batched(messages, timeout=None):
+    """
+    Queues a conversation on the shared dispatcher, returning None if the request failed.
+    """
     try:
-        logger.debug("messages:\n", messages[0]['content'])
-        logger.info("Generating response from LM Studio")
-        client = OpenAI(api_key="lm-studio", base_url="http://127.0.0.1:1234/v1")
-
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            stream=False
-        )
-
-        if not response.choices[0].message.content:
-            logger.error("Empty response from the model")
-            return None
-
-        logger.info("Successfully generated response")
-        return response.choices[0].message.content
+        return get_dispatcher().submit(messages, timeout=timeout)
     except Exception as e:
         logger.error(f"Error generating response: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,27 @@
+from app.config import Config
+from app.utils.logging import logger
+
+
+def chat(messages, provider=None):
+    """
+    Sends messages to the configured LLM provider.
+
+    Args:
+        messages (list): OpenAI style chat messages.
+        provider (str, optional): deepseek, lm_studio or silicon. Defaults to Config.LLM_PROVIDER.
+
+    Returns:
+        Optional[str]: The model's response, or None if the request failed.
+    """
+    provider = provider or Config.LLM_PROVIDER
+    # 按需导入，未使用的供应商依赖不会被加载
+    if provider == "lm_studio":
+        from app.utils.llm.lm_studio import chat_lm_studio_batched
+        return chat_lm_studio_batched(messages)
+    if provider == "silicon":
+        from app.utils.llm.silicon import chat_silicon
+        return chat_silicon(messages)
+    if provider != "deepseek":
+        logger.warning(f"Unknown LLM provider '{provider}', falling back to deepseek")
+    from app.utils.llm.deepseek import chat_deepseek
+    return chat_deepseek(messages)
@@ -0,0 +1,216 @@
+import functools
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.config import Config
+from app.utils.logging import logger
+
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000, 10000, 100000, 1000000)
+ARGUMENT_REPR_LIMIT = 200
+
+_local = threading.local()
+
+
+def record_query(rows: int) -> None:
+    """
+    Adds one SQL statement and the rows it returned or changed to every call measured on this thread.
+
+    Called by the database after each statement (see app.ext.InstrumentedDatabase).
+    """
+    for frame in getattr(_local, "frames", ()):
+        frame[0] += 1
+        frame[1] += max(rows, 0)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts with sum and max, from which quantiles are estimated.
+    """
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = 0
+        while index < len(self.bounds) and value > self.bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimates the q-quantile (0-1) by interpolating inside the bucket that contains it.
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.max
+                return min(lower + (upper - lower) * (target - cumulative) / count, self.max)
+            cumulative += count
+        return self.max
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+
+class MetricsRegistry:
+    """
+    In-process registry of per-call latency, SQL statement and row count histograms,
+    plus a bounded log of the slowest recent calls. Each worker process has its own.
+    """
+
+    def __init__(self, slow_call_ms: float = 500, slow_log_size: int = 100) -> None:
+        self.slow_call_ms = slow_call_ms
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._slow_calls: deque = deque(maxlen=max(1, slow_log_size))
+        self.started_at = datetime.now()
+
+    def observe(self, name: str, elapsed_ms: float, queries: int, rows: int, failed: bool = False,
+                arguments: Optional[str] = None) -> None:
+        with self._lock:
+            call = self._calls.get(name)
+            if call is None:
+                call = self._calls[name] = {
+                    "latency_ms": Histogram(LATENCY_BUCKETS_MS),
+                    "queries": Histogram(COUNT_BUCKETS),
+                    "rows": Histogram(COUNT_BUCKETS),
+                    "errors": 0,
+                }
+            call["latency_ms"].observe(elapsed_ms)
+            call["queries"].observe(queries)
+            call["rows"].observe(rows)
+            if failed:
+                call["errors"] += 1
+            slow = elapsed_ms >= self.slow_call_ms
+            if slow:
+                self._slow_calls.appendleft({
+                    "name": name,
+                    "arguments": arguments,
+                    "elapsed_ms": elapsed_ms,
+                    "queries": queries,
+                    "rows": rows,
+                    "failed": failed,
+                    "at": datetime.now(),
+                })
+        if slow:
+            logger.warning(f"Slow call {name}({arguments}) took {elapsed_ms:.0f}ms, "
+                           f"{queries} queries, {rows} rows")
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Returns one entry per measured function with call count, latency percentiles
+        and average SQL statements and rows, slowest p95 first.
+        """
+        with self._lock:
+            entries = [{
+                "name": name,
+                "count": call["latency_ms"].count,
+                "errors": call["errors"],
+                "p50_ms": call["latency_ms"].quantile(0.5),
+                "p95_ms": call["latency_ms"].quantile(0.95),
+                "p99_ms": call["latency_ms"].quantile(0.99),
+                "max_ms": call["latency_ms"].max,
+                "mean_ms": call["latency_ms"].mean,
+                "mean_queries": call["queries"].mean,
+                "max_queries": call["queries"].max,
+                "mean_rows": call["rows"].mean,
+                "max_rows": call["rows"].max,
+            } for name, call in self._calls.items()]
+        return sorted(entries, key=lambda entry: entry["p95_ms"] or 0, reverse=True)
+
+    def slow_calls(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._slow_calls)
+
+    def render_text(self, prefix: str = "analytics_call") -> str:
+        """
+        Renders all histograms in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            calls = sorted(self._calls.items())
+            for metric, unit in (("latency_ms", "duration_ms"), ("queries", "queries"), ("rows", "rows")):
+                full_name = f"{prefix}_{unit}"
+                lines.append(f"# TYPE {full_name} histogram")
+                for name, call in calls:
+                    histogram = call[metric]
+                    label = name.replace("\\", "\\\\").replace('"', '\\"')
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.bounds) + [math.inf], histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else f"{bound:g}"
+                        lines.append(f'{full_name}_bucket{{method="{label}",le="{le}"}} {cumulative}')
+                    lines.append(f'{full_name}_sum{{method="{label}"}} {histogram.sum:g}')
+                    lines.append(f'{full_name}_count{{method="{label}"}} {histogram.count}')
+            lines.append(f"# TYPE {prefix}_errors_total counter")
+            for name, call in calls:
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{prefix}_errors_total{{method="{label}"}} {call["errors"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._calls.clear()
+            self._slow_calls.clear()
+            self.started_at = datetime.now()
+
+
+registry = MetricsRegistry(slow_call_ms=Config.METRICS_SLOW_CALL_MS, slow_log_size=Config.METRICS_SLOW_LOG_SIZE)
+
+
+def _describe_arguments(args: tuple, kwargs: dict) -> str:
+    described = ", ".join([repr(arg) for arg in args] + [f"{key}={value!r}" for key, value in kwargs.items()])
+    return described if len(described) <= ARGUMENT_REPR_LIMIT else described[:ARGUMENT_REPR_LIMIT] + "..."
+
+
+def instrumented(func: Optional[Callable] = None, *, name: Optional[str] = None) -> Callable:
+    """
+    Records wall time, SQL statement count and rows of every call in the registry.
+
+    Nested measured calls are counted in both the inner and the outer function.
+    Use as @instrumented or @instrumented(name="dashboard.index"); place it below
+    @staticmethod so that tool registration sees the wrapped function.
+    """
+    def decorator(function: Callable) -> Callable:
+        metric = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            frames = getattr(_local, "frames", None)
+            if frames is None:
+                frames = _local.frames = []
+            frame = [0, 0]
+            frames.append(frame)
+            failed = False
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                frames.pop()
+                registry.observe(metric, elapsed_ms, frame[0], frame[1], failed,
+                                 _describe_arguments(args, kwargs) if elapsed_ms >= registry.slow_call_ms else None)
+
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
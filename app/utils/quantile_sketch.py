@@ -0,0 +1,150 @@
+import math
+import random
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_K = 200
+CAPACITY_DECAY = 2 / 3
+
+
+class KLLSketch:
+    """
+    Mergeable approximate quantile sketch (Karnin, Lang and Liberty).
+
+    Values are kept in levels of compactors; an item on level h stands for 2**h
+    original values. When the sketch is full, one level is sorted and every
+    other item (random offset) is promoted to the next level. Memory stays
+    O(k) for any number of values and the rank error is roughly 1.7 / k.
+
+    Until more than k values have been added nothing is compacted, so small
+    cohorts are answered exactly (see is_exact).
+    """
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = None) -> None:
+        """
+        Initializes an empty sketch.
+
+        Args:
+            k (int): Capacity of the top level; larger is more accurate.
+            seed (Optional[int]): Seed for the compaction offsets, for reproducible results.
+        """
+        self.k = max(8, k)
+        self.n = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.levels: List[List[float]] = [[]]
+        self._random = random.Random(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(items) for items in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        if math.isnan(value):
+            return
+        self.n += 1
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.levels[0].append(value)
+        if self._size() > self._max_size():
+            self._compress()
+
+    def update(self, values: Iterable[float]) -> "KLLSketch":
+        for value in values:
+            self.add(value)
+        return self
+
+    def _compress(self) -> None:
+        while self._size() > self._max_size():
+            for level, items in enumerate(self.levels):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append([])
+                    items.sort()
+                    # an odd item out stays on this level so no weight is lost
+                    kept = [items.pop()] if len(items) % 2 else []
+                    offset = self._random.randint(0, 1)
+                    self.levels[level + 1].extend(items[offset::2])
+                    self.levels[level] = kept
+                    break
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Adds all values summarized by other into this sketch.
+        """
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.n += other.n
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    @property
+    def is_exact(self) -> bool:
+        """
+        True while no values have been compacted, i.e. quantiles and ranks are exact.
+        """
+        return len(self.levels) == 1
+
+    def _weighted(self):
+        return sorted((value, 1 << level) for level, values in enumerate(self.levels) for value in values)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Returns the value at quantile q (0-1), or None for an empty sketch.
+        """
+        if self.n == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        items = self._weighted()
+        total = sum(weight for _, weight in items)
+        target = q * total
+        cumulative = 0
+        for value, weight in items:
+            cumulative += weight
+            if cumulative >= target:
+                return value
+        return self.max
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        return [self.quantile(q) for q in qs]
+
+    def rank(self, value: float) -> Optional[float]:
+        """
+        Returns the fraction (0-1) of values less than or equal to value, or None for an empty sketch.
+        """
+        if self.n == 0:
+            return None
+        items = self._weighted()
+        total = sum(weight for _, weight in items)
+        return sum(weight for item, weight in items if item <= value) / total
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"k": self.k, "n": self.n, "min": self.min, "max": self.max, "levels": self.levels}
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict[str, Any]]) -> "KLLSketch":
+        sketch = cls(k=(data or {}).get("k", DEFAULT_K))
+        if data:
+            sketch.n = data["n"]
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+            sketch.levels = [list(items) for items in data["levels"]] or [[]]
+        return sketch
+
+    def __len__(self) -> int:
+        return self.n
@@ -1,6 +1,9 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+import hmac
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, Response
+from app.config import Config
 from app.services.user_service import UserService
 from app.models.user import User, Role, UserRole
+from app.utils.metrics import registry
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -78,6 +81,33 @@ def add_role():
     
     return render_template('admin/add_role.html')
 
+@admin_bp.route('/analytics-metrics')
+@admin_required
+def analytics_metrics():
+    return render_template('admin/metrics.html',
+                           calls=registry.summary(),
+                           slow_calls=registry.slow_calls(),
+                           slow_call_ms=registry.slow_call_ms,
+                           started_at=registry.started_at)
+
+@admin_bp.route('/analytics-metrics/reset', methods=['POST'])
+@admin_required
+def reset_analytics_metrics():
+    registry.reset()
+    flash('耗时统计已清空。', 'success')
+    return redirect(url_for('admin.analytics_metrics'))
+
+def _metrics_text():
+    return Response(registry.render_text(), mimetype='text/plain; version=0.0.4')
+
+@admin_bp.route('/metrics')
+def metrics():
+    # 文本格式的耗时直方图，监控系统用METRICS_TOKEN抓取，浏览器中按管理员会话校验
+    if Config.METRICS_TOKEN and hmac.compare_digest(request.headers.get('Authorization', ''),
+                                                    f'Bearer {Config.METRICS_TOKEN}'):
+        return _metrics_text()
+    return admin_required(_metrics_text)()
+
 @admin_bp.route('/initialize', methods=['GET', 'POST'])
 def initialize_system():
     # 只有在没有任何角色定义时才允许初始化
@@ -1,7 +1,6 @@
 from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, flash
 from app.models.user import User
 from app.models.chat import Chat, ChatMessage
-from app.react.agent import run
 import json
 
 ai_assistant_bp = Blueprint('ai_assistant', __name__, url_prefix='/ai-assistant')
@@ -119,7 +118,8 @@ def send_message(chat_id):
             content=data['message']
         )
         
-        # 调用AI模型生成回复
+        # 调用AI模型生成回复（agent及其工具在首次对话时才加载）
+        from app.react.agent import run
         # TODO: 选择权限最高的角色
         ai_response = run(data['message'], user.roles[0].role.name)
         
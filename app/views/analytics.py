@@ -1,8 +1,17 @@
-from flask import Blueprint, render_template, jsonify, request, session, redirect, url_for
+import os
+import tempfile
+from datetime import date
+from flask import Blueprint, render_template, jsonify, request, session, redirect, url_for, Response, send_file, stream_with_context
 from app.services.analytics_service import AnalyticsService
+from app.services.export_service import ExportService, DATASET_COLUMNS
+from app.services.cohort_service import CohortService
+from app.services.engagement_service import EngagementService
+from app.services.learning_issue_service import LearningIssueService
 from app.services.course_service import CourseService
 from app.models.user import User
 from app.models.course import Course
+from app.config import Config
+from app.utils.metrics import instrumented
 
 analytics_bp = Blueprint('analytics', __name__, url_prefix='/analytics')
 
@@ -14,6 +23,7 @@ def index():
     return render_template('analytics/index.html')
 
 @analytics_bp.route('/student/<int:student_id>')
+@instrumented(name='view.analytics.student_analytics')
 def student_analytics(student_id):
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
@@ -23,51 +33,32 @@ def student_analytics(student_id):
     student = User.get_by_id(student_id)
     
     # 验证权限：只有学生本人或其教师才能查看
-    is_teacher = False
-    student_courses = CourseService.get_courses_by_student(student_id)
-    for course in student_courses:
-        if course.teacher_id == user_id:
-            is_teacher = True
-            break
+    courses = CourseService.get_courses_by_student(student_id)
+    is_teacher = any(course.teacher_id == user_id for course in courses)
     
     if user_id != student_id and not is_teacher:
         return redirect(url_for('dashboard.index'))
     
-    # 获取学生的课程列表
-    courses = CourseService.get_courses_by_student(student_id)
-    
     # 默认选择第一个课程
-    selected_course_id = request.args.get('course_id', None)
+    selected_course_id = request.args.get('course_id', None, type=int)
     if not selected_course_id and courses:
         selected_course_id = courses[0].id
     
-    # 获取学习活动摘要
-    activity_summary = AnalyticsService.get_student_activity_summary(
-        student_id, 
-        course_id=selected_course_id
-    )
-    
-    # 知识点掌握情况
-    knowledge_mastery = AnalyticsService.get_student_knowledge_mastery(
-        student_id,
-        course_id=selected_course_id
-    )
-    
-    # 学习问题检测
-    learning_issues = AnalyticsService.detect_learning_issues(
-        student_id,
-        course_id=selected_course_id
-    )
+    # 活动概要、知识点掌握、章节掌握度和学习问题来自同一个缓存的快照
+    snapshot = AnalyticsService.get_student_analytics(student_id, selected_course_id)
     
     return render_template('analytics/student.html',
                           student=student,
                           courses=courses,
-                          selected_course_id=int(selected_course_id) if selected_course_id else None,
-                          activity_summary=activity_summary,
-                          knowledge_mastery=knowledge_mastery,
-                          learning_issues=learning_issues)
+                          selected_course_id=selected_course_id,
+                          activity_summary=snapshot['activity_summary'],
+                          knowledge_mastery=snapshot['knowledge_mastery'],
+                          mastery_tree=snapshot['mastery_tree'],
+                          learning_issues=snapshot['learning_issues'],
+                          due_reviews=snapshot['due_reviews'])
 
 @analytics_bp.route('/course/<int:course_id>')
+@instrumented(name='view.analytics.course_analytics')
 def course_analytics(course_id):
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
@@ -82,23 +73,126 @@ def course_analytics(course_id):
     # 获取课程学生
     students = CourseService.get_students_by_course(course_id)
     
-    # 收集所有学生的知识点掌握数据
-    student_masteries = {}
-    for student in students:
-        mastery = AnalyticsService.get_student_knowledge_mastery(student.id, course_id)
-        student_masteries[student.id] = mastery
-    
-    # 计算课程活跃度
-    course_activity = {}
-    for student in students:
-        activity = AnalyticsService.get_student_activity_summary(student.id, course_id)
-        course_activity[student.id] = activity
+    # 整个课程的掌握度和活跃度各用少量分组查询获取
+    course_mastery = AnalyticsService.get_course_mastery_matrix(course_id)
+    course_activity = AnalyticsService.get_course_activity_summary(course_id)
+    course_issues = LearningIssueService.get_course_learning_issues(course_id)
     
     return render_template('analytics/course.html',
                           course=course,
                           students=students,
-                          student_masteries=student_masteries,
-                          course_activity=course_activity)
+                          course_mastery=course_mastery,
+                          course_activity=course_activity,
+                          course_issues=course_issues)
+
+def _can_view_engagement(user_id, course_id, student_id):
+    """学生只能查看自己的数据，教师可以查看自己课程的整体或其中学生的数据"""
+    if student_id == user_id:
+        return True
+    if not course_id:
+        return False
+    course = Course.get_or_none(Course.id == course_id)
+    return course is not None and course.teacher_id == user_id
+
+@analytics_bp.route('/engagement')
+@analytics_bp.route('/engagement/<view>')
+def engagement(view='timeseries'):
+    """学习参与度时间序列（granularity=hour/day/week）或星期×小时热力图（/engagement/heatmap），
+    可选course_id、student_id、start、end（YYYY-MM-DD）参数"""
+    if 'user_id' not in session:
+        return jsonify(success=False, message="未登录"), 401
+    
+    course_id = request.args.get('course_id', type=int)
+    student_id = request.args.get('student_id', type=int)
+    if not _can_view_engagement(session['user_id'], course_id, student_id):
+        return jsonify(success=False, message="无权查看该数据"), 403
+    
+    try:
+        start_date = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end_date = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+        if view == 'heatmap':
+            data = EngagementService.get_activity_heatmap(start_date, end_date, course_id, student_id)
+        elif view == 'timeseries':
+            data = EngagementService.get_engagement_timeseries(request.args.get('granularity', 'day'),
+                                                               start_date, end_date, course_id, student_id)
+        else:
+            return jsonify(success=False, message=f"未知的视图: {view}"), 404
+    except ValueError as e:
+        return jsonify(success=False, message=str(e)), 400
+    return jsonify(success=True, **data)
+
+@analytics_bp.route('/course/<int:course_id>/cohort')
+def course_cohort(course_id):
+    """课程掌握度和作业得分的分位数，可用compare参数（可重复）合并其他课程比较"""
+    if 'user_id' not in session:
+        return jsonify(success=False, message="未登录"), 401
+    
+    course = Course.get_or_none(Course.id == course_id)
+    if course is None or course.teacher_id != session['user_id']:
+        return jsonify(success=False, message="无权查看该课程数据"), 403
+    
+    compare_course_ids = request.args.getlist('compare', type=int)
+    statistics = CohortService.get_course_cohort_statistics(course_id, compare_course_ids or None)
+    return jsonify(success=True, **statistics)
+
+@analytics_bp.route('/student/<int:student_id>/cohort')
+def student_cohort(student_id):
+    """学生在课程中的百分位排名，需要course_id参数"""
+    if 'user_id' not in session:
+        return jsonify(success=False, message="未登录"), 401
+    
+    course_id = request.args.get('course_id', type=int)
+    course = Course.get_or_none(Course.id == course_id) if course_id else None
+    if course is None:
+        return jsonify(success=False, message="缺少course_id"), 400
+    if session['user_id'] not in (student_id, course.teacher_id):
+        return jsonify(success=False, message="无权查看该学生数据"), 403
+    
+    compare_course_ids = request.args.getlist('compare', type=int)
+    position = CohortService.get_student_cohort_position(student_id, course_id, compare_course_ids or None)
+    return jsonify(success=True, **position)
+
+@analytics_bp.route('/course/<int:course_id>/export/<dataset>')
+def export_course_data(course_id, dataset):
+    """导出课程数据，format为csv（流式）或parquet，start、end为YYYY-MM-DD格式的起止日期"""
+    if 'user_id' not in session:
+        return redirect(url_for('auth.login'))
+    
+    course = Course.get_or_none(Course.id == course_id)
+    if course is None or course.teacher_id != session['user_id']:
+        return jsonify(success=False, message="无权导出该课程数据"), 403
+    if dataset not in DATASET_COLUMNS:
+        return jsonify(success=False, message=f"未知的导出数据集: {dataset}"), 404
+    
+    export_format = request.args.get('format', 'csv')
+    if export_format == 'parquet' and not ExportService.parquet_supported():
+        # 没有安装pyarrow时退回CSV，文件扩展名随之改变
+        export_format = 'csv'
+    try:
+        start_date = date.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end_date = date.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify(success=False, message="日期格式应为YYYY-MM-DD"), 400
+    filename = f"course_{course_id}_{dataset}.{export_format}"
+    
+    if export_format == 'csv':
+        rows = ExportService.stream_csv(dataset, course_id, start_date, end_date)
+        return Response(stream_with_context(rows), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    if export_format == 'parquet':
+        # Parquet的元数据写在文件末尾，先分块写入临时文件再发送
+        handle, path = tempfile.mkstemp(suffix='.parquet')
+        os.close(handle)
+        try:
+            ExportService.write_parquet(dataset, course_id, path, start_date, end_date)
+            response = send_file(path, mimetype='application/vnd.apache.parquet',
+                                 as_attachment=True, download_name=filename)
+        except Exception as e:
+            os.remove(path)
+            return jsonify(success=False, message=str(e)), 500
+        response.call_on_close(lambda: os.remove(path))
+        return response
+    return jsonify(success=False, message="format必须是csv或parquet"), 400
 
 @analytics_bp.route('/record-activity', methods=['POST'])
 def record_activity():
@@ -106,23 +200,27 @@ def record_activity():
     if 'user_id' not in session:
         return jsonify(success=False, message="未登录"), 401
     
-    data = request.json
-    student_id = session['user_id']
-    course_id = data.get('course_id')
-    activity_type = data.get('activity_type')
-    duration = int(data.get('duration', 0))
-    knowledge_point_id = data.get('knowledge_point_id')
-    metadata = data.get('metadata')
-    
     try:
-        AnalyticsService.record_learning_activity(
-            student_id=student_id,
-            course_id=course_id,
-            activity_type=activity_type,
-            duration=duration,
-            knowledge_point_id=knowledge_point_id,
-            metadata=metadata
-        )
+        AnalyticsService.enqueue_learning_activities(session['user_id'], [request.json])
         return jsonify(success=True)
     except Exception as e:
         return jsonify(success=False, message=str(e)), 400
+
+@analytics_bp.route('/record-activities', methods=['POST'])
+def record_activities():
+    """批量记录学生学习活动的API端点，接收活动数组或{"events": [...]}"""
+    if 'user_id' not in session:
+        return jsonify(success=False, message="未登录"), 401
+    
+    data = request.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) else data
+    if not isinstance(events, list):
+        return jsonify(success=False, message="请求体必须是活动数组"), 400
+    if len(events) > Config.ACTIVITY_BULK_MAX_EVENTS:
+        return jsonify(success=False, message=f"单次最多提交{Config.ACTIVITY_BULK_MAX_EVENTS}条活动"), 413
+    
+    try:
+        accepted = AnalyticsService.enqueue_learning_activities(session['user_id'], events)
+        return jsonify(success=True, accepted=accepted)
+    except Exception as e:
+        return jsonify(success=False, message=str(e)), 400
@@ -1,13 +1,16 @@
 from flask import Blueprint, render_template, session, redirect, url_for, flash
 from app.services.course_service import CourseService
 from app.services.assignment_service import AssignmentService
-from app.services.analytics_service import AnalyticsService
+from app.services.dashboard_service import DashboardService
+from app.services.risk_service import RiskService
 from app.services.user_service import UserService
 from app.models.user import User
+from app.utils.metrics import instrumented
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/')
+@instrumented(name='view.dashboard.index')
 def index():
     if 'user_id' not in session:
         return redirect(url_for('auth.login'))
@@ -25,32 +28,16 @@ def index():
         courses = CourseService.get_courses_by_teacher(user_id)
         context['courses'] = courses
         
-        # 获取最近作业
-        recent_assignments = []
-        for course in courses:
-            assignments = AssignmentService.get_course_assignments(course.id)
-            recent_assignments.extend(assignments)
-        # 按截止日期排序，取前5个
-        recent_assignments.sort(key=lambda x: x.due_date, reverse=True)
-        context['recent_assignments'] = recent_assignments[:5]
+        # 获取最近作业（数据库中排序截取，附带提交和评分人数）
+        context['recent_assignments'] = AssignmentService.get_recent_assignments_for_teacher(user_id, limit=5)
+
+        # 风险最高的学生（读取定期计算的风险排名）
+        context['at_risk_students'] = RiskService.get_at_risk_students([course.id for course in courses])
         
         return render_template('dashboard/teacher_dashboard.html', **context)
     else:
-        # 获取学生课程
-        courses = CourseService.get_courses_by_student(user_id)
-        context['courses'] = courses
-        
-        # 获取待完成作业
-        incomplete_assignments = AssignmentService.get_student_assignments(user_id, completed=False)
-        context['incomplete_assignments'] = incomplete_assignments
-        
-        # 获取学习活动摘要
-        activity_summary = AnalyticsService.get_student_activity_summary(user_id)
-        context['activity_summary'] = activity_summary
-        
-        # 获取学习问题警报
-        learning_issues = AnalyticsService.detect_learning_issues(user_id)
-        context['learning_issues'] = learning_issues
+        # 课程、待完成作业、活动摘要和学习问题由一次调用读取（按学生缓存）
+        context.update(DashboardService.get_student_dashboard(user_id))
         
         return render_template('dashboard/student_dashboard.html', **context)
 
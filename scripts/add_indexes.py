@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Add the indexes declared on the models to an existing database.
+
+New databases get them from scripts.create_tables. Run this once after
+upgrading an existing database, e.g. for the assignment (course_id, due_date)
+index the teacher dashboard reads recent assignments with. Every index is
+created with CREATE INDEX IF NOT EXISTS, so running it again is harmless:
+
+    python -m scripts.add_indexes
+"""
+
+import argparse
+
+from app import create_app
+from app.ext import db
+from app.models.assignment import Assignment
+
+# 模型上声明、升级已有数据库时可能缺少的索引
+MODELS = [Assignment]
+
+
+def add_indexes(models):
+    added = []
+    for model in models:
+        table = model._meta.table_name
+        existing = {index.name for index in db.get_indexes(table)}
+        model._schema.create_indexes(safe=True)
+        added += [index.name for index in db.get_indexes(table) if index.name not in existing]
+    return added
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+
+    create_app()
+    added = add_indexes(MODELS)
+    print(f"Added indexes: {', '.join(added)}" if added else "All indexes already exist")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure learning activity ingestion throughput.
+
+Compares one LearningActivity.create per event (the old /analytics/record-activity
+path) with the spooled ActivityBuffer flushed by bulk inserts, and prints the
+sustained events per second of both. Rows are written inside a rolled back
+transaction, so the per-event numbers exclude the commit each request used to pay:
+
+    python -m scripts.benchmarks.benchmark_activity_ingestion
+    python -m scripts.benchmarks.benchmark_activity_ingestion --events 50000 --request-size 20
+"""
+
+import argparse
+import tempfile
+import time
+
+from app import create_app
+from app.services.analytics_service import AnalyticsService
+from app.utils.activity_buffer import ActivityBuffer
+from scripts.benchmarks.common import ACTIVITY_TYPES, rolled_back, seed_course
+
+
+def make_events(count, course_id, kp_ids):
+    return [{
+        "course_id": course_id,
+        "activity_type": ACTIVITY_TYPES[i % len(ACTIVITY_TYPES)],
+        "duration": 30,
+        "knowledge_point_id": kp_ids[i % len(kp_ids)],
+        "metadata": {"page_url": f"/courses/{course_id}", "position": i},
+    } for i in range(count)]
+
+
+def per_event(student_id, events):
+    for event in events:
+        AnalyticsService.record_learning_activity(student_id=student_id, **event)
+
+
+def buffered(student_id, events, request_size, max_size, spool_directory):
+    """Submits request_size events per request and flushes every max_size events."""
+    buffer = ActivityBuffer(spool_directory, max_size=max_size, background=False)
+    pending = 0
+    for start in range(0, len(events), request_size):
+        pending += AnalyticsService.enqueue_learning_activities(
+            student_id, events[start:start + request_size], buffer=buffer)
+        if pending >= max_size:
+            buffer.flush()
+            pending = 0
+    buffer.flush()
+    return buffer.metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--request-size", type=int, default=1, help="events per request (1 = single beacons)")
+    parser.add_argument("--max-size", type=int, default=500, help="buffer flush threshold")
+    parser.add_argument("--legacy-events", type=int, default=2000, help="events for the per-event path")
+    args = parser.parse_args()
+
+    create_app()
+    with rolled_back():
+        course_id, student_ids, kp_ids = seed_course(1, n_knowledge_points=10, activities_per_student=0)
+        student_id = student_ids[0]
+
+        events = make_events(args.legacy_events, course_id, kp_ids)
+        started = time.perf_counter()
+        per_event(student_id, events)
+        elapsed = time.perf_counter() - started
+        print(f"per-event create : {len(events) / elapsed:>10.0f} events/s ({len(events)} events)")
+
+        events = make_events(args.events, course_id, kp_ids)
+        with tempfile.TemporaryDirectory() as spool_directory:
+            started = time.perf_counter()
+            metrics = buffered(student_id, events, args.request_size, args.max_size, spool_directory)
+            elapsed = time.perf_counter() - started
+        print(f"buffered insert  : {len(events) / elapsed:>10.0f} events/s ({metrics['inserted']} events, "
+              f"{metrics['flushes']} flushes, {metrics['avg_flush_time'] * 1000:.1f} ms/flush)")
+
+
+if __name__ == "__main__":
+    main()
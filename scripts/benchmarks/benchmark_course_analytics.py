@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare the per-student course analytics loop with the course-level queries.
+
+Seeds a synthetic course per size in a rolled back transaction and reports the
+wall time and SQL statement count of both paths:
+
+    python -m scripts.benchmarks.benchmark_course_analytics
+    python -m scripts.benchmarks.benchmark_course_analytics --sizes 50 500 --legacy-limit 500
+"""
+
+import argparse
+
+from app import create_app
+from app.services.analytics_service import AnalyticsService
+from scripts.benchmarks.common import measure, rolled_back, seed_course
+
+
+def per_student_path(course_id, student_ids):
+    """What /analytics/course/<id> used to do: two service calls per enrolled student."""
+    masteries = {sid: AnalyticsService.get_student_knowledge_mastery(sid, course_id) for sid in student_ids}
+    activity = {sid: AnalyticsService.get_student_activity_summary(sid, course_id) for sid in student_ids}
+    return masteries, activity
+
+
+def course_path(course_id):
+    return (AnalyticsService.get_course_mastery_matrix(course_id),
+            AnalyticsService.get_course_activity_summary(course_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="*", type=int, default=[50, 500, 5000])
+    parser.add_argument("--knowledge-points", type=int, default=20)
+    parser.add_argument("--activities", type=int, default=20, help="activities per student")
+    parser.add_argument("--legacy-limit", type=int, default=None,
+                        help="skip the per-student path above this many students")
+    args = parser.parse_args()
+
+    create_app()
+    print(f"{'students':>8} {'path':<12} {'ms':>10} {'queries':>8}")
+    for size in args.sizes:
+        with rolled_back():
+            course_id, student_ids, _ = seed_course(size, args.knowledge_points, args.activities)
+            if args.legacy_limit is None or size <= args.legacy_limit:
+                _, elapsed, queries = measure(per_student_path, course_id, student_ids)
+                print(f"{size:>8} {'per-student':<12} {elapsed:>10.1f} {queries:>8}")
+            _, elapsed, queries = measure(course_path, course_id)
+            print(f"{size:>8} {'course-level':<12} {elapsed:>10.1f} {queries:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare per-row mastery updates with AnalyticsService.bulk_update_mastery.
+
+Applies one (student, knowledge point, delta) update per student and knowledge
+point of a synthetic course, first with the former get_or_create / clamp / save
+loop and then with the bulk upsert. Everything runs in a rolled back transaction:
+
+    python -m scripts.benchmarks.benchmark_mastery_updates
+    python -m scripts.benchmarks.benchmark_mastery_updates --students 500 --knowledge-points 20
+"""
+
+import argparse
+import datetime
+import random
+
+from app import create_app
+from app.models.learning_data import StudentKnowledgePoint
+from app.services.analytics_service import AnalyticsService
+from scripts.benchmarks.common import measure, rolled_back, seed_course
+
+
+def legacy_update(updates):
+    """The former update_knowledge_mastery, one call per update."""
+    for student_id, knowledge_point_id, delta in updates:
+        record, _ = StudentKnowledgePoint.get_or_create(
+            student_id=student_id,
+            knowledge_point_id=knowledge_point_id,
+            defaults={'mastery_level': 0.0}
+        )
+        record.mastery_level = max(0.0, min(1.0, record.mastery_level + delta))
+        record.last_interaction = datetime.datetime.now()
+        record.save()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--knowledge-points", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    create_app()
+    rng = random.Random(7)
+    with rolled_back():
+        _, student_ids, kp_ids = seed_course(args.students, args.knowledge_points, activities_per_student=0)
+        updates = [(sid, kp, rng.uniform(-0.2, 0.2)) for sid in student_ids for kp in kp_ids]
+
+        _, elapsed, queries = measure(legacy_update, updates)
+        print(f"per-row loop : {len(updates):>7} updates {elapsed:>9.1f} ms {queries:>7} queries")
+        _, elapsed, queries = measure(AnalyticsService.bulk_update_mastery, updates, args.batch_size)
+        print(f"bulk upsert  : {len(updates):>7} updates {elapsed:>9.1f} ms {queries:>7} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Measure import cost per module and the time to create the Flask app.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` so the
+numbers are cold-start costs and do not depend on import order:
+
+    python -m scripts.benchmarks.benchmark_startup
+    python -m scripts.benchmarks.benchmark_startup --repeat 5 app.services.analytics_service
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+MODULES = [
+    "app",
+    "app.ext",
+    "app.models.learning_data",
+    "app.react.tools_register",
+    "app.services.analytics_service",
+    "app.services.assignment_service",
+    "app.services.course_service",
+    "app.services.knowledge_base_service",
+    "app.views.analytics",
+    "app.views.ai_assistant",
+    "app.react.agent",
+    "pandas",
+    "chromadb",
+]
+
+CREATE_APP = "from app import create_app; create_app()"
+
+
+def import_cost(module):
+    """Return (cumulative import time in ms, list of heavy third-party modules pulled in)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, []
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if parts[1].isdigit():
+            cumulative[parts[2]] = int(parts[1])
+    heavy = sorted(name for name in ("pandas", "numpy", "chromadb", "openai", "pydantic", "httpx")
+                   if name in cumulative)
+    return cumulative.get(module, 0) / 1000, heavy
+
+
+def wall_time(code):
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'module':<40} {'import ms (median)':>20}  heavy dependencies loaded")
+    for module in args.modules:
+        samples, heavy = [], []
+        for _ in range(args.repeat):
+            cost, heavy = import_cost(module)
+            if cost is None:
+                break
+            samples.append(cost)
+        if not samples:
+            print(f"{module:<40} {'import failed':>20}")
+            continue
+        print(f"{module:<40} {statistics.median(samples):>20.1f}  {', '.join(heavy) or '-'}")
+
+    try:
+        samples = [wall_time(CREATE_APP) for _ in range(args.repeat)]
+        print(f"\n{'create_app() wall time':<40} {statistics.median(samples):>20.1f}")
+    except subprocess.CalledProcessError as e:
+        print(f"\ncreate_app() failed: {e.stderr.decode(errors='replace').strip().splitlines()[-1]}")
+
+
+if __name__ == "__main__":
+    main()
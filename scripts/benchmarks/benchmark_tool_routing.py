@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Compare agent prompts with the full tool catalog and with routed (top-k) tools.
+
+Reports, per role and query, the first-iteration prompt size in tokens and the
+tool routing time, plus the largest prompt any routed selection can produce
+(the TOOL_ROUTING_TOP_K longest tool descriptions), which does not depend on the
+embedding model. Tokens are counted with tiktoken's cl100k_base encoding when it
+is available, otherwise estimated (one token per CJK character, four characters
+per token for other text). With --llm it also sends both prompts to the
+configured LLM provider and reports the response latency:
+
+    python -m scripts.benchmarks.benchmark_tool_routing
+    python -m scripts.benchmarks.benchmark_tool_routing --llm --roles teacher
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from app import create_app
+from app.config import Config
+from app.react.agent import Agent
+from app.react.tool_retriever import get_retriever, select_tools
+from app.react.tools_register import get_tools
+
+QUERIES = [
+    "我最近的学习情况怎么样？有哪些知识点掌握得不好？",
+    "帮我看看这门课还有哪些作业没有交",
+    "统计一下我教的课程里每个学生的平均成绩",
+    "给学号为7的学生的第3次作业打90分",
+    "我都选了哪些课程？",
+]
+
+
+_CJK = re.compile(r"[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]")
+
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tokens", lambda text: len(encoding.encode(text))
+    except Exception:
+        def estimate(text):
+            cjk = len(_CJK.findall(text))
+            return cjk + round((len(text) - cjk) / 4)
+        return "est. tokens", estimate
+
+
+def build_prompt(agent, query):
+    return agent.template.format(query=query, history="", tools=agent.format_tools(), user_info="{}")
+
+
+def make_agent(tools):
+    agent = Agent(model=None)
+    for name, tool in tools.items():
+        agent.register(name, tool['function'], tool['description'])
+    return agent
+
+
+def time_llm(agent, prompt, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        agent.ask_llm(prompt)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", nargs="*", default=["student", "teacher", "admin"])
+    parser.add_argument("--llm", action="store_true", help="also measure LLM latency for both prompts")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    create_app()
+    unit, count = token_counter()
+    for role in args.roles:
+        catalog = get_tools(role)
+        started = time.perf_counter()
+        try:
+            get_retriever(catalog)
+            print(f"\n== {role}: {len(catalog)} tools, catalog embedded in {(time.perf_counter() - started) * 1000:.0f} ms")
+        except Exception as e:
+            print(f"\n== {role}: {len(catalog)} tools, embedding model unavailable ({e}), routing falls back to all tools")
+
+        full_agent = make_agent(catalog)
+        longest = sorted(catalog, key=lambda name: len(catalog[name]['description']), reverse=True)
+        bound_agent = make_agent({name: catalog[name] for name in longest[:Config.TOOL_ROUTING_TOP_K]})
+        full_tokens = count(build_prompt(full_agent, QUERIES[0]))
+        bound_tokens = count(build_prompt(bound_agent, QUERIES[0]))
+        print(f"full catalog {full_tokens} {unit}, any top-{Config.TOOL_ROUTING_TOP_K} selection at most "
+              f"{bound_tokens} {unit} ({1 - bound_tokens / full_tokens:.1%} smaller)")
+
+        reductions = []
+        for query in QUERIES:
+            started = time.perf_counter()
+            routed = select_tools(query, catalog)
+            routing_ms = (time.perf_counter() - started) * 1000
+            routed_agent = make_agent(routed)
+
+            full_prompt = build_prompt(full_agent, query)
+            routed_prompt = build_prompt(routed_agent, query)
+            reduction = 1 - count(routed_prompt) / count(full_prompt)
+            reductions.append(reduction)
+            line = (f"{query[:24]:<26} tools {len(catalog):>2} -> {len(routed):>2}  "
+                    f"prompt {count(full_prompt):>6} -> {count(routed_prompt):>6} {unit} ({reduction:>5.1%})  "
+                    f"routing {routing_ms:>5.1f} ms")
+            if args.llm:
+                full_ms = time_llm(full_agent, full_prompt, args.repeat)
+                routed_ms = time_llm(routed_agent, routed_prompt, args.repeat)
+                line += f"  llm {full_ms:>6.0f} -> {routed_ms:>6.0f} ms"
+            print(line)
+        print(f"mean prompt reduction: {statistics.mean(reductions):.1%}")
+
+
+if __name__ == "__main__":
+    main()
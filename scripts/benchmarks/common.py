@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Helpers shared by the database benchmarks.
+
+Benchmarks seed synthetic data inside a transaction that is rolled back at the
+end, so they can run against a development database without leaving rows behind.
+"""
+
+import contextlib
+import datetime
+import logging
+import random
+import time
+import uuid
+
+from app.ext import db
+from app.models.user import User
+from app.models.course import Course, StudentCourse
+from app.models.learning_data import KnowledgePoint, StudentKnowledgePoint, LearningActivity
+
+ACTIVITY_TYPES = ["视频观看", "作业完成", "测验", "阅读资料", "讨论参与"]
+CHUNK_SIZE = 1000
+
+
+class QueryCounter(logging.Handler):
+    """Counts the SQL statements peewee executes while active."""
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.count = 0
+
+    def emit(self, record):
+        self.count += 1
+
+    def __enter__(self):
+        self.logger = logging.getLogger("peewee")
+        self.previous_level = self.logger.level
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.logger.removeHandler(self)
+        self.logger.setLevel(self.previous_level)
+
+
+def measure(func, *args, **kwargs):
+    """Run func and return (result, elapsed ms, number of SQL statements)."""
+    with QueryCounter() as counter:
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = (time.perf_counter() - started) * 1000
+    return result, elapsed, counter.count
+
+
+@contextlib.contextmanager
+def rolled_back():
+    """Run the block in a transaction that is always rolled back."""
+    with db.atomic() as transaction:
+        try:
+            yield
+        finally:
+            transaction.rollback()
+
+
+def insert_chunked(model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        model.insert_many(rows[start:start + CHUNK_SIZE]).execute()
+
+
+def seed_course(n_students, n_knowledge_points=20, activities_per_student=20, days=30, seed=42):
+    """Create a course with enrolled students, mastery rows and recent learning activities.
+
+    Returns:
+        tuple: (course id, list of student ids, list of knowledge point ids)
+    """
+    rng = random.Random(seed)
+    tag = uuid.uuid4().hex[:8]
+    now = datetime.datetime.now()
+
+    teacher = User.create(username=f"bench_t_{tag}", email=f"bench_t_{tag}@example.com",
+                          password_hash="-", name="Benchmark Teacher")
+    course = Course.create(name=f"Benchmark {tag}", code=f"B{tag}", teacher=teacher)
+    kp_ids = [KnowledgePoint.create(name=f"KP {i}", course=course).id for i in range(n_knowledge_points)]
+
+    insert_chunked(User, [
+        {"username": f"bench_s_{tag}_{i}", "email": f"bench_s_{tag}_{i}@example.com",
+         "password_hash": "-", "name": f"Student {i}"}
+        for i in range(n_students)
+    ])
+    student_ids = [user_id for (user_id,) in
+                   User.select(User.id).where(User.username.startswith(f"bench_s_{tag}_")).tuples()]
+
+    insert_chunked(StudentCourse, [{"student": sid, "course": course.id} for sid in student_ids])
+    insert_chunked(StudentKnowledgePoint, [
+        {"student": sid, "knowledge_point": kp, "mastery_level": rng.random(), "last_interaction": now}
+        for sid in student_ids for kp in kp_ids
+    ])
+    insert_chunked(LearningActivity, [
+        {"student": sid, "course": course.id, "knowledge_point": rng.choice(kp_ids),
+         "activity_type": rng.choice(ACTIVITY_TYPES), "duration": rng.randint(60, 3600),
+         "timestamp": now - datetime.timedelta(seconds=rng.randint(0, days * 86400))}
+        for sid in student_ids for _ in range(activities_per_student)
+    ])
+    return course.id, student_ids, kp_ids
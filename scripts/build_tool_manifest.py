@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Build the prebuilt tool manifest used by app.react.tools_register.
+
+With the manifest present the agent lists its tools without importing the
+service modules; a module is imported when one of its tools is executed.
+The manifest records a hash of the tool module sources; when a tool module
+changes the stale manifest is ignored (with a warning) until this script is re-run:
+
+    python -m scripts.build_tool_manifest
+"""
+
+import json
+import os
+
+from app import create_app
+from app.react.tools_register import TOOL_MANIFEST_PATH, build_manifest
+
+
+def main():
+    create_app()
+    manifest = build_manifest()
+    os.makedirs(os.path.dirname(TOOL_MANIFEST_PATH), exist_ok=True)
+    with open(TOOL_MANIFEST_PATH, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    print(f"Wrote {len(manifest['tools'])} tools to {TOOL_MANIFEST_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""创建agent的SQL工具（app/react/tools/sql.py）使用的只读数据库角色。
+
+需要使用有CREATEROLE权限的账号（.env中的DATABASE_USER）运行：
+    python -m scripts.create_readonly_role
+"""
+from psycopg2 import sql
+
+from app import create_app
+from app.config import Config
+from app.models.base import db
+from app.react.tools.sql import HIDDEN_COLUMNS, all_models
+
+app = create_app()
+
+role = sql.Identifier(Config.SQL_TOOL_DATABASE_USER)
+database = sql.Identifier(db.database)
+
+statements = [
+    sql.SQL("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT FROM pg_roles WHERE rolname = {name}) THEN
+                CREATE ROLE {role} LOGIN PASSWORD {password};
+            END IF;
+        END
+        $$
+    """).format(name=sql.Literal(Config.SQL_TOOL_DATABASE_USER), role=role,
+                password=sql.Literal(Config.SQL_TOOL_DATABASE_PASSWORD)),
+    sql.SQL("ALTER ROLE {role} SET default_transaction_read_only = on").format(role=role),
+    sql.SQL("ALTER ROLE {role} SET statement_timeout = {timeout}").format(
+        role=role, timeout=sql.Literal(Config.SQL_TOOL_STATEMENT_TIMEOUT_MS)),
+    sql.SQL("GRANT CONNECT ON DATABASE {database} TO {role}").format(database=database, role=role),
+    sql.SQL("GRANT USAGE ON SCHEMA public TO {role}").format(role=role),
+    sql.SQL("GRANT SELECT ON ALL TABLES IN SCHEMA public TO {role}").format(role=role),
+    sql.SQL("ALTER DEFAULT PRIVILEGES IN SCHEMA public GRANT SELECT ON TABLES TO {role}").format(role=role),
+]
+
+# 含隐藏列的表只授予其余列的列级权限
+models = {model._meta.table_name: model for model in all_models()}
+for table in {table for table, _ in HIDDEN_COLUMNS}:
+    hidden = {column for t, column in HIDDEN_COLUMNS if t == table}
+    model = models[table]
+    visible = [field.column_name for field in model._meta.sorted_fields if field.column_name not in hidden]
+    statements.append(sql.SQL("REVOKE SELECT ON {table} FROM {role}").format(
+        table=sql.Identifier(table), role=role))
+    statements.append(sql.SQL("GRANT SELECT ({columns}) ON {table} TO {role}").format(
+        columns=sql.SQL(", ").join(map(sql.Identifier, visible)), table=sql.Identifier(table), role=role))
+
+with db.atomic():
+    for statement in statements:
+        db.execute_sql(statement.as_string(db.connection()))
+
+print(f"只读角色 {Config.SQL_TOOL_DATABASE_USER} 已就绪")
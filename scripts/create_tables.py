@@ -8,6 +8,7 @@ from app.models.knowledge_base import *
 from app.models.chat import *
 
 from app import create_app
+from app.services.partition_service import PartitionService
 
 app = create_app()
 
@@ -16,6 +17,8 @@ tables = [
             Course, StudentCourse,
             Assignment, StudentAssignment,
             LearningActivity, KnowledgePoint, StudentKnowledgePoint, AssignmentKnowledgePoint, KnowledgeBaseKnowledgePoint,
+            DailyActivityRollup, RollupWatermark, LearningIssue, CohortSketch, RiskScore,
+            ItemStatistic, LearningEvent, EventConsumerOffset,
             KnowledgeBase,
             Chat, ChatMessage
         ]
@@ -25,4 +28,14 @@ tables = [
 #db.drop_tables([StudentAssignment])
 #db.create_tables([StudentAssignment])
 #db.create_tables([AssignmentKnowledgePoint, KnowledgeBaseKnowledgePoint])
-# db.create_tables([Chat, ChatMessage])
\ No newline at end of file
+# db.create_tables([Chat, ChatMessage])
+
+
+def create_tables():
+    # 学习活动表按月分区，由PartitionService单独创建
+    db.create_tables([table for table in tables if table is not LearningActivity])
+    PartitionService.create_activity_table()
+
+
+if __name__ == "__main__":
+    create_tables()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Export a course's learning activities, mastery or assignment submissions.
+
+Rows are read with a server-side cursor and written in chunks, so memory use
+does not depend on the size of the export:
+
+    python -m scripts.export_course_data --course-id 3 --dataset activities --output activities.csv
+    python -m scripts.export_course_data --course-id 3 --dataset mastery --format parquet --output mastery.parquet
+    python -m scripts.export_course_data --course-id 3 --dataset activities --start 2025-03-01 --end 2025-03-31 > march.csv
+"""
+
+import argparse
+import sys
+import time
+from datetime import date
+
+from app import create_app
+from app.services.export_service import ExportService, DATASET_COLUMNS, EXPORT_CHUNK_SIZE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--course-id", type=int, required=True)
+    parser.add_argument("--dataset", choices=sorted(DATASET_COLUMNS), required=True)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="first day to export (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="last day to export (YYYY-MM-DD)")
+    parser.add_argument("--output", default=None, help="output file; CSV goes to stdout if omitted")
+    parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    create_app()
+    started = time.perf_counter()
+    if args.format == "parquet":
+        if not args.output:
+            parser.error("--output is required for parquet")
+        count = ExportService.write_parquet(args.dataset, args.course_id, args.output,
+                                            args.start, args.end, args.chunk_size)
+        print(f"Wrote {count} rows to {args.output} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        return
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in ExportService.stream_csv(args.dataset, args.course_id, args.start, args.end, args.chunk_size):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+    print(f"Exported {args.dataset} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
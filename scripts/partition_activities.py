@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Maintain the monthly partitions of the learningactivity table.
+
+Run daily (e.g. from cron) to create the partitions for the coming months and,
+when ACTIVITY_RETENTION_MONTHS is set, archive and drop expired partitions.
+--migrate converts an existing unpartitioned table once, in a maintenance window:
+
+    python -m scripts.partition_activities
+    python -m scripts.partition_activities --retention-months 24 --archive-dir data/archive
+    python -m scripts.partition_activities --migrate
+"""
+
+import argparse
+
+from app import create_app
+from app.config import Config
+from app.services.partition_service import PartitionService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--migrate", action="store_true", help="convert an existing unpartitioned table")
+    parser.add_argument("--months-ahead", type=int, default=Config.ACTIVITY_PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--retention-months", type=int, default=Config.ACTIVITY_RETENTION_MONTHS,
+                        help="drop partitions older than this many months, 0 keeps everything")
+    parser.add_argument("--archive-dir", default=Config.ACTIVITY_ARCHIVE_DIRECTORY,
+                        help="export partitions to gzipped CSV here before dropping them")
+    args = parser.parse_args()
+
+    create_app()
+    if args.migrate:
+        PartitionService.migrate_existing_table(months_ahead=args.months_ahead)
+    for name in PartitionService.ensure_partitions(months_ahead=args.months_ahead):
+        print(f"Created {name}")
+    if args.retention_months > 0:
+        for name in PartitionService.apply_retention(args.retention_months, args.archive_dir or None):
+            print(f"Dropped {name}")
+    print(f"Partitions: {', '.join(PartitionService.list_partitions().values())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Rebuild the cohort quantile sketches from the current scores and mastery.
+
+Sketches are updated on grade and mastery writes and rebuilt lazily when they
+go stale, so this is only needed after bulk imports or a change of
+COHORT_SKETCH_K:
+
+    python -m scripts.refresh_cohort_sketches
+    python -m scripts.refresh_cohort_sketches --course-id 3
+"""
+
+import argparse
+import time
+
+from app import create_app
+from app.models.assignment import Assignment
+from app.models.course import Course
+from app.services.cohort_service import CohortService, COURSE_MASTERY, ASSIGNMENT_SCORE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--course-id", type=int, default=None, help="only rebuild this course and its assignments")
+    args = parser.parse_args()
+
+    create_app()
+    started = time.perf_counter()
+    course_ids = [args.course_id] if args.course_id else [course_id for (course_id,) in Course.select(Course.id).tuples()]
+    assignment_ids = [assignment_id for (assignment_id,) in
+                      Assignment.select(Assignment.id).where(Assignment.course_id.in_(course_ids)).tuples()]
+    for course_id in course_ids:
+        CohortService.rebuild(COURSE_MASTERY, course_id)
+    for assignment_id in assignment_ids:
+        CohortService.rebuild(ASSIGNMENT_SCORE, assignment_id)
+    print(f"Rebuilt {len(course_ids)} course and {len(assignment_ids)} assignment sketches "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
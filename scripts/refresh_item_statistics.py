@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Recompute assignment and knowledge point difficulty statistics.
+
+Builds a student x assignment score matrix per course from all graded
+submissions and stores difficulty, score variance and discrimination for every
+assignment and knowledge point in item_statistics. The item_statistics event
+consumer keeps graded courses up to date; run this after importing grades:
+
+    python -m scripts.refresh_item_statistics
+    python -m scripts.refresh_item_statistics --course-id 3
+"""
+
+import argparse
+import time
+
+from app import create_app
+from app.services.item_statistics_service import ItemStatisticsService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--course-id", type=int, default=None, help="only refresh this course")
+    args = parser.parse_args()
+
+    create_app()
+    started = time.perf_counter()
+    count = ItemStatisticsService.refresh(args.course_id)
+    print(f"Stored {count} statistics in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
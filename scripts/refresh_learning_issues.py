@@ -0,0 +1,34 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Refresh the issues snapshot read by the dashboards.
+
+Detects low mastery, overdue assignments and inactivity for every enrolled
+student with a few set-based queries. Run it on a schedule (e.g. hourly from
+cron), after scripts.rollup_activities:
+
+    python -m scripts.refresh_learning_issues
+    python -m scripts.refresh_learning_issues --course-id 3
+"""
+
+import argparse
+import time
+
+from app import create_app
+from app.services.learning_issue_service import LearningIssueService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--course-id", type=int, default=None, help="only refresh this course")
+    parser.add_argument("--threshold", type=float, default=0.5, help="mastery below this is an issue")
+    parser.add_argument("--inactive-days", type=int, default=7)
+    args = parser.parse_args()
+
+    create_app()
+    started = time.perf_counter()
+    count = LearningIssueService.refresh_snapshot(args.course_id, args.threshold, args.inactive_days)
+    print(f"Stored {count} issues in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,10 @@ from app.models.learning_data import *
 from app.models.knowledge_base import *
 from app.models.chat import *
 
-from scripts.create_tables import tables
+from scripts.create_tables import tables, create_tables
 
 db.drop_tables(tables)
-db.create_tables(tables)
+create_tables()
 
 from app.services.user_service import UserService
 
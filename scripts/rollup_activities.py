@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Maintain the daily_activity_rollup table read by the analytics views.
+
+Run periodically (e.g. every minute from cron) to roll up activities recorded
+since the last run; use --rebuild after importing or correcting historical
+activities. After upgrading an existing database run it once with --migrate,
+which adds the learningactivity.inserted_at column the safety lag is based on:
+
+    python -m scripts.rollup_activities
+    python -m scripts.rollup_activities --rebuild
+    python -m scripts.rollup_activities --migrate
+"""
+
+import argparse
+import time
+
+from app import create_app
+from app.services.activity_rollup_service import ActivityRollupService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rebuild", action="store_true", help="truncate the rollup and recompute it from scratch")
+    parser.add_argument("--migrate", action="store_true", help="add the inserted_at column if it is missing")
+    parser.add_argument("--batch-size", type=int, default=None, help="activity ids per transaction")
+    args = parser.parse_args()
+
+    create_app()
+    if args.migrate and ActivityRollupService.add_inserted_at_column():
+        print("Added learningactivity.inserted_at column")
+    started = time.perf_counter()
+    if args.rebuild:
+        advanced = ActivityRollupService.rebuild(batch_size=args.batch_size)
+    else:
+        advanced = ActivityRollupService.catch_up(batch_size=args.batch_size)
+    print(f"Rolled up {advanced} activity ids in {time.perf_counter() - started:.1f}s, "
+          f"watermark {ActivityRollupService.get_watermark()}")
+
+
+if __name__ == "__main__":
+    main()
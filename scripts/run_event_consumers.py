@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Run the learning event consumers, show their lag or replay them.
+
+Learning activities, submissions and grades are appended to learning_events;
+each consumer keeps its own offset and processes new events in batches. Run
+once from cron, or keep it running with --loop:
+
+    python -m scripts.run_event_consumers
+    python -m scripts.run_event_consumers --loop --interval 5
+    python -m scripts.run_event_consumers --consumer risk_rescore
+    python -m scripts.run_event_consumers --lag
+    python -m scripts.run_event_consumers --consumer risk_rescore --replay 0
+    python -m scripts.run_event_consumers --prune
+"""
+
+import argparse
+import time
+
+from app import create_app
+from app.services.event_service import EventService
+import app.services.event_consumers  # noqa: F401  registers the built-in consumers
+
+
+def print_lag(names):
+    for name, lag in EventService.lag(names).items():
+        print(f"{name}: offset={lag['offset']} head={lag['head']} pending={lag['pending']} "
+              f"lag={lag['lag_seconds']:.0f}s processed={lag['processed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--consumer", action="append", choices=EventService.consumers(),
+                        help="only run this consumer (repeatable, default all)")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--loop", action="store_true", help="keep consuming until interrupted")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls with --loop")
+    parser.add_argument("--lag", action="store_true", help="print consumer lag and exit")
+    parser.add_argument("--replay", type=int, default=None, metavar="OFFSET",
+                        help="move the offsets of the given consumers back to OFFSET and exit")
+    parser.add_argument("--prune", action="store_true",
+                        help="delete consumed events older than EVENT_RETENTION_DAYS and exit")
+    args = parser.parse_args()
+
+    create_app()
+    if args.lag:
+        print_lag(args.consumer)
+        return
+    if args.replay is not None:
+        if not args.consumer:
+            parser.error("--replay needs --consumer")
+        for name in args.consumer:
+            EventService.replay(name, args.replay)
+        print_lag(args.consumer)
+        return
+    if args.prune:
+        print(f"Deleted {EventService.prune()} events")
+        return
+
+    while True:
+        started = time.perf_counter()
+        results = EventService.run(args.consumer, args.batch_size)
+        processed = ", ".join(f"{name}={count}" for name, count in results.items())
+        print(f"Processed {processed} in {time.perf_counter() - started:.1f}s")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
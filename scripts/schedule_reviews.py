@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Recompute StudentKnowledgePoint.review_due_at from the forgetting curve.
+
+Mastery updates keep review_due_at current on their own. Run this once after
+upgrading an existing database (--migrate adds the column and its index), after
+importing mastery data, or after changing MASTERY_HALF_LIFE_DAYS or
+REVIEW_TARGET_RETENTION:
+
+    python -m scripts.schedule_reviews --migrate
+    python -m scripts.schedule_reviews --course-id 3
+"""
+
+import argparse
+import time
+
+from playhouse.migrate import PostgresqlMigrator, migrate
+
+from app import create_app
+from app.ext import db
+from app.models.learning_data import StudentKnowledgePoint
+from app.services.analytics_service import AnalyticsService
+
+
+def add_review_column():
+    table = StudentKnowledgePoint._meta.table_name
+    if "review_due_at" in {column.name for column in db.get_columns(table)}:
+        return False
+    migrator = PostgresqlMigrator(db)
+    with db.atomic():
+        migrate(
+            migrator.add_column(table, "review_due_at", StudentKnowledgePoint.review_due_at),
+            migrator.add_index(table, ("student_id", "review_due_at"), False),
+        )
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--migrate", action="store_true", help="add the review_due_at column if it is missing")
+    parser.add_argument("--course-id", type=int, default=None, help="only reschedule this course")
+    args = parser.parse_args()
+
+    create_app()
+    if args.migrate and add_review_column():
+        print("Added review_due_at column and index")
+    started = time.perf_counter()
+    count = AnalyticsService.reschedule_reviews(args.course_id)
+    print(f"Rescheduled {count} reviews in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
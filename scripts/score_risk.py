@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Score every active enrollment for learning risk and store ranked lists.
+
+Extracts mastery, activity and submission features per student and course in
+bulk, scores them with the logistic model (RISK_MODEL_PATH or the built-in
+weights) and replaces the risk_scores rows read by the teacher dashboard.
+Run it nightly, after scripts.rollup_activities; use --processes to score
+chunks of courses in parallel on large installations:
+
+    python -m scripts.score_risk
+    python -m scripts.score_risk --processes 8
+    python -m scripts.score_risk --course-id 3
+"""
+
+import argparse
+import time
+
+from app import create_app
+from app.services.risk_service import RiskService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--course-id", type=int, default=None, help="only score this course")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes for scoring course chunks")
+    parser.add_argument("--chunk-size", type=int, default=None,
+                        help="courses per chunk (default RISK_SCORE_CHUNK_COURSES)")
+    args = parser.parse_args()
+
+    create_app()
+    started = time.perf_counter()
+    count = RiskService.score_all(args.course_id, args.processes, args.chunk_size)
+    print(f"Scored {count} enrollments in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
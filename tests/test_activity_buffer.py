@@ -0,0 +1,52 @@
+import multiprocessing
+import os
+
+from app.utils.activity_buffer import ActivityBuffer, SPOOL_SUFFIX
+
+EVENT = {"student": 1, "course": 1, "activity_type": "测验", "duration": 30, "timestamp": "2026-01-05T10:00:00"}
+
+
+def _spool_and_die(spool_directory, ready, release):
+    buffer = ActivityBuffer(spool_directory, background=False)
+    buffer.add([EVENT, EVENT])
+    ready.set()
+    release.wait(10)
+    os._exit(1)
+
+
+def _segments(spool_directory):
+    return [name for name in os.listdir(spool_directory) if name.endswith(SPOOL_SUFFIX)]
+
+
+def test_recover_claims_only_segments_of_exited_workers(tmp_path):
+    context = multiprocessing.get_context("fork")
+    ready, release = context.Event(), context.Event()
+    worker = context.Process(target=_spool_and_die, args=(str(tmp_path), ready, release))
+    worker.start()
+    ready.wait(10)
+
+    # 写入者仍在运行时它的segment被锁住，不会被接管
+    buffer = ActivityBuffer(str(tmp_path), background=False)
+    assert buffer.recover() == 0
+
+    release.set()
+    worker.join(10)
+    assert buffer.recover() == 2
+    assert buffer.metrics()["pending"] == 2
+    # 另一个缓冲区（即使pid相同）也不能再接管同一个segment
+    assert ActivityBuffer(str(tmp_path), background=False).recover() == 0
+    buffer.close()
+
+
+def test_failed_flush_keeps_segments_for_retry(tmp_path):
+    buffer = ActivityBuffer(str(tmp_path), background=False)
+    buffer.add([EVENT, dict(EVENT, timestamp="not a date")])
+    # 数据库未初始化，插入抛出的不是DatabaseError
+    try:
+        buffer.flush()
+    except Exception:
+        pass
+    metrics = buffer.metrics()
+    assert metrics["pending"] == 2
+    assert metrics["failed_flushes"] == 1
+    assert len(_segments(tmp_path)) == 1
@@ -0,0 +1,33 @@
+from app.utils.cache import TTLCache
+
+
+def test_invalidating_a_key_discards_only_its_loads():
+    cache = TTLCache(ttl=60)
+
+    def load_a():
+        cache.invalidate_where(lambda key: key[0] == 1)
+        return "stale"
+
+    assert cache.get_or_load((1, 30), load_a) == "stale"
+    assert cache.get((1, 30)) is None
+
+    def load_b():
+        cache.invalidate((1, 30))
+        return "fresh"
+
+    assert cache.get_or_load((2, 30), load_b) == "fresh"
+    assert cache.get((2, 30)) == "fresh"
+
+
+def test_failed_load_is_not_left_in_progress():
+    cache = TTLCache(ttl=60)
+
+    def fail():
+        raise ValueError
+
+    try:
+        cache.get_or_load("key", fail)
+    except ValueError:
+        pass
+    assert cache.get_or_load("key", lambda: 1) == 1
+    assert cache.get("key") == 1
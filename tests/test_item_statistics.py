@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.services.item_statistics_service import compute_item_statistics
+
+
+def test_assignment_and_knowledge_point_statistics():
+    nan = np.nan
+    # 4 students x 3 assignments; assignment 2 separates strong and weak students, assignment 1 does not
+    scores = np.array([
+        [1.0, 0.5, 0.9],
+        [0.8, 0.5, 0.7],
+        [0.4, 0.5, 0.3],
+        [0.2, nan, 0.1],
+    ])
+    weights = np.array([
+        [1.0, 0.0],
+        [0.0, 1.0],
+        [1.0, 0.0],
+    ])
+    (count, mean, variance, discrimination), points = compute_item_statistics(scores, weights, min_students=3)
+
+    assert count.tolist() == [4, 3, 4]
+    np.testing.assert_allclose(mean, [0.6, 0.5, 0.5])
+    np.testing.assert_allclose(variance[1], 0.0)
+    assert discrimination[0] > 0.9 and discrimination[2] > 0.9
+    assert np.isnan(discrimination[1])  # constant scores have no correlation
+
+    point_count, point_mean, _, point_discrimination = points
+    assert point_count.tolist() == [4, 3]
+    np.testing.assert_allclose(point_mean, [0.55, 0.5])
+    assert np.isnan(point_discrimination[1])
+
+
+def test_too_few_students_for_discrimination():
+    scores = np.array([[1.0, 0.0], [0.0, 1.0]])
+    (count, _, _, discrimination), _ = compute_item_statistics(scores, np.zeros((2, 0)), min_students=5)
+    assert count.tolist() == [2, 2]
+    assert np.isnan(discrimination).all()
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.utils.llm.batching import BatchDispatcher
+from app.utils.llm.lm_studio import chat_lm_studio
+
+
+class StubCompletionHandler(BaseHTTPRequestHandler):
+    """OpenAI兼容的本地桩服务，回显最后一条消息。"""
+    requests_seen = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        StubCompletionHandler.requests_seen += 1
+        if body["messages"][-1]["content"] == "bad":
+            self.send_response(400)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        payload = json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "echo: " + body["messages"][-1]["content"]}
+            }]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCompletionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+
+
+def test_dispatcher_coalesces_concurrent_requests():
+    batches = []
+
+    def handler(items):
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    dispatcher = BatchDispatcher(handler, max_batch_size=8, window=0.05, max_concurrency=2)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(dispatcher.submit, range(16)))
+    dispatcher.close()
+
+    assert results == [i * 2 for i in range(16)]
+    assert len(batches) < 16
+    assert max(len(batch) for batch in batches) <= 8
+    metrics = dispatcher.metrics()
+    assert metrics["completed"] == 16
+    assert metrics["batches"] == len(batches)
+    assert metrics["queue_depth"] == 0
+
+
+def test_dispatcher_propagates_item_errors():
+    dispatcher = BatchDispatcher(lambda items: [ValueError("bad") if i < 0 else i for i in items], window=0.01)
+    assert dispatcher.submit(3) == 3
+    with pytest.raises(ValueError):
+        dispatcher.submit(-1)
+    dispatcher.close()
+    assert dispatcher.metrics()["failed"] == 1
+
+
+def test_close_with_full_queue_does_not_block():
+    release = threading.Event()
+
+    def handler(items):
+        release.wait(5)
+        return items
+
+    dispatcher = BatchDispatcher(handler, max_batch_size=1, max_concurrency=1, max_queue_size=2)
+    futures = [dispatcher.submit_async(0)]
+    time.sleep(0.2)  # 第一个请求已进入处理，之后的请求留在队列中
+    futures += [dispatcher.submit_async(i) for i in (1, 2)]
+    closer = threading.Thread(target=dispatcher.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+
+    assert not closer.is_alive()
+    assert [future.result(timeout=1) for future in futures] == [0, 1, 2]
+
+
+def test_lm_studio_requests_against_stub_server(stub_server):
+    StubCompletionHandler.requests_seen = 0
+    dispatcher = BatchDispatcher(lambda batch: [chat_lm_studio(messages, model="stub", base_url=stub_server)
+                                                for messages in batch],
+                                 max_batch_size=1, max_concurrency=2)
+    questions = [[{"role": "user", "content": f"q{i}"}] for i in range(10)]
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        answers = list(pool.map(lambda messages: dispatcher.submit(messages, timeout=10), questions))
+
+    assert answers == [f"echo: q{i}" for i in range(10)]
+    assert StubCompletionHandler.requests_seen == 10
+
+    # 请求失败时异常传给调用方并计入失败数
+    with pytest.raises(Exception):
+        dispatcher.submit([{"role": "user", "content": "bad"}], timeout=10)
+    dispatcher.close()
+    metrics = dispatcher.metrics()
+    assert metrics["completed"] == 10
+    assert metrics["failed"] == 1
@@ -0,0 +1,100 @@
+import numpy as np
+
+from app.services.mastery_engine import MasteryMatrix
+from app.utils.cache import TTLCache
+
+
+def make_matrix():
+    values = np.array([
+        [0.2, np.nan, 0.9],
+        [0.8, 0.4, np.nan],
+        [0.1, 0.3, 0.5],
+    ], dtype=np.float32)
+    return MasteryMatrix(1, np.array([10, 11, 12]), np.array([1, 2, 3]), {1: "a", 2: "b", 3: "c"}, values)
+
+
+def test_means_ignore_missing_entries():
+    matrix = make_matrix()
+    np.testing.assert_allclose(matrix.kp_means(), [1.1 / 3, 0.35, 0.7], rtol=1e-6)
+    np.testing.assert_allclose(matrix.student_means(), [0.55, 0.6, 0.3], rtol=1e-6)
+    np.testing.assert_allclose(matrix.kp_percentiles(50), [0.2, 0.35, 0.7], rtol=1e-6)
+
+
+def test_at_risk_students_and_rows():
+    matrix = make_matrix()
+    assert matrix.at_risk_students(0.5) == {10: [1], 11: [2], 12: [1, 2]}
+    assert matrix.at_risk_students(0.5, min_count=2) == {12: [1, 2]}
+    assert matrix.student_row(11) == {1: 0.800000011920929, 2: 0.4000000059604645}
+    assert matrix.student_row(99) == {}
+
+
+def test_similarity_is_symmetric_and_ranks_students():
+    matrix = make_matrix()
+    similarity = matrix.similarity()
+    np.testing.assert_allclose(similarity, similarity.T, rtol=1e-6)
+    np.testing.assert_allclose(np.diag(similarity), 1.0, rtol=1e-6)
+    assert [student for student, _ in matrix.similar_students(10, k=2)] == [12, 11]
+
+
+def test_empty_matrix():
+    matrix = MasteryMatrix(1, np.array([], dtype=np.int64), np.array([1, 2]), {},
+                           np.full((0, 2), np.nan, dtype=np.float32))
+    assert np.isnan(matrix.kp_means()).all()
+    assert matrix.at_risk_students() == {}
+    assert matrix.similarity().shape == (0, 0)
+
+
+def test_ttl_cache_discards_load_raced_by_invalidation():
+    cache = TTLCache(ttl=60)
+
+    def load():
+        cache.invalidate("course")
+        return "stale"
+
+    assert cache.get_or_load("course", load) == "stale"
+    assert cache.get("course") is None
+    assert cache.get_or_load("course", lambda: "fresh") == "fresh"
+    assert cache.get("course") == "fresh"
+
+
+def make_tree_matrix():
+    # 1 -> (2 -> 4, 3)
+    values = np.array([
+        [np.nan, np.nan, 0.6, 0.2],
+        [np.nan, 0.5, np.nan, np.nan],
+    ], dtype=np.float32)
+    return MasteryMatrix(1, np.array([10, 11]), np.array([1, 2, 3, 4]), {1: "ch", 2: "a", 3: "b", 4: "c"},
+                         values, kp_parents={1: None, 2: 1, 3: 1, 4: 2})
+
+
+def test_rollup_averages_observed_levels_in_each_subtree():
+    rollup = make_tree_matrix().rollup()
+    np.testing.assert_allclose(rollup[0], [0.4, 0.2, 0.6, 0.2], rtol=1e-6)
+    np.testing.assert_allclose(rollup[1, :2], [0.5, 0.5], rtol=1e-6)
+    assert np.isnan(rollup[1, 2:]).all()
+
+
+def test_set_levels_updates_rollup_incrementally():
+    matrix = make_tree_matrix()
+    matrix.rollup()
+    before = matrix.values
+    snapshot = before.copy()
+    assert matrix.set_levels([(10, 4, 0.8), (11, 3, 0.1)])
+    # 读取方持有的旧数组不被修改
+    np.testing.assert_array_equal(before, snapshot)
+    assert not matrix.set_levels([(99, 4, 0.5)])
+    fresh = MasteryMatrix(1, matrix.student_ids, matrix.kp_ids, matrix.kp_names,
+                          matrix.values.copy(), matrix.kp_parents).rollup()
+    np.testing.assert_allclose(matrix.rollup(), fresh, rtol=1e-6)
+
+
+def test_effective_mastery_halves_after_one_half_life():
+    matrix = make_matrix()
+    matrix.last_seen[:] = 0.0
+    matrix.last_seen[0, 0] = np.nan
+    np.testing.assert_allclose(matrix.effective(now=0.0), matrix.values, rtol=1e-6)
+    # 0.8的半衰期为7 × 1.8天
+    later = matrix.effective(now=7 * 1.8 * 86400)
+    np.testing.assert_allclose(later[1, 0], 0.4, rtol=1e-5)
+    assert later[0, 0] == np.float32(0.2)
+    assert np.isnan(later[0, 1])
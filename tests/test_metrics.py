@@ -0,0 +1,50 @@
+from app.utils.metrics import Histogram, MetricsRegistry, instrumented, record_query, registry
+
+
+def test_histogram_quantiles():
+    histogram = Histogram((10, 100, 1000))
+    for value in [5] * 90 + [50] * 9 + [500]:
+        histogram.observe(value)
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) <= 10
+    assert 10 < histogram.quantile(0.95) <= 100
+    assert histogram.quantile(1.0) == 500
+    assert Histogram((1,)).quantile(0.5) is None
+
+
+def test_instrumented_counts_nested_queries():
+    registry.reset()
+
+    @instrumented(name="test.inner")
+    def inner():
+        record_query(3)
+
+    @instrumented(name="test.outer")
+    def outer():
+        record_query(10)
+        inner()
+        return "done"
+
+    assert outer() == "done"
+    calls = {call["name"]: call for call in registry.summary()}
+    assert calls["test.outer"]["count"] == 1
+    assert calls["test.outer"]["mean_queries"] == 2
+    assert calls["test.outer"]["mean_rows"] == 13
+    assert calls["test.inner"]["mean_queries"] == 1
+    assert calls["test.inner"]["mean_rows"] == 3
+    registry.reset()
+
+
+def test_slow_calls_and_text_format():
+    metrics = MetricsRegistry(slow_call_ms=100, slow_log_size=2)
+    metrics.observe("fast", 5, 1, 10)
+    metrics.observe("slow", 250, 4, 1000, arguments="1, course_id=2")
+    metrics.observe("slow", 300, 4, 1000, failed=True, arguments="3")
+    metrics.observe("slow", 400, 4, 1000, arguments="4")
+
+    assert [call["arguments"] for call in metrics.slow_calls()] == ["4", "3"]
+    assert metrics.summary()[0]["name"] == "slow"
+    text = metrics.render_text()
+    assert 'analytics_call_duration_ms_bucket{method="slow",le="+Inf"} 3' in text
+    assert 'analytics_call_duration_ms_count{method="fast"} 1' in text
+    assert 'analytics_call_errors_total{method="slow"} 1' in text
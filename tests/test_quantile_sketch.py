@@ -0,0 +1,34 @@
+import random
+
+import numpy as np
+
+from app.utils.quantile_sketch import KLLSketch
+
+
+def test_small_sketch_is_exact():
+    sketch = KLLSketch(k=50).update(range(1, 41))
+    assert sketch.is_exact
+    assert sketch.quantile(0.5) == 20
+    assert sketch.rank(10) == 0.25
+    assert sketch.quantile(0) == 1 and sketch.quantile(1) == 40
+
+
+def test_large_sketch_stays_small_and_accurate():
+    rng = random.Random(1)
+    values = [rng.gauss(0, 1) for _ in range(50000)]
+    sketch = KLLSketch(k=200, seed=1).update(values)
+    assert not sketch.is_exact
+    assert sum(len(level) for level in sketch.levels) < 1000
+    for q in (0.1, 0.5, 0.9):
+        assert abs(sketch.rank(np.quantile(values, q)) - q) < 0.02
+
+
+def test_merge_and_round_trip():
+    rng = random.Random(2)
+    left, right = [rng.random() for _ in range(5000)], [rng.random() + 1 for _ in range(5000)]
+    merged = KLLSketch(seed=3).update(left).merge(KLLSketch(seed=4).update(right))
+    assert merged.n == 10000
+    assert abs(merged.quantile(0.5) - 1.0) < 0.05
+    restored = KLLSketch.from_dict(merged.to_dict())
+    assert restored.n == merged.n and restored.quantile(0.25) == merged.quantile(0.25)
+    assert KLLSketch().quantile(0.5) is None and KLLSketch().rank(1) is None
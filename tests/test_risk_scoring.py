@@ -0,0 +1,29 @@
+import numpy as np
+
+from app.services.risk_service import FEATURES, DEFAULT_MODEL, load_model, predict, rank_within_courses
+
+
+def test_rank_within_courses():
+    courses = np.array([2, 1, 2, 1, 2])
+    scores = np.array([0.3, 0.9, 0.8, 0.1, 0.5])
+    assert rank_within_courses(courses, scores).tolist() == [3, 1, 1, 2, 2]
+    assert rank_within_courses(np.array([], dtype=int), np.array([])).tolist() == []
+
+
+def test_default_model_orders_risk(tmp_path):
+    intercept, weights = load_model(str(tmp_path / "missing.json"))
+    assert intercept == DEFAULT_MODEL["intercept"]
+    assert len(weights) == len(FEATURES)
+
+    healthy = np.zeros(len(FEATURES))
+    struggling = np.full(len(FEATURES), 0.8)
+    scores = predict(np.vstack([healthy, struggling]), intercept, weights)
+    assert 0 < scores[0] < 0.1 < scores[1] < 1
+
+
+def test_load_model_from_file(tmp_path):
+    path = tmp_path / "model.json"
+    path.write_text('{"intercept": 0.5, "weights": {"overdue_ratio": 3}}', encoding="utf-8")
+    intercept, weights = load_model(str(path))
+    assert intercept == 0.5
+    assert weights.tolist() == [3.0 if name == "overdue_ratio" else 0.0 for name in FEATURES]
@@ -0,0 +1,93 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.react.tools import bocha, wiki
+from app.react.tools.fetcher import AsyncFetcher, DiskTTLCache, fetcher, normalize_query
+from app.react.tools.web_search import multi_search
+
+
+class MockSearchHandler(BaseHTTPRequestHandler):
+    """本地mock搜索服务，同时模拟博查和维基百科接口。"""
+    hits = []
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        query = json.loads(self.rfile.read(int(self.headers['Content-Length'])))["query"]
+        MockSearchHandler.hits.append(("bocha", query))
+        self._send_json(200, {"data": {"webPages": {"value": [{"name": query, "url": "http://example.com"}]}}})
+
+    def do_GET(self):
+        title = self.path.rsplit("/", 1)[-1]
+        MockSearchHandler.hits.append(("wiki", title))
+        if title == "Missing":
+            self._send_json(404, {"type": "not_found"})
+        else:
+            self._send_json(200, {"type": "standard", "title": title, "extract": f"About {title}"})
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_server(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockSearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(bocha, "url", base + "/v1/web-search")
+    monkeypatch.setattr(bocha, "api_key", "test-key")
+    monkeypatch.setattr(wiki, "WIKI_API_URL", base + "/{language}")
+    monkeypatch.setattr(fetcher, "cache", DiskTTLCache(str(tmp_path), ttl=60))
+    MockSearchHandler.hits = []
+    yield base
+    server.shutdown()
+
+
+def test_normalize_query():
+    assert normalize_query("  Lambda-CDM   Model ") == normalize_query("lambda-cdm model")
+
+
+def test_disk_cache_expiry(tmp_path):
+    cache = DiskTTLCache(str(tmp_path), ttl=-1)
+    cache.set("wiki", "q", {"a": 1})
+    assert cache.get("wiki", "q") is None
+    cache.ttl = 60
+    cache.set("wiki", "q", {"a": 1})
+    assert cache.get("wiki", " Q ") == {"a": 1}
+
+
+def test_repeated_search_is_served_from_cache(mock_server):
+    first = wiki.search("Alan Turing")
+    second = wiki.search("alan   turing")
+    assert json.loads(first)["summary"] == "About Alan_Turing"
+    assert first == second
+    assert MockSearchHandler.hits == [("wiki", "Alan_Turing")]
+    assert wiki.search("Missing") is None
+
+
+def test_fan_out_across_engines(mock_server):
+    results = json.loads(multi_search("group theory", engines=["bocha", "wiki"]))
+    assert results["bocha"][0]["name"] == "group theory"
+    assert results["wiki"]["title"] == "group_theory"
+    assert sorted(engine for engine, _ in MockSearchHandler.hits) == ["bocha", "wiki"]
+
+
+def test_fan_out_reports_engine_errors(tmp_path):
+    async def broken(query):
+        raise RuntimeError("offline")
+
+    async def working(query):
+        return {"query": query}
+
+    local = AsyncFetcher(cache=DiskTTLCache(str(tmp_path), ttl=60))
+    results = local.fan_out("q", {"broken": broken, "working": working})
+    assert results == {"broken": {"error": "offline"}, "working": {"query": "q"}}
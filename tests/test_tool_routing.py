@@ -0,0 +1,59 @@
+from app.config import Config
+from app.react import agent as agent_module
+from app.react import tool_retriever
+from app.react.agent import Agent
+from app.react.tool_retriever import ToolRetriever, select_tools
+
+VOCABULARY = ["mastery", "grade", "course", "activity", "search", "review"]
+
+
+def keyword_embed(texts):
+    """按关键词计数的确定性嵌入，代替本地嵌入模型。"""
+    return [[text.lower().count(word) for word in VOCABULARY] for text in texts]
+
+
+def make_catalog():
+    descriptions = {
+        "get_mastery": "查看学生各知识点的mastery",
+        "grade_assignment": "为作业打分（grade）",
+        "list_courses": "列出学生选修的course",
+        "record_activity": "记录一次学习activity",
+        "web_search": "在网上search资料",
+        "due_reviews": "列出需要review的知识点",
+    }
+    return {name: {"function": lambda params, name=name: f"{name} done", "description": description}
+            for name, description in descriptions.items()}
+
+
+def test_retriever_selects_top_k_and_reports_misses():
+    retriever = ToolRetriever(make_catalog(), embed=keyword_embed, top_k=2, min_score=0.25)
+    assert set(retriever.select("my mastery after the last grade")) == {"get_mastery", "grade_assignment"}
+    assert retriever.select("你好") is None
+
+
+def test_select_tools_falls_back_to_full_catalog(monkeypatch):
+    catalog = make_catalog()
+    monkeypatch.setattr(Config, "TOOL_ROUTING_TOP_K", 2)
+    retriever = ToolRetriever(catalog, embed=keyword_embed, top_k=2)
+    monkeypatch.setattr(tool_retriever, "get_retriever", lambda tools: retriever)
+    assert set(select_tools("course activity", catalog)) == {"list_courses", "record_activity"}
+    assert select_tools("你好", catalog) is catalog
+
+    def broken(tools):
+        raise RuntimeError("embedding model unavailable")
+
+    monkeypatch.setattr(tool_retriever, "get_retriever", broken)
+    assert select_tools("course activity", catalog) is catalog
+
+
+def test_agent_expands_tools_when_model_names_unselected_tool(monkeypatch, tmp_path):
+    monkeypatch.setattr(agent_module, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+    agent = Agent(model=None)
+    agent.catalog = make_catalog()
+    agent.register("get_mastery", agent.catalog["get_mastery"]["function"], "mastery")
+    monkeypatch.setattr(agent, "think", lambda: None)
+
+    agent.act("web_search", {"query": "KLL sketch"})
+
+    assert set(agent.tools) == set(agent.catalog)
+    assert agent.messages[-1].content == "Observation from web_search: web_search done"